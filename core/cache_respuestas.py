@@ -0,0 +1,78 @@
+# core/cache_respuestas.py
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .versionado import VersionesModelo
+
+class CacheRespuestaMixin:
+    """
+    GET condicional y cache de respuestas para viewsets de lectura frecuente.
+
+    La versión de los modelos de `modelos_cache` (ver VersionesModelo) define
+    el ETag y el Last-Modified de cada respuesta. Si el cliente ya tiene esa
+    versión se responde 304; si no, se devuelven los bytes JSON guardados en
+    el cache para la misma URL y versión. Solo en el primer acceso tras un
+    cambio se consulta la base de datos y se serializa.
+
+    Se aplica a las acciones de `acciones_cache`; el resto (escrituras,
+    acciones extra) no cambia. Sin un cache compartido entre procesos
+    (VersionesModelo.compartido) las respuestas no se cachean ni llevan ETag:
+    un worker no vería los cambios guardados en otro.
+    """
+
+    modelos_cache = ()
+    acciones_cache = ('list', 'retrieve')
+    CACHE_TIMEOUT = getattr(settings, 'CATALOGO_CACHE_TIMEOUT', 60 * 60)
+    HTTP_MAX_AGE = getattr(settings, 'CATALOGO_HTTP_MAX_AGE', 60)
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_cacheado(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_cacheado(super().retrieve, request, *args, **kwargs)
+
+    def _responder_cacheado(self, accion, request, *args, **kwargs):
+        if self.action not in self.acciones_cache or not VersionesModelo.compartido():
+            return accion(request, *args, **kwargs)
+
+        versiones = VersionesModelo.obtener(*self.modelos_cache)
+        parametros = sorted((nombre, valor) for nombre in request.query_params for valor in request.query_params.getlist(nombre))
+        # Esquema y host forman parte de la firma: las URLs de imágenes son absolutas
+        origen = f"{request.scheme}://{request.get_host()}"
+        firma = hashlib.md5(f"{versiones}:{origen}:{request.path}:{parametros}".encode()).hexdigest()
+        etag = quote_etag(firma)
+        # Segundo (truncado) del último cambio
+        ultima_modificacion = max(versiones) // 10 ** 9
+
+        if_none_match = request.headers.get('If-None-Match')
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if if_none_match:
+            no_modificado = etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+        else:
+            # Estrictamente posterior: una copia del mismo segundo que el cambio puede ser anterior a él
+            no_modificado = if_modified_since is not None and if_modified_since > ultima_modificacion
+
+        if no_modificado:
+            respuesta = HttpResponseNotModified()
+        else:
+            clave = f"respuesta_{self.basename}_{firma}"
+            contenido = cache.get(clave)
+            if contenido is None:
+                respuesta = accion(request, *args, **kwargs)
+                if respuesta.status_code != 200:
+                    return respuesta
+                contenido = JSONRenderer().render(respuesta.data)
+                cache.set(clave, contenido, self.CACHE_TIMEOUT)
+            respuesta = HttpResponse(contenido, content_type='application/json')
+
+        respuesta['ETag'] = etag
+        respuesta['Last-Modified'] = http_date(ultima_modificacion)
+        patch_cache_control(respuesta, public=True, max_age=self.HTTP_MAX_AGE)
+        patch_vary_headers(respuesta, ('Accept',))
+        return respuesta
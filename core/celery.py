@@ -0,0 +1,12 @@
+# core/celery.py
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+app = Celery('core')
+# Configuración desde settings.py con el prefijo CELERY_ (CELERY_BROKER_URL, CELERY_BEAT_SCHEDULE...)
+app.config_from_object('django.conf:settings', namespace='CELERY')
+# Las tareas de cada app viven en su módulo task.py
+app.autodiscover_tasks(related_name='task')
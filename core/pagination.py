@@ -0,0 +1,58 @@
+# core/pagination.py
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+class PaginacionCursor(CursorPagination):
+    """
+    Paginación por cursor (keyset): cada página filtra desde la posición de la
+    anterior en lugar de usar OFFSET, y no cuenta el total. El costo de una
+    página profunda es el mismo que el de la primera.
+
+    El orden es siempre el `cursor_ordering` de la vista (debe tener un índice
+    compuesto que lo cubra); ?ordering= y el orden por relevancia no aplican.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+class PaginacionSeleccionable(PageNumberPagination):
+    """
+    Paginación por número de página (la de siempre) o por cursor, elegida en
+    cada petición: ?paginacion=cursor (o un ?cursor= de los enlaces
+    next/previous) usa PaginacionCursor.
+    """
+
+    parametro_modo = 'paginacion'
+
+    def _paginador(self, request):
+        if request.query_params.get(self.parametro_modo) == 'cursor' or PaginacionCursor.cursor_query_param in request.query_params:
+            return PaginacionCursor()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = self._paginador(request)
+        if self.cursor is not None:
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor is not None:
+            return self.cursor.get_html_context()
+        return super().get_html_context()
+
+    def get_schema_operation_parameters(self, view):
+        parametros = super().get_schema_operation_parameters(view)
+        parametros += PaginacionCursor().get_schema_operation_parameters(view)
+        parametros.append({
+            'name': self.parametro_modo,
+            'required': False,
+            'in': 'query',
+            'description': "Modo de paginación: 'cursor' para paginar por cursor",
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        })
+        return parametros
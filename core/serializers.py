@@ -0,0 +1,112 @@
+# core/serializers.py
+from rest_framework import serializers
+
+class CamposDinamicosMixin:
+    """
+    Sparse fieldsets: ?fields=id,nombre,precio limita los campos de la
+    respuesta. Los serializers anidados que también usan el mixin aceptan
+    rutas con punto (?fields=id,cantidad,producto.nombre); si un anidado se
+    pide sin subcampos, va completo. Solo aplica a lecturas (GET): en
+    escrituras se usan todos los campos.
+
+    columnas_consulta() traduce los campos pedidos a columnas para only() y
+    relaciones para select_related(), de modo que la consulta lea solo lo
+    que se va a serializar. Los SerializerMethodField declaran sus columnas
+    en Meta.columnas_metodos.
+    """
+
+    parametro_campos = 'fields'
+
+    def _ruta(self):
+        """Ruta de este serializer desde la raíz ('' la raíz, 'detalles.producto'...)."""
+        partes = []
+        nodo = self
+        while nodo.parent is not None:
+            if nodo.field_name:
+                partes.append(nodo.field_name)
+            nodo = nodo.parent
+        return '.'.join(reversed(partes))
+
+    def _campos_solicitados(self):
+        """Nombres de campo pedidos para este serializer, o None si van todos."""
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return None
+        valor = request.query_params.get(self.parametro_campos)
+        if not valor:
+            return None
+
+        prefijo = self._ruta()
+        prefijo = f"{prefijo}." if prefijo else ''
+        solicitados = set()
+        for campo in valor.split(','):
+            campo = campo.strip()
+            if campo.startswith(prefijo) and len(campo) > len(prefijo):
+                solicitados.add(campo[len(prefijo):].split('.')[0])
+        # Un anidado nombrado sin subcampos (?fields=producto) va completo
+        return solicitados or (None if prefijo else set())
+
+    def get_fields(self):
+        campos = super().get_fields()
+        solicitados = self._campos_solicitados()
+        if solicitados is None:
+            return campos
+        return {nombre: campo for nombre, campo in campos.items() if nombre in solicitados}
+
+    def columnas_consulta(self, prefijo=''):
+        """
+        Columnas y relaciones que necesitan los campos (ya filtrados) del serializer.
+
+        Returns:
+            (columnas para only(), relaciones para select_related()), o None si
+            algún campo no se puede traducir y debe leerse el modelo completo
+        """
+        columnas, relaciones = set(), set()
+        columnas_metodos = getattr(getattr(self, 'Meta', None), 'columnas_metodos', {})
+        for nombre, campo in self.fields.items():
+            if campo.write_only:
+                continue
+            if isinstance(campo, serializers.SerializerMethodField):
+                rutas = columnas_metodos.get(nombre)
+                if rutas is None:
+                    return None
+            elif isinstance(campo, CamposDinamicosMixin):
+                anidado = campo.columnas_consulta(f"{prefijo}{campo.source}__")
+                if anidado is None:
+                    return None
+                columnas.update(anidado[0])
+                relaciones.update(anidado[1])
+                relaciones.add(f"{prefijo}{campo.source}")
+                continue
+            elif campo.source == '*' or isinstance(campo, serializers.BaseSerializer):
+                return None
+            else:
+                rutas = ['__'.join(campo.source_attrs)]
+
+            for ruta in rutas:
+                columnas.add(f"{prefijo}{ruta}")
+                # Las relaciones recorridas (categoria__nombre) van en select_related
+                partes = ruta.split('__')
+                for i in range(1, len(partes)):
+                    relaciones.add(prefijo + '__'.join(partes[:i]))
+        return columnas, relaciones
+
+class ConsultaSegunCamposMixin:
+    """
+    Para viewsets cuyo serializer usa CamposDinamicosMixin: en list y
+    retrieve la consulta lee solo las columnas (only) y relaciones
+    (select_related) de los campos que se van a serializar.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, CamposDinamicosMixin):
+            return queryset
+        consulta = serializer.columnas_consulta()
+        if consulta is None:
+            return queryset
+        columnas, relaciones = consulta
+        return queryset.select_related(None).select_related(*relaciones).only(*columnas)
@@ -212,17 +212,60 @@ CSRF_TRUSTED_ORIGINS=['http://*','https://web-production-0a76.up.railway.app']
 
 # CORS_ALLOW_CREDENTIALS = True # Permite cookies/headers de autorización
 
+# --- Cache ---
+# Con REDIS_URL el cache es compartido entre workers de gunicorn y Celery
+# (necesario para el buffer de eventos de recomendaciones). Sin él se usa LocMem.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 RECOMENDACIONES_CACHE_TIMEOUT = 12 * 60 * 60  # 12 horas en segundos
+RECOMENDACIONES_POPULARES_DIAS = 30  # Ventana de ventas para el respaldo por popularidad
+RECOMENDACIONES_PRECALENTAR_BLOQUE = 500  # Productos por bloque al calentar el cache tras regenerar reglas
+RECOMENDACIONES_PRECALENTAR_DISTRIBUIDO = False  # Repartir los bloques en un grupo de tareas Celery
+RECOMENDACIONES_HTTP_MAX_AGE = 5 * 60  # Cache-Control de las sugerencias por GET (cache HTTP/edge)
+RECOMENDACIONES_PRERENDERIZAR = True  # Guardar los carritos en cache como bytes JSON ya renderizados
+RECOMENDACIONES_EVENTOS_LOTE = 500  # Eventos por bulk_create al volcar el buffer (tarea periódica)
+RECOMENDACIONES_ATRIBUCION_DIAS = 7  # Ventana para atribuir una venta a un click en una recomendación
+RECOMENDACIONES_GENERACION_POR_BLOQUES = False  # Contar co-ocurrencias por bloques de ventas (historiales muy grandes)
+RECOMENDACIONES_GENERACION_BLOQUE = 5000  # Notas de venta por bloque en el modo por bloques
+RECOMENDACIONES_PAQUETE_TAMANO = 2  # Productos que acompañan al principal en los paquetes "comprados juntos"
+RECOMENDACIONES_PARTICIONES = None  # Reglas por temporada: None (solo globales), 'mes' o 'temporada'
+RECOMENDACIONES_TEMPORADAS = {  # Meses de cada temporada; los meses no listados usan las reglas globales
+    'escolar': [1, 2, 3],
+    'fiestas': [11, 12],
+}
+RECOMENDACIONES_TENDENCIAS_HORAS = 24  # Ventana por defecto de productos en tendencia (cubos de una hora)
+CATALOGO_CACHE_TIMEOUT = 60 * 60  # Respuestas cacheadas de catálogo (se invalidan por versión del modelo)
+CATALOGO_HTTP_MAX_AGE = 60  # Cache-Control de las lecturas de catálogo (luego se revalidan con ETag)
+PRODUCTOS_IMPORTACION_LOTE = 2000  # Filas por lote (y transacción) en la importación masiva de productos
+
+# Celery (core/celery.py): broker propio o el mismo Redis del cache
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TIMEZONE = TIME_ZONE
 
 CELERY_BEAT_SCHEDULE = {
     'actualizar-recomendaciones': {
-        'task': 'recomendaciones.tasks.actualizar_recomendaciones',
+        'task': 'recomendaciones.task.actualizar_recomendaciones',
         'schedule': crontab(hour=3, minute=0),  # Ejecutar a las 3 AM todos los días
     },
     'precalcular-recomendaciones-populares': {
-        'task': 'recomendaciones.tasks.precalcular_recomendaciones_populares',
+        'task': 'recomendaciones.task.precalcular_recomendaciones_populares',
         'schedule': crontab(hour='*/4', minute=15),  # Cada 4 horas, minuto 15
     },
+    'calcular-productos-populares': {
+        'task': 'recomendaciones.task.calcular_productos_populares',
+        'schedule': crontab(hour='*/4', minute=10),  # Antes del precálculo de populares
+    },
+    'consolidar-eventos-recomendaciones': {
+        'task': 'recomendaciones.task.consolidar_eventos_recomendaciones',
+        'schedule': crontab(minute=5),  # Cada hora, minuto 5
+    },
 }
 
 # Configuración de Stripe
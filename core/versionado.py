@@ -0,0 +1,74 @@
+# core/versionado.py
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+class VersionesModelo:
+    """
+    Versión de los datos de cada modelo, guardada en el cache compartido.
+
+    La versión es el instante (en nanosegundos) del último cambio confirmado,
+    así que sirve como contador para las claves de cache y como fecha de
+    última modificación. Las señales post_save/post_delete de los modelos
+    registrados la suben al confirmar la transacción; las actualizaciones
+    masivas (queryset.update, bulk_create) deben llamar a incrementar().
+
+    Si la versión no está en el cache (reinicio, expulsión), se inicializa
+    con el instante actual: invalida lo cacheado, nunca sirve datos viejos.
+
+    Con un cache por proceso (LocMem, el de por defecto sin REDIS_URL) un
+    cambio en un worker no sube la versión de los demás: quien cachee según
+    estas versiones debe consultar compartido() y no cachear si es False.
+    """
+
+    PREFIJO = 'version_modelo'
+
+    @classmethod
+    def obtener_clave(cls, modelo):
+        """Clave de cache de la versión de un modelo."""
+        return f"{cls.PREFIJO}_{modelo._meta.label_lower}"
+
+    @staticmethod
+    def compartido():
+        """True si el cache por defecto es el mismo para todos los procesos (Redis, memcached...)."""
+        return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+    @classmethod
+    def obtener(cls, *modelos):
+        """
+        Versiones actuales de varios modelos con una sola lectura del cache.
+
+        Returns:
+            Tupla con la versión de cada modelo, en el mismo orden
+        """
+        claves = [cls.obtener_clave(modelo) for modelo in modelos]
+        versiones = cache.get_many(claves)
+        for clave in claves:
+            if clave not in versiones:
+                cache.add(clave, time.time_ns(), None)
+                versiones[clave] = cache.get(clave)
+        return tuple(versiones[clave] for clave in claves)
+
+    @classmethod
+    def incrementar(cls, *modelos):
+        """Marca los modelos como modificados ahora."""
+        ahora = time.time_ns()
+        claves = [cls.obtener_clave(modelo) for modelo in modelos]
+        actuales = cache.get_many(claves)
+        # Siempre crece, aunque dos cambios caigan en el mismo instante
+        cache.set_many({clave: max(ahora, actuales.get(clave, 0) + 1) for clave in claves}, None)
+
+    @classmethod
+    def registrar(cls, *modelos):
+        """Conecta las señales que suben la versión de cada modelo al guardar o borrar."""
+        for modelo in modelos:
+            post_save.connect(cls._al_cambiar, sender=modelo, dispatch_uid=f"{cls.PREFIJO}_guardar_{modelo._meta.label_lower}")
+            post_delete.connect(cls._al_cambiar, sender=modelo, dispatch_uid=f"{cls.PREFIJO}_borrar_{modelo._meta.label_lower}")
+
+    @classmethod
+    def _al_cambiar(cls, sender, **kwargs):
+        transaction.on_commit(lambda: cls.incrementar(sender))
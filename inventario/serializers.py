@@ -2,13 +2,15 @@
 from rest_framework import serializers
 from .models import Sucursal, Stock
 from productos.serializers import ProductoSerializer # Reutilizar serializer de Producto
+from core.serializers import CamposDinamicosMixin
 
 class SucursalSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sucursal
         fields = '__all__'
 
-class StockSerializer(serializers.ModelSerializer):
+class StockSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    # ?fields=id,cantidad,producto.nombre limita los campos (también del producto)
     # Opcional: Mostrar detalles del producto y sucursal
     producto = ProductoSerializer(read_only=True)
     sucursal_nombre = serializers.CharField(source='sucursal.nombre', read_only=True)
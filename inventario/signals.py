@@ -0,0 +1,6 @@
+# inventario/signals.py
+from core.versionado import VersionesModelo
+from .models import Sucursal
+
+# Versión de sucursales (ETag y respuestas cacheadas del listado)
+VersionesModelo.registrar(Sucursal)
@@ -4,18 +4,26 @@ from .models import Sucursal, Stock
 from .serializers import SucursalSerializer, StockSerializer
 # Importa permisos necesarios (Reponedor puede gestionar stock?)
 from core.permissions import IsAdminOrReadOnly, IsReponedorOrAdmin
+from core.pagination import PaginacionSeleccionable
+from core.cache_respuestas import CacheRespuestaMixin
+from core.serializers import ConsultaSegunCamposMixin
 
-class SucursalViewSet(viewsets.ModelViewSet):
+class SucursalViewSet(CacheRespuestaMixin, viewsets.ModelViewSet):
     queryset = Sucursal.objects.all()
     serializer_class = SucursalSerializer
     # Cualquiera puede ver, solo Admin puede editar
     permission_classes = [IsAdminOrReadOnly]
+    # Lecturas con ETag/304 y respuestas cacheadas según la versión del modelo
+    modelos_cache = (Sucursal,)
 
-class StockViewSet(viewsets.ModelViewSet):
+class StockViewSet(ConsultaSegunCamposMixin, viewsets.ModelViewSet):
     queryset = Stock.objects.select_related('producto', 'sucursal').all()
     serializer_class = StockSerializer
     # Solo Reponedores y Admins pueden gestionar el stock
     permission_classes = [IsReponedorOrAdmin]
+    # ?paginacion=cursor: paginación por cursor sobre la clave primaria
+    pagination_class = PaginacionSeleccionable
+    cursor_ordering = ('id',)
 
     # Podrías querer filtrar por sucursal o producto
     # filterset_fields = ['sucursal', 'producto']
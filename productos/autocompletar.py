@@ -0,0 +1,168 @@
+# productos/autocompletar.py
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Categoria, Marca, Producto
+
+class IndiceAutocompletado:
+    """
+    Índice de prefijos en memoria del proceso para el autocompletado.
+
+    Por cada tipo (productos, marcas, categorías) hay una lista ordenada de
+    tuplas (clave, id, nombre) con una clave por cada palabra del nombre
+    (el nombre desde esa palabra, en minúsculas y sin tildes), así que
+    "glo" encuentra "Leche Gloria". Las consultas son una búsqueda binaria y
+    un recorrido de los primeros resultados: no tocan la base de datos.
+
+    Las señales aplican los cambios al índice del proceso y suben una versión
+    en el cache; los demás procesos la comparan (como mucho cada
+    INTERVALO_VERSION segundos) y reconstruyen su índice si cambió.
+    """
+
+    MODELOS = {'productos': Producto, 'marcas': Marca, 'categorias': Categoria}
+    CLAVE_VERSION = 'productos_autocompletar_version'
+    INTERVALO_VERSION = getattr(settings, 'PRODUCTOS_AUTOCOMPLETAR_INTERVALO', 1)
+    LIMITE_MAXIMO = 20
+
+    _entradas = None  # {tipo: lista ordenada de (clave, id, nombre)}
+    _claves = {}  # {(tipo, id): claves del objeto en el índice}
+    _version = None
+    _ultima_verificacion = 0
+    _bloqueo = threading.Lock()
+
+    @staticmethod
+    def normalizar(texto):
+        """Minúsculas y sin tildes, para comparar prefijos."""
+        texto = unicodedata.normalize('NFKD', texto.lower())
+        return ''.join(c for c in texto if not unicodedata.combining(c)).strip()
+
+    @classmethod
+    def _claves_de(cls, nombre):
+        """Una clave por palabra: el nombre normalizado desde cada palabra."""
+        palabras = cls.normalizar(nombre).split()
+        return {' '.join(palabras[i:]) for i in range(len(palabras))}
+
+    @classmethod
+    def construir(cls):
+        """
+        Reconstruye el índice completo del proceso (una consulta por tipo).
+
+        Returns:
+            Las entradas construidas
+        """
+        with cls._bloqueo:
+            version = cache.get(cls.CLAVE_VERSION)
+            entradas = {}
+            claves = {}
+            for tipo, modelo in cls.MODELOS.items():
+                lista = []
+                for objeto_id, nombre in modelo.objects.values_list('id', 'nombre').order_by():
+                    claves_objeto = cls._claves_de(nombre)
+                    claves[(tipo, objeto_id)] = claves_objeto
+                    lista.extend((clave, objeto_id, nombre) for clave in claves_objeto)
+                lista.sort()
+                entradas[tipo] = lista
+            cls._entradas, cls._claves, cls._version = entradas, claves, version
+            cls._ultima_verificacion = time.monotonic()
+            return entradas
+
+    @classmethod
+    def _vigente(cls):
+        """
+        Entradas vigentes: construye el índice si falta o si otro proceso cambió
+        la versión. Se retorna la referencia leída una vez, así que un
+        invalidar() concurrente (que deja _entradas en None) no afecta a quien
+        ya la tiene.
+        """
+        entradas = cls._entradas
+        if entradas is None:
+            return cls.construir()
+        ahora = time.monotonic()
+        if ahora - cls._ultima_verificacion < cls.INTERVALO_VERSION:
+            return entradas
+        cls._ultima_verificacion = ahora
+        if cache.get(cls.CLAVE_VERSION) != cls._version:
+            return cls.construir()
+        return entradas
+
+    @classmethod
+    def _quitar(cls, tipo, objeto_id):
+        lista = cls._entradas[tipo]
+        for clave in cls._claves.pop((tipo, objeto_id), ()):
+            posicion = bisect_left(lista, (clave, objeto_id))
+            if posicion < len(lista) and lista[posicion][:2] == (clave, objeto_id):
+                del lista[posicion]
+
+    @classmethod
+    def _nueva_version(cls):
+        """Sube la versión compartida; este proceso ya tiene el cambio aplicado."""
+        cls._version = time.time_ns()
+        cache.set(cls.CLAVE_VERSION, cls._version, None)
+
+    @classmethod
+    def actualizar(cls, tipo, objeto_id, nombre):
+        """Inserta o reemplaza las entradas de un objeto (incremental)."""
+        with cls._bloqueo:
+            if cls._entradas is None:
+                cls._nueva_version()
+                return
+            cls._quitar(tipo, objeto_id)
+            claves_objeto = cls._claves_de(nombre)
+            cls._claves[(tipo, objeto_id)] = claves_objeto
+            for clave in claves_objeto:
+                insort(cls._entradas[tipo], (clave, objeto_id, nombre))
+            cls._nueva_version()
+
+    @classmethod
+    def eliminar(cls, tipo, objeto_id):
+        """Quita las entradas de un objeto borrado."""
+        with cls._bloqueo:
+            if cls._entradas is None:
+                cls._nueva_version()
+                return
+            cls._quitar(tipo, objeto_id)
+            cls._nueva_version()
+
+    @classmethod
+    def invalidar(cls):
+        """Tras cambios masivos (sin señales por objeto): todos los procesos reconstruyen."""
+        with cls._bloqueo:
+            cls._entradas = None
+            cls._nueva_version()
+
+    @classmethod
+    def buscar(cls, texto, limite=8):
+        """
+        Primeros `limite` nombres de cada tipo que empiezan (en alguna de sus
+        palabras) por el texto.
+
+        Returns:
+            Diccionario {tipo: [{'id': ..., 'nombre': ...}, ...]}
+        """
+        entradas = cls._vigente()
+        prefijo = ' '.join(cls.normalizar(texto).split())
+        limite = max(1, min(limite, cls.LIMITE_MAXIMO))
+
+        resultado = {}
+        # Las listas se modifican en su lugar (actualizar/eliminar) bajo el mismo bloqueo
+        with cls._bloqueo:
+            for tipo, lista in entradas.items():
+                encontrados = []
+                vistos = set()
+                if prefijo:
+                    posicion = bisect_left(lista, (prefijo,))
+                    while posicion < len(lista) and len(encontrados) < limite:
+                        clave, objeto_id, nombre = lista[posicion]
+                        if not clave.startswith(prefijo):
+                            break
+                        if objeto_id not in vistos:
+                            vistos.add(objeto_id)
+                            encontrados.append({'id': objeto_id, 'nombre': nombre})
+                        posicion += 1
+                resultado[tipo] = encontrados
+        return resultado
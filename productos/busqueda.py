@@ -0,0 +1,149 @@
+# productos/busqueda.py
+import re
+
+from django.db import connection
+from django.db.models import ExpressionWrapper, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Producto, DocumentoBusqueda
+
+class BusquedaProductos:
+    """
+    Búsqueda de texto completo sobre los documentos de búsqueda de productos.
+
+    Cada producto tiene un DocumentoBusqueda con su nombre, descripción y los
+    nombres de su marca y categoría, que las señales mantienen al día. Sobre
+    esa tabla la migración crea un índice según el motor:
+
+    - PostgreSQL: columna tsvector ponderada (nombre > marca/categoría >
+      descripción) con índice GIN, más trigramas del nombre (pg_trgm) para
+      errores de tipeo. Cada término se busca como prefijo (to_tsquery con
+      :*) y el nombre con word_similarity, así que "sams" encuentra
+      "Samsung" mientras se escribe. Se ordena por ts_rank + similitud.
+    - SQLite: tabla virtual FTS5 sincronizada por triggers, con prefijos
+      en cada término. Se ordena por bm25 con los mismos pesos.
+
+    Con otros motores no hay índice y se usa el SearchFilter original.
+    """
+
+    TABLA = DocumentoBusqueda._meta.db_table
+    TABLA_FTS = f"{TABLA}_fts"
+    # Pesos de nombre, marca, categoría y descripción para bm25
+    PESOS_BM25 = (10.0, 4.0, 4.0, 1.0)
+
+    @staticmethod
+    def disponible():
+        """Indica si el motor de base de datos actual tiene índice de búsqueda."""
+        return connection.vendor in ('postgresql', 'sqlite')
+
+    @staticmethod
+    def _terminos(texto):
+        """Palabras del texto buscado (sin operadores ni signos)."""
+        return re.findall(r'\w+', texto.lower())
+
+    @classmethod
+    def buscar(cls, queryset, texto):
+        """
+        Filtra un queryset de productos por el texto buscado y lo anota con
+        `relevancia` (mayor es más relevante), calculada en la misma consulta.
+
+        Returns:
+            Queryset filtrado y anotado (sin límite de resultados ni orden)
+        """
+        terminos = cls._terminos(texto)
+        if not terminos:
+            return queryset.none()
+
+        producto_id = f"{connection.ops.quote_name(Producto._meta.db_table)}.{connection.ops.quote_name('id')}"
+        if connection.vendor == 'postgresql':
+            # Todos los términos, cada uno como prefijo; el nombre también por similitud de palabra
+            consulta = ' & '.join(f"{termino}:*" for termino in terminos)
+            texto = ' '.join(terminos)
+            coincide = "(vector @@ to_tsquery('spanish', %s) OR %s <%% nombre)"
+            coincidentes = RawSQL(f"SELECT producto_id FROM {cls.TABLA} WHERE {coincide}", (consulta, texto))
+            relevancia = RawSQL(
+                f"SELECT ts_rank(vector, to_tsquery('spanish', %s)) + word_similarity(%s, nombre) "
+                f"FROM {cls.TABLA} WHERE producto_id = {producto_id}",
+                (consulta, texto)
+            )
+        else:
+            # Cada término entre comillas (sin sintaxis FTS5) y como prefijo
+            consulta = ' '.join(f'"{termino}"*' for termino in terminos)
+            pesos = ', '.join(str(peso) for peso in cls.PESOS_BM25)
+            coincidentes = RawSQL(
+                f"SELECT rowid FROM {cls.TABLA_FTS} WHERE {cls.TABLA_FTS} MATCH %s", (consulta,)
+            )
+            # bm25 es menor cuanto más relevante: se invierte el signo
+            relevancia = RawSQL(
+                f"SELECT -bm25({cls.TABLA_FTS}, {pesos}) FROM {cls.TABLA_FTS} "
+                f"WHERE {cls.TABLA_FTS} MATCH %s AND rowid = {producto_id}",
+                (consulta,)
+            )
+
+        return queryset.filter(pk__in=coincidentes).annotate(
+            relevancia=ExpressionWrapper(relevancia, output_field=FloatField())
+        )
+
+    @staticmethod
+    def actualizar_productos(productos_ids):
+        """Crea o actualiza los documentos de búsqueda de varios productos en una consulta."""
+        DocumentoBusqueda.objects.bulk_create(
+            [
+                DocumentoBusqueda(
+                    producto_id=producto['id'],
+                    nombre=producto['nombre'],
+                    marca=producto['marca__nombre'] or '',
+                    categoria=producto['categoria__nombre'] or '',
+                    descripcion=producto['descripcion'] or '',
+                )
+                for producto in Producto.objects.filter(id__in=productos_ids).values(
+                    'id', 'nombre', 'descripcion', 'marca__nombre', 'categoria__nombre'
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=['producto'],
+            update_fields=['nombre', 'marca', 'categoria', 'descripcion'],
+            batch_size=1000
+        )
+
+    @staticmethod
+    def actualizar_marca(marca):
+        """Copia el nombre de una marca a los documentos de sus productos."""
+        DocumentoBusqueda.objects.filter(producto__marca=marca).exclude(
+            marca=marca.nombre
+        ).update(marca=marca.nombre)
+
+    @staticmethod
+    def actualizar_categoria(categoria):
+        """Copia el nombre de una categoría a los documentos de sus productos."""
+        DocumentoBusqueda.objects.filter(producto__categoria=categoria).exclude(
+            categoria=categoria.nombre
+        ).update(categoria=categoria.nombre)
+
+    @staticmethod
+    def limpiar_huerfanos():
+        """Vacía marca/categoría en los documentos cuyos productos quedaron sin ellas."""
+        DocumentoBusqueda.objects.filter(producto__marca__isnull=True).exclude(marca='').update(marca='')
+        DocumentoBusqueda.objects.filter(producto__categoria__isnull=True).exclude(categoria='').update(categoria='')
+
+class BusquedaProductoFilter(filters.SearchFilter):
+    """
+    Reemplazo de SearchFilter para productos: usa el índice de texto completo
+    en lugar de icontains sobre varias columnas con joins, y ordena por
+    relevancia salvo que se pida otro orden con ?ordering=.
+
+    Debe ir después de OrderingFilter en filter_backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        texto = request.query_params.get(self.search_param, '')
+        if not texto.strip():
+            return queryset
+        if not BusquedaProductos.disponible():
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = BusquedaProductos.buscar(queryset, texto)
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by('-relevancia', 'pk')
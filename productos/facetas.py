@@ -0,0 +1,101 @@
+# productos/facetas.py
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from core.versionado import VersionesModelo
+from .models import Categoria, Marca, Producto
+
+class FacetasProducto:
+    """
+    Conteos por categoría, marca, color y capacidad de un listado filtrado.
+
+    Una sola consulta agrupada cuenta en la base de datos todas las facetas
+    (nunca se traen las filas de productos). Con un cache compartido el
+    resultado se guarda con una firma de los filtros de la petición y la
+    versión del catálogo, así que cualquier cambio de productos, marcas o
+    categorías lo invalida.
+    """
+
+    CACHE_TIMEOUT = getattr(settings, 'PRODUCTOS_FACETAS_TIMEOUT', 60 * 60)
+    # Parámetros que no cambian el conjunto de productos
+    PARAMETROS_IGNORADOS = {'page', 'page_size', 'cursor', 'paginacion', 'ordering', 'format'}
+
+    @classmethod
+    def obtener_clave(cls, parametros):
+        """Clave de cache: firma de los filtros + versión del catálogo."""
+        filtros = sorted(
+            (nombre, valor)
+            for nombre in parametros if nombre not in cls.PARAMETROS_IGNORADOS
+            for valor in parametros.getlist(nombre)
+        )
+        version = ':'.join(str(v) for v in VersionesModelo.obtener(Producto, Marca, Categoria))
+        firma = hashlib.md5(f"{version}:{filtros}".encode()).hexdigest()
+        return f"productos_facetas_{firma}"
+
+    @staticmethod
+    def calcular(queryset):
+        """
+        Cuenta las facetas de un queryset de productos con una sola consulta
+        agrupada por las seis columnas de las facetas: la base de datos cuenta
+        cada combinación y aquí solo se suman esos grupos (pocos, frente al
+        número de productos) por faceta.
+
+        Returns:
+            Diccionario con el total y una lista de valores con su conteo por faceta
+        """
+        grupos = queryset.order_by().values(
+            'categoria_id', 'categoria__nombre', 'marca_id', 'marca__nombre', 'color', 'capacidad'
+        ).annotate(conteo=Count('pk'))
+
+        total = 0
+        categorias, marcas, colores, capacidades = Counter(), Counter(), Counter(), Counter()
+        for grupo in grupos:
+            conteo = grupo['conteo']
+            total += conteo
+            if grupo['categoria_id'] is not None:
+                categorias[(grupo['categoria_id'], grupo['categoria__nombre'])] += conteo
+            if grupo['marca_id'] is not None:
+                marcas[(grupo['marca_id'], grupo['marca__nombre'])] += conteo
+            if grupo['color']:
+                colores[grupo['color']] += conteo
+            if grupo['capacidad']:
+                capacidades[grupo['capacidad']] += conteo
+
+        def ordenar(contador):
+            return sorted(contador.items(), key=lambda item: (-item[1], item[0]))
+
+        return {
+            'total': total,
+            'categoria': [
+                {'id': id, 'nombre': nombre, 'conteo': conteo} for (id, nombre), conteo in ordenar(categorias)
+            ],
+            'marca': [
+                {'id': id, 'nombre': nombre, 'conteo': conteo} for (id, nombre), conteo in ordenar(marcas)
+            ],
+            'color': [{'valor': valor, 'conteo': conteo} for valor, conteo in ordenar(colores)],
+            'capacidad': [{'valor': valor, 'conteo': conteo} for valor, conteo in ordenar(capacidades)],
+        }
+
+    @classmethod
+    def obtener(cls, parametros, obtener_queryset):
+        """
+        Facetas de los productos filtrados, desde el cache si la firma ya se calculó.
+
+        Args:
+            parametros: Query params de la petición (firma de los filtros)
+            obtener_queryset: Función que retorna el queryset filtrado; solo se
+                llama si no hay cache (el filtrado puede consultar la base)
+        """
+        if not VersionesModelo.compartido():
+            # Cache por proceso: no vería los cambios del catálogo hechos en otro worker
+            return cls.calcular(obtener_queryset())
+        clave = cls.obtener_clave(parametros)
+        facetas = cache.get(clave)
+        if facetas is None:
+            facetas = cls.calcular(obtener_queryset())
+            cache.set(clave, facetas, cls.CACHE_TIMEOUT)
+        return facetas
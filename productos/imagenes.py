@@ -0,0 +1,106 @@
+# productos/imagenes.py
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.versionado import VersionesModelo
+from .models import Producto
+
+class VariantesImagen:
+    """
+    Variantes redimensionadas y comprimidas de la imagen de cada producto.
+
+    Por cada tamaño (miniatura, tarjeta, detalle) se genera una versión WebP
+    y otra JPEG progresiva, sin ampliar imágenes más pequeñas. Se guardan en
+    el mismo storage que el original, con el nombre del original en la ruta
+    (una imagen nueva nunca reutiliza URLs cacheadas por el navegador), y sus
+    rutas quedan en Producto.imagenes:
+
+        {'miniatura': {'webp': 'productos/variantes/12/foto_miniatura.webp', 'jpeg': ...}, ...}
+    """
+
+    TAMANOS = {'miniatura': 150, 'tarjeta': 400, 'detalle': 1000}
+    FORMATOS = {
+        'webp': ('WEBP', {'quality': 80, 'method': 6}),
+        'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    }
+    DIRECTORIO = 'productos/variantes'
+
+    @classmethod
+    def _ruta(cls, producto, variante, extension):
+        base = os.path.splitext(os.path.basename(producto.imagen.name))[0]
+        return f"{cls.DIRECTORIO}/{producto.pk}/{base}_{variante}.{extension}"
+
+    @classmethod
+    def _codificar(cls, imagen, formato, opciones):
+        """Bytes de la imagen en el formato pedido (JPEG sin transparencia, sobre blanco)."""
+        if formato == 'JPEG' and imagen.mode != 'RGB':
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            if imagen.mode in ('RGBA', 'LA'):
+                fondo.paste(imagen, mask=imagen.getchannel('A'))
+            else:
+                fondo.paste(imagen.convert('RGB'))
+            imagen = fondo
+        salida = io.BytesIO()
+        imagen.save(salida, formato, **opciones)
+        return salida.getvalue()
+
+    @staticmethod
+    def _eliminar(imagenes):
+        for formatos in (imagenes or {}).values():
+            for ruta in formatos.values():
+                default_storage.delete(ruta)
+
+    @classmethod
+    def generar(cls, producto):
+        """
+        Genera (o regenera) las variantes de la imagen de un producto y las
+        guarda en Producto.imagenes. Sin imagen, elimina las variantes previas.
+
+        Returns:
+            El mapa de variantes guardado
+        """
+        imagenes = {}
+        if producto.imagen:
+            with default_storage.open(producto.imagen.name, 'rb') as archivo:
+                original = ImageOps.exif_transpose(Image.open(archivo))
+                original.load()
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if original.mode in ('LA', 'PA') or 'transparency' in original.info else 'RGB')
+
+            for variante, tamano in cls.TAMANOS.items():
+                redimensionada = original.copy()
+                redimensionada.thumbnail((tamano, tamano), Image.Resampling.LANCZOS)
+                imagenes[variante] = {}
+                for extension, (formato, opciones) in cls.FORMATOS.items():
+                    ruta = cls._ruta(producto, variante, extension)
+                    if default_storage.exists(ruta):
+                        default_storage.delete(ruta)
+                    imagenes[variante][extension] = default_storage.save(
+                        ruta, ContentFile(cls._codificar(redimensionada, formato, opciones))
+                    )
+
+        anteriores = Producto.objects.filter(pk=producto.pk).values_list('imagenes', flat=True).first()
+        cls._eliminar({
+            variante: {ext: ruta for ext, ruta in formatos.items() if ruta not in imagenes.get(variante, {}).values()}
+            for variante, formatos in (anteriores or {}).items()
+        })
+        # update() no dispara post_save (no vuelve a encolar la generación); la versión se sube a mano
+        Producto.objects.filter(pk=producto.pk).update(imagenes=imagenes)
+        VersionesModelo.incrementar(Producto)
+        producto.imagenes = imagenes
+        return imagenes
+
+    @staticmethod
+    def urls(producto, request=None):
+        """Mapa de variantes con URLs (absolutas si hay request)."""
+        return {
+            variante: {
+                extension: request.build_absolute_uri(default_storage.url(ruta)) if request else default_storage.url(ruta)
+                for extension, ruta in formatos.items()
+            }
+            for variante, formatos in (producto.imagenes or {}).items()
+        }
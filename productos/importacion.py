@@ -0,0 +1,242 @@
+# productos/importacion.py
+import codecs
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+
+from core.versionado import VersionesModelo
+from .models import Categoria, Marca, Producto
+from .busqueda import BusquedaProductos
+from .autocompletar import IndiceAutocompletado
+from .signals import productos_actualizados
+
+class ImportadorProductos:
+    """
+    Importación masiva de productos desde CSV o JSON.
+
+    Las filas se leen en streaming (el archivo nunca se carga completo), se
+    validan en memoria y se guardan por lotes: las marcas y categorías se
+    resuelven con mapas nombre → id cargados una vez (las nuevas se crean en
+    bloque por lote) y los productos se insertan o actualizan por `sku` con
+    bulk_create(update_conflicts=True). Cada lote es una transacción propia:
+    un error de datos solo descarta su fila, y lo ya importado se conserva.
+
+    Columnas: sku, nombre, precio (obligatorias), descripcion, capacidad,
+    color, marca, categoria (nombres; se crean si no existen). En un producto
+    existente, una columna opcional vacía (o ausente) conserva su valor.
+    """
+
+    TAMANO_LOTE = getattr(settings, 'PRODUCTOS_IMPORTACION_LOTE', 2000)
+    MAX_ERRORES = 1000
+    CAMPOS_ACTUALIZAR = ['nombre', 'precio', 'descripcion', 'capacidad', 'color', 'categoria', 'marca']
+    LONGITUDES = {'sku': 64, 'nombre': 100, 'capacidad': 50, 'color': 50, 'marca': 100, 'categoria': 100}
+    PRECIO_MAXIMO = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+
+    def __init__(self, tamano_lote=None):
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+        self.procesadas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.total_errores = 0
+        self.errores = []
+        # Mapas en memoria (sin distinguir mayúsculas) de marcas y categorías existentes
+        self.marcas = {nombre.lower(): id for id, nombre in Marca.objects.values_list('id', 'nombre')}
+        self.categorias = {nombre.lower(): id for id, nombre in Categoria.objects.values_list('id', 'nombre')}
+
+    @staticmethod
+    def leer_csv(archivo):
+        """Filas (diccionarios) de un CSV en bytes, línea a línea."""
+        return csv.DictReader(codecs.iterdecode(archivo, 'utf-8-sig'))
+
+    @staticmethod
+    def leer_json(archivo, tamano_bloque=64 * 1024):
+        """
+        Objetos de un JSON en bytes, leyendo por bloques: un arreglo de objetos
+        ([{...}, {...}]) o JSON Lines (un objeto por línea).
+        """
+        decodificador = json.JSONDecoder()
+        lector = codecs.getincrementaldecoder('utf-8-sig')()
+        texto = ''
+        posicion = 0
+        en_arreglo = None
+        fin = False
+        while True:
+            # Saltar espacios y separadores entre objetos
+            while posicion < len(texto) and (texto[posicion].isspace() or texto[posicion] == ','):
+                posicion += 1
+            if en_arreglo is None and posicion < len(texto):
+                en_arreglo = texto[posicion] == '['
+                if en_arreglo:
+                    posicion += 1
+                continue
+            if posicion < len(texto) and en_arreglo and texto[posicion] == ']':
+                return
+            try:
+                objeto, siguiente = decodificador.raw_decode(texto, posicion)
+            except json.JSONDecodeError:
+                if fin:
+                    if texto[posicion:].strip():
+                        raise ValueError(f"JSON inválido cerca de: {texto[posicion:posicion + 40]!r}")
+                    return
+                bloque = archivo.read(tamano_bloque)
+                fin = not bloque
+                texto = texto[posicion:] + lector.decode(bloque or b'', final=fin)
+                posicion = 0
+                continue
+            # Un número/cadena al final del bloque podría estar cortado: esperar más datos
+            if siguiente == len(texto) and not fin and not isinstance(objeto, (dict, list)):
+                bloque = archivo.read(tamano_bloque)
+                fin = not bloque
+                texto = texto[posicion:] + lector.decode(bloque or b'', final=fin)
+                posicion = 0
+                continue
+            posicion = siguiente
+            yield objeto
+
+    @classmethod
+    def leer(cls, archivo, formato):
+        """Filas del archivo según su formato ('csv' o 'json')."""
+        if formato == 'csv':
+            return cls.leer_csv(archivo)
+        if formato in ('json', 'jsonl'):
+            return cls.leer_json(archivo)
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    @staticmethod
+    def _texto(valor):
+        return '' if valor is None else str(valor).strip()
+
+    def _validar(self, fila):
+        """Normaliza una fila; retorna (datos, errores por campo)."""
+        if not isinstance(fila, dict):
+            return None, {'fila': 'Se esperaba un objeto con los campos del producto.'}
+
+        datos = {campo: self._texto(fila.get(campo)) for campo in (
+            'sku', 'nombre', 'precio', 'descripcion', 'capacidad', 'color', 'marca', 'categoria'
+        )}
+        errores = {}
+        for campo in ('sku', 'nombre', 'precio'):
+            if not datos[campo]:
+                errores[campo] = 'Este campo es obligatorio.'
+        for campo, longitud in self.LONGITUDES.items():
+            if len(datos[campo]) > longitud:
+                errores[campo] = f"Máximo {longitud} caracteres."
+
+        if datos['precio'] and 'precio' not in errores:
+            try:
+                precio = Decimal(datos['precio'].replace(',', '.')).quantize(Decimal('0.01'))
+                if not precio.is_finite() or precio < 0 or precio > self.PRECIO_MAXIMO:
+                    raise InvalidOperation
+                datos['precio'] = precio
+            except (InvalidOperation, ValueError):
+                errores['precio'] = 'Precio inválido.'
+
+        return (None, errores) if errores else (datos, None)
+
+    def _registrar_error(self, numero, errores):
+        self.total_errores += 1
+        if len(self.errores) < self.MAX_ERRORES:
+            self.errores.append({'fila': numero, 'errores': errores})
+
+    def _resolver(self, modelo, mapa, nombres):
+        """Crea en bloque las marcas/categorías que faltan y completa el mapa."""
+        faltantes = {nombre.lower(): nombre for nombre in nombres if nombre and nombre.lower() not in mapa}
+        if not faltantes:
+            return
+        modelo.objects.bulk_create([modelo(nombre=nombre) for nombre in faltantes.values()], ignore_conflicts=True)
+        for id, nombre in modelo.objects.filter(nombre__in=faltantes.values()).values_list('id', 'nombre'):
+            mapa[nombre.lower()] = id
+
+    def _guardar_lote(self, lote):
+        # Un SKU repetido dentro del lote: vale la última fila
+        por_sku = {datos['sku']: datos for datos in lote}
+
+        with transaction.atomic():
+            self._resolver(Marca, self.marcas, {datos['marca'] for datos in por_sku.values()})
+            self._resolver(Categoria, self.categorias, {datos['categoria'] for datos in por_sku.values()})
+
+            # Bloqueados hasta el upsert: sus valores completan las celdas opcionales vacías
+            anteriores = {
+                fila['sku']: fila
+                for fila in Producto.objects.select_for_update().filter(sku__in=por_sku).order_by('sku').values(
+                    'sku', 'id', 'precio', 'descripcion', 'capacidad', 'color', 'marca_id', 'categoria_id'
+                )
+            }
+            productos = []
+            for sku, datos in por_sku.items():
+                anterior = anteriores.get(sku, {})
+                productos.append(Producto(
+                    sku=sku,
+                    nombre=datos['nombre'],
+                    precio=datos['precio'],
+                    descripcion=datos['descripcion'] or anterior.get('descripcion'),
+                    capacidad=datos['capacidad'] or anterior.get('capacidad'),
+                    color=datos['color'] or anterior.get('color'),
+                    marca_id=self.marcas.get(datos['marca'].lower()) if datos['marca'] else anterior.get('marca_id'),
+                    categoria_id=(
+                        self.categorias.get(datos['categoria'].lower()) if datos['categoria']
+                        else anterior.get('categoria_id')
+                    ),
+                ))
+            productos = Producto.objects.bulk_create(
+                productos,
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=self.CAMPOS_ACTUALIZAR,
+            )
+
+            ids = [producto.pk for producto in productos]
+            if None in ids:
+                # Motores sin RETURNING en upserts: recuperar los IDs por SKU
+                ids = list(Producto.objects.filter(sku__in=por_sku).values_list('id', flat=True))
+            BusquedaProductos.actualizar_productos(ids)
+
+            diferencias = {
+                anterior['id']: por_sku[sku]['precio'] - anterior['precio']
+                for sku, anterior in anteriores.items() if por_sku[sku]['precio'] != anterior['precio']
+            }
+            transaction.on_commit(lambda: productos_actualizados.send(
+                sender=Producto, productos_ids=ids, diferencias_precio=diferencias
+            ))
+
+        self.actualizados += len(anteriores)
+        self.creados += len(por_sku) - len(anteriores)
+
+    def importar(self, filas):
+        """
+        Importa las filas (iterable de diccionarios) por lotes.
+
+        Returns:
+            Resumen con filas procesadas, productos creados/actualizados y
+            errores por fila (número de fila de datos, empezando en 1)
+        """
+        lote = []
+        try:
+            for numero, fila in enumerate(filas, start=1):
+                self.procesadas = numero
+                datos, errores = self._validar(fila)
+                if errores:
+                    self._registrar_error(numero, errores)
+                    continue
+                lote.append(datos)
+                if len(lote) >= self.tamano_lote:
+                    self._guardar_lote(lote)
+                    lote = []
+            if lote:
+                self._guardar_lote(lote)
+        finally:
+            if self.creados or self.actualizados:
+                # bulk_create no dispara señales: versiones del catálogo y autocompletado a mano
+                VersionesModelo.incrementar(Producto, Marca, Categoria)
+                IndiceAutocompletado.invalidar()
+
+        return {
+            'procesadas': self.procesadas,
+            'creados': self.creados,
+            'actualizados': self.actualizados,
+            'total_errores': self.total_errores,
+            'errores': self.errores,
+        }
@@ -0,0 +1,99 @@
+# productos/management/commands/benchmark_serializacion.py
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ...models import Categoria, Marca, Producto
+from ...serializers import ProductoSerializer
+from ...serializacion import SerializacionRapidaProducto
+
+class Reversion(Exception):
+    """Deshace los productos sintéticos al terminar la medición."""
+
+class Command(BaseCommand):
+    help = (
+        'Compara el throughput de ProductoSerializer frente a la serialización desde .values() '
+        '(SerializacionRapidaProducto) para listados de 1k, 10k y 100k filas. Si el catálogo tiene '
+        'menos productos, crea productos sintéticos dentro de una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Tamaños de listado a medir'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Repeticiones por tamaño (se reporta la mejor)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._completar_catalogo(max(options['filas']))
+                self._medir(options)
+                raise Reversion()
+        except Reversion:
+            pass
+
+    def _completar_catalogo(self, filas):
+        faltantes = filas - Producto.objects.count()
+        if faltantes <= 0:
+            return
+        self.stdout.write(self.style.NOTICE(f"Creando {faltantes} productos sintéticos (se revierten al terminar)..."))
+        categoria, _ = Categoria.objects.get_or_create(nombre='Benchmark')
+        marca, _ = Marca.objects.get_or_create(nombre='Benchmark')
+        Producto.objects.bulk_create(
+            [
+                Producto(
+                    nombre=f"Producto sintético {i}",
+                    precio=Decimal(i % 1000) + Decimal('0.99'),
+                    descripcion='Descripción de prueba ' * 5,
+                    capacidad='500 ml',
+                    color='rojo',
+                    categoria=categoria if i % 5 else None,
+                    marca=marca,
+                    imagen=f"productos/sintetico_{i}.png" if i % 2 else None,
+                )
+                for i in range(faltantes)
+            ],
+            batch_size=5000
+        )
+
+    def _medir(self, options):
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+        request = Request(APIRequestFactory().get('/api/productos/productos/', HTTP_HOST=host))
+        base = Producto.objects.select_related('categoria', 'marca').order_by('nombre', 'id')
+
+        for filas in sorted(options['filas']):
+            queryset = base[:filas]
+            tiempos = {'serializer': [], 'values': []}
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                datos_serializer = ProductoSerializer(queryset.all(), many=True, context={'request': request}).data
+                tiempos['serializer'].append(time.perf_counter() - inicio)
+
+                inicio = time.perf_counter()
+                datos_values = SerializacionRapidaProducto.serializar(queryset.all(), request)
+                tiempos['values'].append(time.perf_counter() - inicio)
+
+            if [dict(fila) for fila in datos_serializer] != datos_values:
+                self.stderr.write(self.style.ERROR(f"  {filas} filas: las salidas NO coinciden"))
+
+            lento, rapido = min(tiempos['serializer']), min(tiempos['values'])
+            self.stdout.write(
+                f"{len(datos_values):>7} filas | ProductoSerializer: {lento * 1000:8.1f} ms "
+                f"({len(datos_values) / lento:>9.0f} filas/s) | values(): {rapido * 1000:8.1f} ms "
+                f"({len(datos_values) / rapido:>9.0f} filas/s) | "
+                + self.style.SUCCESS(f"x{lento / rapido:.1f}")
+            )
@@ -0,0 +1,63 @@
+# productos/management/commands/generar_variantes_imagenes.py
+from django.core.management.base import BaseCommand
+
+from ...models import Producto
+from ...imagenes import VariantesImagen
+from ...signals import productos_actualizados
+from ...task import encolar_variantes_imagen
+
+class Command(BaseCommand):
+    help = (
+        'Genera las variantes (miniatura, tarjeta, detalle; WebP y JPEG) de las imágenes '
+        'de productos ya subidas. Por defecto solo las de productos que aún no las tienen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Regenerar también los productos que ya tienen variantes'
+        )
+        parser.add_argument(
+            '--productos',
+            type=int,
+            nargs='+',
+            help='IDs de los productos a procesar'
+        )
+        parser.add_argument(
+            '--encolar',
+            action='store_true',
+            help='Enviar cada producto a Celery en lugar de procesarlo aquí'
+        )
+
+    def handle(self, *args, **options):
+        productos = Producto.objects.exclude(imagen='').exclude(imagen__isnull=True).order_by('id')
+        if options['productos']:
+            productos = productos.filter(id__in=options['productos'])
+        if not options['todos']:
+            productos = productos.filter(imagenes={})
+
+        total = productos.count()
+        self.stdout.write(self.style.NOTICE(f"Procesando {total} productos con imagen..."))
+
+        errores = 0
+        generados = []
+        for indice, producto in enumerate(productos.iterator(), start=1):
+            if options['encolar']:
+                encolar_variantes_imagen(producto.pk)
+                continue
+            try:
+                VariantesImagen.generar(producto)
+                generados.append(producto.pk)
+            except Exception as e:
+                errores += 1
+                self.stderr.write(f"  Producto {producto.pk} ({producto.imagen.name}): {e}")
+            if indice % 50 == 0:
+                self.stdout.write(f"  {indice}/{total}")
+
+        # Una sola invalidación de recomendaciones y paquetes cacheados con las imágenes anteriores
+        if generados:
+            productos_actualizados.send(sender=Producto, productos_ids=generados, diferencias_precio={})
+
+        accion = 'encolados' if options['encolar'] else 'procesados'
+        self.stdout.write(self.style.SUCCESS(f"{total - errores} productos {accion}, {errores} con errores."))
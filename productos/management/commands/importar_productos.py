@@ -0,0 +1,54 @@
+# productos/management/commands/importar_productos.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importacion import ImportadorProductos
+
+class Command(BaseCommand):
+    help = (
+        'Importa productos desde un archivo CSV o JSON (arreglo o JSON Lines), creando o '
+        'actualizando por sku. El archivo se lee en streaming y se guarda por lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo a importar')
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'json', 'jsonl'],
+            help='Formato del archivo (por defecto, según la extensión)'
+        )
+        parser.add_argument(
+            '--tamano-lote',
+            type=int,
+            default=ImportadorProductos.TAMANO_LOTE,
+            help='Filas por lote (una transacción por lote)'
+        )
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or options['archivo'].rsplit('.', 1)[-1].lower()
+        if formato not in ('csv', 'json', 'jsonl'):
+            raise CommandError(f"Formato no soportado: {formato}")
+
+        importador = ImportadorProductos(tamano_lote=options['tamano_lote'])
+        inicio = time.perf_counter()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resumen = importador.importar(ImportadorProductos.leer(archivo, formato))
+        except OSError as e:
+            raise CommandError(f"No se pudo abrir el archivo: {e}")
+        except ValueError as e:
+            raise CommandError(
+                f"Error leyendo el archivo tras {importador.procesadas} filas "
+                f"(los lotes anteriores quedaron guardados): {e}"
+            )
+        duracion = time.perf_counter() - inicio
+
+        for error in resumen['errores']:
+            self.stderr.write(f"  Fila {error['fila']}: {error['errores']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['procesadas']} filas en {duracion:.1f} s "
+            f"({resumen['procesadas'] / max(duracion, 1e-9):.0f} filas/s): "
+            f"{resumen['creados']} creados, {resumen['actualizados']} actualizados, "
+            f"{resumen['total_errores']} con errores."
+        ))
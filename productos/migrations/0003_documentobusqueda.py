@@ -0,0 +1,111 @@
+# Generated by Django 5.2 on 2026-10-19 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLA = 'productos_documentobusqueda'
+TABLA_FTS = 'productos_documentobusqueda_fts'
+
+SQLITE = [
+    # Tabla FTS5 de contenido externo: indexa las filas de TABLA sin duplicar el texto
+    f"""CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5(
+        nombre, marca, categoria, descripcion,
+        content='{TABLA}', content_rowid='producto_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # Los triggers mantienen el índice al insertar, actualizar o borrar documentos
+    f"""CREATE TRIGGER {TABLA_FTS}_ai AFTER INSERT ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre, marca, categoria, descripcion)
+        VALUES (new.producto_id, new.nombre, new.marca, new.categoria, new.descripcion);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ad AFTER DELETE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, marca, categoria, descripcion)
+        VALUES ('delete', old.producto_id, old.nombre, old.marca, old.categoria, old.descripcion);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_au AFTER UPDATE ON {TABLA} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre, marca, categoria, descripcion)
+        VALUES ('delete', old.producto_id, old.nombre, old.marca, old.categoria, old.descripcion);
+        INSERT INTO {TABLA_FTS}(rowid, nombre, marca, categoria, descripcion)
+        VALUES (new.producto_id, new.nombre, new.marca, new.categoria, new.descripcion);
+    END""",
+]
+
+SQLITE_REVERSA = [
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_au",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {TABLA_FTS}_ai",
+    f"DROP TABLE IF EXISTS {TABLA_FTS}",
+]
+
+POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # tsvector ponderado como columna generada: se recalcula solo con cada cambio del documento
+    f"""ALTER TABLE {TABLA} ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', nombre), 'A') ||
+        setweight(to_tsvector('spanish', marca), 'B') ||
+        setweight(to_tsvector('spanish', categoria), 'B') ||
+        setweight(to_tsvector('spanish', descripcion), 'C')
+    ) STORED""",
+    f"CREATE INDEX {TABLA}_vector ON {TABLA} USING gin (vector)",
+    # Trigramas del nombre para coincidencias parciales y errores de tipeo
+    f"CREATE INDEX {TABLA}_nombre_trgm ON {TABLA} USING gin (nombre gin_trgm_ops)",
+]
+
+POSTGRES_REVERSA = [
+    f"DROP INDEX IF EXISTS {TABLA}_nombre_trgm",
+    f"DROP INDEX IF EXISTS {TABLA}_vector",
+    f"ALTER TABLE {TABLA} DROP COLUMN IF EXISTS vector",
+]
+
+def _ejecutar(schema_editor, sentencias):
+    for sentencia in sentencias.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+def crear_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE, 'postgresql': POSTGRES})
+
+def eliminar_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_REVERSA, 'postgresql': POSTGRES_REVERSA})
+
+def construir_documentos(apps, schema_editor):
+    Producto = apps.get_model('productos', 'Producto')
+    DocumentoBusqueda = apps.get_model('productos', 'DocumentoBusqueda')
+    DocumentoBusqueda.objects.bulk_create(
+        [
+            DocumentoBusqueda(
+                producto_id=producto['id'],
+                nombre=producto['nombre'],
+                marca=producto['marca__nombre'] or '',
+                categoria=producto['categoria__nombre'] or '',
+                descripcion=producto['descripcion'] or '',
+            )
+            for producto in Producto.objects.values('id', 'nombre', 'descripcion', 'marca__nombre', 'categoria__nombre')
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0002_producto_imagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='documento_busqueda', serialize=False, to='productos.producto')),
+                ('nombre', models.CharField(max_length=100)),
+                ('marca', models.CharField(blank=True, default='', max_length=100)),
+                ('categoria', models.CharField(blank=True, default='', max_length=100)),
+                ('descripcion', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'verbose_name': 'Documento de búsqueda',
+                'verbose_name_plural': 'Documentos de búsqueda',
+            },
+        ),
+        migrations.RunPython(crear_indice, eliminar_indice),
+        migrations.RunPython(construir_documentos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0003_documentobusqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['nombre', 'id'], name='productos_p_nombre_0876a0_idx'),
+        ),
+    ]
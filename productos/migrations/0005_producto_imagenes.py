@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_producto_productos_p_nombre_0876a0_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='imagenes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
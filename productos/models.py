@@ -18,6 +18,8 @@ class Marca(models.Model):
         return self.nombre
 
 class Producto(models.Model):
+    # Código del producto (proveedor/catálogo); clave de las importaciones masivas
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     nombre = models.CharField(max_length=100)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     descripcion = models.TextField(blank=True, null=True)
@@ -25,6 +27,8 @@ class Producto(models.Model):
     color = models.CharField(max_length=50, blank=True, null=True)
     #imagen
     imagen = models.ImageField(upload_to='productos/', blank=True, null=True)  # Opción recomendada
+    # Variantes redimensionadas de la imagen (ver productos/imagenes.py), generadas en segundo plano
+    imagenes = models.JSONField(default=dict, blank=True, editable=False)
 
     # Relaciones ForeignKey
     categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, blank=True, related_name='productos')
@@ -34,4 +38,26 @@ class Producto(models.Model):
         return f"{self.nombre} ({self.marca})"
 
     class Meta:
-         ordering = ['nombre'] # Ordenar por nombre por defecto
\ No newline at end of file
+         ordering = ['nombre'] # Ordenar por nombre por defecto
+         indexes = [
+             models.Index(fields=['nombre', 'id']),  # Paginación por cursor
+         ]
+class DocumentoBusqueda(models.Model):
+    """
+    Documento de búsqueda de un producto: copia de los textos buscables
+    (incluidos los nombres de marca y categoría) en una sola fila, para que
+    la búsqueda no haga joins ni recorra la tabla con icontains.
+    Sobre esta tabla se crea el índice de texto completo (ver migración 0003).
+    """
+    producto = models.OneToOneField(Producto, on_delete=models.CASCADE, primary_key=True, related_name='documento_busqueda')
+    nombre = models.CharField(max_length=100)
+    marca = models.CharField(max_length=100, blank=True, default='')
+    categoria = models.CharField(max_length=100, blank=True, default='')
+    descripcion = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return self.nombre
+
+    class Meta:
+        verbose_name = "Documento de búsqueda"
+        verbose_name_plural = "Documentos de búsqueda"
@@ -0,0 +1,112 @@
+# productos/precios.py
+from decimal import Decimal
+
+from django.db import DataError, transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Greatest, Round
+
+from core.versionado import VersionesModelo
+from .models import Producto
+from .signals import productos_actualizados
+
+class ActualizacionPrecios:
+    """
+    Cambios masivos de precio con UPDATE por conjuntos, sin guardar producto
+    por producto.
+
+    Cada regla (porcentaje o monto, filtrada por categoría y/o marca) es un
+    solo UPDATE con la expresión del nuevo precio; los precios explícitos van
+    en un único UPDATE con CASE por ID. Todo corre en una transacción: los
+    precios anteriores se leen (bloqueados) antes de modificar, y al
+    confirmar se envía productos_actualizados con las diferencias, que
+    ajusta los paquetes e invalida solo las recomendaciones cacheadas de los
+    productos que cambiaron.
+    """
+
+    CAMPO_PRECIO = Producto._meta.get_field('precio')
+    PRECIO_MAXIMO = Decimal(10) ** (CAMPO_PRECIO.max_digits - CAMPO_PRECIO.decimal_places) - Decimal('0.01')
+
+    @classmethod
+    def _salida(cls):
+        return DecimalField(max_digits=cls.CAMPO_PRECIO.max_digits, decimal_places=cls.CAMPO_PRECIO.decimal_places)
+
+    @staticmethod
+    def _filtro(regla):
+        filtro = Q()
+        if regla.get('categoria') is not None:
+            filtro &= Q(categoria=regla['categoria'])
+        if regla.get('marca') is not None:
+            filtro &= Q(marca=regla['marca'])
+        return filtro
+
+    @classmethod
+    def _nuevo_precio(cls, regla):
+        """Expresión SQL del precio tras aplicar la regla (redondeado, nunca negativo)."""
+        if regla['tipo'] == 'porcentaje':
+            # precio * (100 + valor) / 100 en SQL: el factor (-12.5 % → 87.50) es exacto con dos
+            # decimales, así que el resultado no depende de cómo redondee cada motor un 0.875
+            porcentaje = Value(100 + regla['valor'], output_field=DecimalField(max_digits=12, decimal_places=2))
+            expresion = F('precio') * porcentaje / Value(Decimal(100), output_field=cls._salida())
+        else:
+            expresion = F('precio') + Value(regla['valor'], output_field=cls._salida())
+        expresion = Round(expresion, cls.CAMPO_PRECIO.decimal_places, output_field=cls._salida())
+        return Greatest(expresion, Value(Decimal('0'), output_field=cls._salida()), output_field=cls._salida())
+
+    @classmethod
+    def aplicar(cls, reglas=(), precios=()):
+        """
+        Aplica las reglas en orden y después los precios explícitos.
+
+        Args:
+            reglas: [{'tipo': 'porcentaje'|'monto', 'valor': Decimal, 'categoria': ..., 'marca': ...}]
+            precios: [{'id': producto_id, 'precio': Decimal}]
+
+        Returns:
+            Lista de cambios [{'id', 'precio_anterior', 'precio'}] de los productos cuyo precio cambió
+
+        Raises:
+            ValueError: Si algún precio resultante excede el máximo (no se aplica nada)
+        """
+        explicitos = {precio['id']: precio['precio'] for precio in precios}
+        filtro = Q(id__in=explicitos)
+        for regla in reglas:
+            filtro |= cls._filtro(regla)
+
+        with transaction.atomic():
+            anteriores = dict(
+                Producto.objects.select_for_update().filter(filtro).order_by('id').values_list('id', 'precio')
+            )
+            if not anteriores:
+                return []
+
+            try:
+                for regla in reglas:
+                    Producto.objects.filter(cls._filtro(regla)).update(precio=cls._nuevo_precio(regla))
+                if explicitos:
+                    Producto.objects.filter(id__in=explicitos).update(precio=Case(
+                        *[When(id=id, then=Value(precio)) for id, precio in explicitos.items()],
+                        output_field=cls._salida()
+                    ))
+                # PostgreSQL rechaza el UPDATE desbordado (DataError); SQLite lo guarda y se revisa aquí
+                desbordado = Producto.objects.filter(id__in=anteriores, precio__gt=cls.PRECIO_MAXIMO).exists()
+            except DataError:
+                desbordado = True
+            if desbordado:
+                raise ValueError(f"Algún precio resultante supera el máximo permitido ({cls.PRECIO_MAXIMO}).")
+
+            nuevos = dict(Producto.objects.filter(id__in=anteriores).values_list('id', 'precio'))
+
+            diferencias = {
+                id: nuevos[id] - anterior for id, anterior in anteriores.items() if nuevos[id] != anterior
+            }
+            if diferencias:
+                ids = list(diferencias)
+                transaction.on_commit(lambda: productos_actualizados.send(
+                    sender=Producto, productos_ids=ids, diferencias_precio=diferencias
+                ))
+                transaction.on_commit(lambda: VersionesModelo.incrementar(Producto))
+
+        return [
+            {'id': id, 'precio_anterior': anteriores[id], 'precio': nuevos[id]}
+            for id in diferencias
+        ]
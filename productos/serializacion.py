@@ -0,0 +1,91 @@
+# productos/serializacion.py
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+
+from .models import Producto
+from .serializers import ProductoSerializer
+
+class SerializacionRapidaProducto:
+    """
+    Serialización de listados de productos directamente desde filas de
+    .values(), sin instanciar modelos ni campos de DRF por producto.
+
+    Produce exactamente el mismo JSON que ProductoSerializer (mismo orden de
+    claves, precio como texto con sus decimales, *_nombre ausentes si no hay
+    marca/categoría, URLs absolutas de imagen y variantes). Los pasos que no
+    dependen de la fila (prefijo de URLs de media, campos pedidos con
+    ?fields=) se calculan una vez por petición.
+    """
+
+    COLUMNAS = (
+        'id', 'sku', 'nombre', 'precio', 'descripcion', 'capacidad', 'color',
+        'categoria', 'marca', 'categoria__nombre', 'marca__nombre', 'imagen', 'imagenes',
+    )
+    DECIMALES = Producto._meta.get_field('precio').decimal_places
+
+    @staticmethod
+    def aplicable(vista):
+        """La vía rápida solo sustituye a ProductoSerializer completo (no a la vista compacta)."""
+        return vista.get_serializer_class() is ProductoSerializer
+
+    @staticmethod
+    def _constructor_url(request):
+        """Función nombre de archivo → URL igual a la de FileField/ImageField de DRF."""
+        storage = Producto._meta.get_field('imagen').storage
+        if isinstance(storage, FileSystemStorage):
+            prefijo = request.build_absolute_uri(storage.base_url) if request else storage.base_url
+            return lambda nombre: prefijo + filepath_to_uri(nombre).lstrip('/')
+        if request is not None:
+            return lambda nombre: request.build_absolute_uri(storage.url(nombre))
+        return storage.url
+
+    @classmethod
+    def mapeador(cls, request=None):
+        """
+        Construye la función que convierte una fila de .values(*COLUMNAS) en el
+        diccionario de ProductoSerializer (limitado a ?fields= si se indicó).
+        """
+        url = cls._constructor_url(request)
+        formato_precio = f".{cls.DECIMALES}f"
+
+        solicitados = None
+        if request is not None and request.query_params.get('fields'):
+            solicitados = {campo.strip().split('.')[0] for campo in request.query_params['fields'].split(',')}
+        incluir = lambda campo: solicitados is None or campo in solicitados
+
+        simples = [campo for campo in ('id', 'sku', 'nombre') if incluir(campo)]
+        con_precio = incluir('precio')
+        textos = [campo for campo in ('descripcion', 'capacidad', 'color') if incluir(campo)]
+        relaciones = [campo for campo in ('categoria', 'marca') if incluir(campo)]
+        nombres = [campo for campo in ('categoria', 'marca') if incluir(f"{campo}_nombre")]
+        con_imagen = incluir('imagen')
+        con_imagenes = incluir('imagenes')
+
+        def mapear(fila):
+            datos = {campo: fila[campo] for campo in simples}
+            if con_precio:
+                datos['precio'] = format(fila['precio'], formato_precio)
+            for campo in textos:
+                datos[campo] = fila[campo]
+            for campo in relaciones:
+                datos[campo] = fila[campo]
+            # Como en el serializer: sin relación, la clave *_nombre no aparece
+            for campo in nombres:
+                if fila[campo] is not None:
+                    datos[f"{campo}_nombre"] = fila[f"{campo}__nombre"]
+            if con_imagen:
+                datos['imagen'] = url(fila['imagen']) if fila['imagen'] else None
+            if con_imagenes:
+                datos['imagenes'] = {
+                    variante: {extension: url(ruta) for extension, ruta in formatos.items()}
+                    for variante, formatos in (fila['imagenes'] or {}).items()
+                }
+            return datos
+
+        return mapear
+
+    @classmethod
+    def serializar(cls, queryset, request=None):
+        """Lista de diccionarios de un queryset (o página) de productos."""
+        mapear = cls.mapeador(request)
+        return [mapear(fila) for fila in queryset.values(*cls.COLUMNAS)]
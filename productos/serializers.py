@@ -1,6 +1,8 @@
 # productos/serializers.py
 from rest_framework import serializers
 from .models import Categoria, Marca, Producto
+from .imagenes import VariantesImagen
+from core.serializers import CamposDinamicosMixin
 
 class CategoriaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,14 +14,74 @@ class MarcaSerializer(serializers.ModelSerializer):
         model = Marca
         fields = '__all__'
 
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     # Opcional: Mostrar nombres en lugar de IDs para claves foráneas
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
     marca_nombre = serializers.CharField(source='marca.nombre', read_only=True)
+    # Variantes de la imagen por tamaño y formato: {'miniatura': {'webp': url, 'jpeg': url}, ...}
+    imagenes = serializers.SerializerMethodField()
 
     class Meta:
         model = Producto
-        fields = ('id', 'nombre', 'precio', 'descripcion', 'capacidad', 'color',
-                  'categoria', 'marca', 'categoria_nombre', 'marca_nombre', 'imagen')
+        fields = ('id', 'sku', 'nombre', 'precio', 'descripcion', 'capacidad', 'color',
+                  'categoria', 'marca', 'categoria_nombre', 'marca_nombre', 'imagen', 'imagenes')
         # 'categoria' y 'marca' se usan para escribir (enviar IDs)
-        # 'categoria_nombre' y 'marca_nombre' son de solo lectura para mostrar nombres
\ No newline at end of file
+        # 'categoria_nombre' y 'marca_nombre' son de solo lectura para mostrar nombres
+        columnas_metodos = {'imagenes': ['imagenes']}  # Columnas que lee get_imagenes (?fields=)
+
+    def get_imagenes(self, obj):
+        return VariantesImagen.urls(obj, self.context.get('request'))
+
+class ProductoListaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Representación compacta para grillas y listados (?vista=compacta): sin
+    descripción ni imagen original, con las URLs de la miniatura.
+    """
+    categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
+    marca_nombre = serializers.CharField(source='marca.nombre', read_only=True)
+    miniatura = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Producto
+        fields = ('id', 'nombre', 'precio', 'categoria_nombre', 'marca_nombre', 'miniatura')
+        columnas_metodos = {'miniatura': ['imagenes']}
+
+    def get_miniatura(self, obj):
+        return VariantesImagen.urls(obj, self.context.get('request')).get('miniatura')
+
+class ReglaPrecioSerializer(serializers.Serializer):
+    """Cambio de precio para los productos de una categoría y/o marca."""
+    tipo = serializers.ChoiceField(choices=['porcentaje', 'monto'])
+    # porcentaje: -10 baja un 10 %; monto: se suma al precio (negativo para bajar)
+    valor = serializers.DecimalField(max_digits=10, decimal_places=2)
+    categoria = serializers.PrimaryKeyRelatedField(queryset=Categoria.objects.all(), required=False)
+    marca = serializers.PrimaryKeyRelatedField(queryset=Marca.objects.all(), required=False)
+
+    def validate(self, data):
+        if 'categoria' not in data and 'marca' not in data:
+            raise serializers.ValidationError("Indique la categoría y/o la marca a la que aplica la regla.")
+        if data['tipo'] == 'porcentaje' and data['valor'] <= -100:
+            raise serializers.ValidationError({'valor': "El porcentaje debe ser mayor que -100."})
+        return data
+
+class PrecioProductoSerializer(serializers.Serializer):
+    """Precio explícito de un producto."""
+    id = serializers.IntegerField()
+    precio = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+class ActualizacionPreciosSerializer(serializers.Serializer):
+    """Reglas (en orden) y precios explícitos (se aplican al final) de un cambio masivo."""
+    reglas = ReglaPrecioSerializer(many=True, required=False, default=list)
+    precios = PrecioProductoSerializer(many=True, required=False, default=list)
+
+    def validate_precios(self, precios):
+        ids = [precio['id'] for precio in precios]
+        faltantes = set(ids) - set(Producto.objects.filter(id__in=ids).values_list('id', flat=True))
+        if faltantes:
+            raise serializers.ValidationError(f"Productos inexistentes: {sorted(faltantes)}")
+        return precios
+
+    def validate(self, data):
+        if not data['reglas'] and not data['precios']:
+            raise serializers.ValidationError("Envíe al menos una regla o un precio.")
+        return data
@@ -0,0 +1,89 @@
+# productos/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from .models import Categoria, Marca, Producto
+from .busqueda import BusquedaProductos
+from .autocompletar import IndiceAutocompletado
+from core.versionado import VersionesModelo
+from .task import encolar_variantes_imagen
+
+# Se envía (vía transaction.on_commit) cuando se modifican productos en bloque, sin un
+# post_save por producto (importaciones, cambios masivos de precio). Argumentos:
+# productos_ids (lista) y diferencias_precio ({producto_id: precio nuevo - anterior},
+# solo los productos cuyo precio cambió). Otras apps (p. ej. recomendaciones) se
+# suscriben para refrescar lo que tienen cacheado de esos productos.
+productos_actualizados = Signal()
+
+TIPOS_AUTOCOMPLETADO = {Producto: 'productos', Marca: 'marcas', Categoria: 'categorias'}
+
+# Versión del catálogo (facetas, ETag y respuestas cacheadas)
+VersionesModelo.registrar(Producto, Marca, Categoria)
+
+@receiver(post_save, sender=Producto)
+def actualizar_documento_producto(sender, instance, **kwargs):
+    """Mantiene al día el documento de búsqueda del producto guardado."""
+    BusquedaProductos.actualizar_productos([instance.pk])
+
+@receiver(post_save, sender=Marca)
+def actualizar_documentos_marca(sender, instance, created, **kwargs):
+    """Propaga el nombre de la marca a los documentos de sus productos."""
+    if not created:
+        BusquedaProductos.actualizar_marca(instance)
+
+@receiver(post_save, sender=Categoria)
+def actualizar_documentos_categoria(sender, instance, created, **kwargs):
+    """Propaga el nombre de la categoría a los documentos de sus productos."""
+    if not created:
+        BusquedaProductos.actualizar_categoria(instance)
+
+@receiver(post_delete, sender=Marca)
+@receiver(post_delete, sender=Categoria)
+def limpiar_documentos(sender, instance, **kwargs):
+    """Los productos quedan sin marca/categoría (SET_NULL): se limpian sus documentos."""
+    BusquedaProductos.limpiar_huerfanos()
+
+@receiver(post_save, sender=Producto)
+@receiver(post_save, sender=Marca)
+@receiver(post_save, sender=Categoria)
+def actualizar_autocompletado(sender, instance, created, **kwargs):
+    """
+    Aplica el nombre guardado al índice de autocompletado al confirmar. Un
+    producto guardado sin cambiar de nombre (precio, stock...) no toca el
+    índice ni obliga a los demás procesos a reconstruirlo.
+    """
+    if not created and getattr(instance, '_nombre_anterior', None) == instance.nombre:
+        return
+    tipo, objeto_id, nombre = TIPOS_AUTOCOMPLETADO[sender], instance.pk, instance.nombre
+    transaction.on_commit(lambda: IndiceAutocompletado.actualizar(tipo, objeto_id, nombre))
+
+@receiver(post_delete, sender=Producto)
+@receiver(post_delete, sender=Marca)
+@receiver(post_delete, sender=Categoria)
+def eliminar_autocompletado(sender, instance, **kwargs):
+    """Quita el objeto borrado del índice de autocompletado al confirmar."""
+    tipo, objeto_id = TIPOS_AUTOCOMPLETADO[sender], instance.pk
+    transaction.on_commit(lambda: IndiceAutocompletado.eliminar(tipo, objeto_id))
+
+@receiver(pre_save, sender=Producto)
+def recordar_valores_anteriores(sender, instance, **kwargs):
+    """
+    Guarda la imagen, el nombre y el precio vigentes antes de modificar un
+    producto, con una sola consulta para todos los receptores de post_save
+    (variantes de imagen, autocompletado, precio de paquetes en recomendaciones).
+    """
+    instance._imagen_anterior = instance._nombre_anterior = instance._precio_anterior = None
+    if instance.pk:
+        anterior = Producto.objects.filter(pk=instance.pk).values_list('imagen', 'nombre', 'precio').first()
+        if anterior:
+            instance._imagen_anterior, instance._nombre_anterior, instance._precio_anterior = anterior
+
+@receiver(post_save, sender=Producto)
+def generar_variantes_imagen(sender, instance, created, **kwargs):
+    """Encola la generación de variantes si la imagen cambió (o se quitó)."""
+    anterior = getattr(instance, '_imagen_anterior', None) or ''
+    if (instance.imagen.name or '') == anterior:
+        return
+    producto_id = instance.pk
+    transaction.on_commit(lambda: encolar_variantes_imagen(producto_id))
@@ -0,0 +1,44 @@
+# productos/task.py
+import threading
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.db import connection
+
+from .models import Producto
+from .imagenes import VariantesImagen
+
+logger = get_task_logger(__name__)
+
+@shared_task
+def generar_variantes_imagen(producto_id):
+    """
+    Tarea Celery para generar las variantes (miniatura, tarjeta, detalle;
+    WebP y JPEG) de la imagen de un producto.
+    """
+    producto = Producto.objects.filter(pk=producto_id).first()
+    if producto is None:
+        return f"Producto {producto_id} no existe."
+    try:
+        imagenes = VariantesImagen.generar(producto)
+    except Exception as e:
+        logger.error(f"Error generando variantes de imagen del producto {producto_id}: {e}")
+        return f"Error: {str(e)}"
+
+    # Las recomendaciones y paquetes cacheados guardan las rutas de imagen del producto.
+    # Importación diferida: signals importa este módulo
+    from .signals import productos_actualizados
+    productos_actualizados.send(sender=Producto, productos_ids=[producto_id], diferencias_precio={})
+    return f"{len(imagenes)} variantes generadas para el producto {producto_id}."
+
+def encolar_variantes_imagen(producto_id):
+    """Envía la generación a Celery, o a un hilo si no hay broker disponible."""
+    try:
+        generar_variantes_imagen.delay(producto_id)
+    except Exception:
+        def ejecutar():
+            try:
+                generar_variantes_imagen(producto_id)
+            finally:
+                connection.close()
+        threading.Thread(target=ejecutar, daemon=True).start()
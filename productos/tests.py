@@ -1,3 +1,216 @@
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.versionado import VersionesModelo
+
+from .models import Categoria, Marca, Producto
+from .autocompletar import IndiceAutocompletado
+from .importacion import ImportadorProductos
+from .precios import ActualizacionPrecios
+from .serializacion import SerializacionRapidaProducto
+from .serializers import ProductoSerializer
+
+class ActualizacionPreciosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre='Lácteos')
+        cls.otra_categoria = Categoria.objects.create(nombre='Panadería')
+        cls.marca = Marca.objects.create(nombre='Gloria')
+        cls.leche = Producto.objects.create(
+            nombre='Leche', precio=Decimal('9.99'), categoria=cls.categoria, marca=cls.marca
+        )
+        cls.yogur = Producto.objects.create(
+            nombre='Yogur', precio=Decimal('10.00'), categoria=cls.categoria
+        )
+        cls.pan = Producto.objects.create(
+            nombre='Pan', precio=Decimal('3.00'), categoria=cls.otra_categoria
+        )
+
+    def precio(self, producto):
+        return Producto.objects.get(pk=producto.pk).precio
+
+    def test_porcentaje_fraccionario(self):
+        cambios = ActualizacionPrecios.aplicar(
+            [{'tipo': 'porcentaje', 'valor': Decimal('-12.5'), 'categoria': self.categoria}]
+        )
+
+        # 9.99 * 0.875 = 8.74125 y 10.00 * 0.875 = 8.75
+        self.assertEqual(self.precio(self.leche), Decimal('8.74'))
+        self.assertEqual(self.precio(self.yogur), Decimal('8.75'))
+        self.assertEqual(self.precio(self.pan), Decimal('3.00'))
+        self.assertEqual({cambio['id'] for cambio in cambios}, {self.leche.pk, self.yogur.pk})
+
+    def test_monto_no_deja_precios_negativos(self):
+        ActualizacionPrecios.aplicar([{'tipo': 'monto', 'valor': Decimal('-5'), 'marca': self.marca}])
+        ActualizacionPrecios.aplicar([{'tipo': 'monto', 'valor': Decimal('-5'), 'marca': self.marca}])
+
+        self.assertEqual(self.precio(self.leche), Decimal('0.00'))
+        self.assertEqual(self.precio(self.yogur), Decimal('10.00'))
+
+    def test_precios_explicitos_despues_de_reglas(self):
+        cambios = ActualizacionPrecios.aplicar(
+            [{'tipo': 'porcentaje', 'valor': Decimal('10'), 'categoria': self.categoria}],
+            [{'id': self.yogur.pk, 'precio': Decimal('7.50')}],
+        )
+
+        self.assertEqual(self.precio(self.leche), Decimal('10.99'))
+        self.assertEqual(self.precio(self.yogur), Decimal('7.50'))
+        self.assertEqual(len(cambios), 2)
+
+    def test_desborde_no_aplica_nada(self):
+        with self.assertRaises(ValueError):
+            ActualizacionPrecios.aplicar([
+                {'tipo': 'porcentaje', 'valor': Decimal('99999999'), 'categoria': self.categoria},
+                {'tipo': 'porcentaje', 'valor': Decimal('99999999'), 'categoria': self.categoria},
+            ])
+
+        self.assertEqual(self.precio(self.leche), Decimal('9.99'))
+        self.assertEqual(self.precio(self.yogur), Decimal('10.00'))
+
+class ImportadorProductosTests(TestCase):
+    ENCABEZADO = b'sku,nombre,precio,descripcion,capacidad,color,marca,categoria\n'
+
+    def importar(self, filas):
+        importador = ImportadorProductos()
+        return importador.importar(ImportadorProductos.leer_csv(io.BytesIO(self.ENCABEZADO + filas)))
+
+    def test_celdas_opcionales_vacias_no_cambian_el_producto(self):
+        self.importar(b'LEC-1,Leche,9.99,Entera,1L,blanco,Gloria,Lacteos\n')
+
+        resumen = self.importar(b'LEC-1,Leche entera,10.50,,,,,\n')
+
+        producto = Producto.objects.select_related('marca', 'categoria').get(sku='LEC-1')
+        self.assertEqual(resumen['actualizados'], 1)
+        self.assertEqual(producto.nombre, 'Leche entera')
+        self.assertEqual(producto.precio, Decimal('10.50'))
+        self.assertEqual(producto.descripcion, 'Entera')
+        self.assertEqual(producto.capacidad, '1L')
+        self.assertEqual(producto.color, 'blanco')
+        self.assertEqual(producto.marca.nombre, 'Gloria')
+        self.assertEqual(producto.categoria.nombre, 'Lacteos')
+
+@mock.patch.object(VersionesModelo, 'compartido', return_value=True)
+class CacheRespuestaTests(TestCase):
+    URL = '/api/productos/categorias/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Categoria.objects.create(nombre='Lácteos')
+
+    def test_etag_vigente_responde_304(self, compartido):
+        respuesta = self.client.get(self.URL)
+        self.assertEqual(respuesta.status_code, 200)
+
+        condicional = self.client.get(self.URL, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+
+        self.assertEqual(condicional.status_code, 304)
+        self.assertEqual(condicional['ETag'], respuesta['ETag'])
+
+    def test_escritura_invalida_etag_y_respuesta(self, compartido):
+        respuesta = self.client.get(self.URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Categoria.objects.create(nombre='Panadería')
+        nueva = self.client.get(self.URL, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+
+        self.assertEqual(nueva.status_code, 200)
+        self.assertNotEqual(nueva['ETag'], respuesta['ETag'])
+        self.assertIn('Panadería', [categoria['nombre'] for categoria in self.resultados(nueva)])
+
+    def test_sin_cache_compartido_no_cachea(self, compartido):
+        compartido.return_value = False
+        self.client.get(self.URL)
+
+        Categoria.objects.create(nombre='Panadería')
+        respuesta = self.client.get(self.URL)
+
+        self.assertNotIn('ETag', respuesta)
+        self.assertIn('Panadería', [categoria['nombre'] for categoria in self.resultados(respuesta)])
+
+    @staticmethod
+    def resultados(respuesta):
+        datos = json.loads(respuesta.content)
+        return datos['results'] if isinstance(datos, dict) else datos
+
+class IndiceAutocompletadoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.producto = Producto.objects.create(nombre='Leche Gloria', precio=Decimal('5.00'))
+        IndiceAutocompletado.construir()
+
+    def guardar(self, **campos):
+        for campo, valor in campos.items():
+            setattr(self.producto, campo, valor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.save()
+
+    def test_guardar_sin_cambiar_nombre_no_sube_la_version(self):
+        version = cache.get(IndiceAutocompletado.CLAVE_VERSION)
+
+        self.guardar(precio=Decimal('6.00'))
+
+        self.assertEqual(cache.get(IndiceAutocompletado.CLAVE_VERSION), version)
+
+    def test_cambio_de_nombre_actualiza_el_indice(self):
+        version = cache.get(IndiceAutocompletado.CLAVE_VERSION)
+
+        self.guardar(nombre='Yogur Gloria')
+
+        self.assertNotEqual(cache.get(IndiceAutocompletado.CLAVE_VERSION), version)
+        self.assertEqual(IndiceAutocompletado.buscar('yog')['productos'], [{'id': self.producto.pk, 'nombre': 'Yogur Gloria'}])
+        self.assertEqual(IndiceAutocompletado.buscar('lech')['productos'], [])
+
+class SerializacionRapidaProductoTests(TestCase):
+    """SerializacionRapidaProducto debe producir el mismo JSON que ProductoSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre='Lácteos')
+        marca = Marca.objects.create(nombre='Gloria')
+        Producto.objects.create(
+            nombre='Leche', sku='LEC-1', precio=Decimal('9.9'), descripcion='Entera',
+            capacidad='1 L', color='blanco', categoria=categoria, marca=marca
+        )
+        Producto.objects.create(nombre='Pan', precio=Decimal('3.00'))
+        yogur = Producto.objects.create(
+            nombre='Yogur', precio=Decimal('4.50'), categoria=categoria, imagen='productos/yogur.png'
+        )
+        # Las variantes las escribe la tarea de imágenes con update(), sin señales
+        Producto.objects.filter(pk=yogur.pk).update(imagenes={
+            'miniatura': {'webp': 'productos/variantes/yogur_miniatura.webp', 'jpeg': 'productos/variantes/yogur_miniatura.jpg'},
+            'mediana': {'webp': 'productos/variantes/yogur_mediana.webp', 'jpeg': 'productos/variantes/yogur mediana.jpg'},
+        })
+
+    def comparar(self, url='/api/productos/productos/'):
+        request = Request(APIRequestFactory().get(url))
+        queryset = Producto.objects.select_related('categoria', 'marca').order_by('id')
+        esperado = [dict(fila) for fila in ProductoSerializer(queryset, many=True, context={'request': request}).data]
+        obtenido = SerializacionRapidaProducto.serializar(queryset, request)
+        self.assertEqual(json.dumps(obtenido), json.dumps(esperado))  # También el orden de las claves
+        return obtenido
+
+    def test_con_y_sin_marca_y_categoria(self):
+        leche, pan, _ = self.comparar()
+        self.assertEqual((leche['categoria_nombre'], leche['marca_nombre'], leche['precio']), ('Lácteos', 'Gloria', '9.90'))
+        self.assertNotIn('categoria_nombre', pan)
+        self.assertNotIn('marca_nombre', pan)
+        self.assertIsNone(pan['imagen'])
+
+    def test_variantes_de_imagen(self):
+        yogur = self.comparar()[2]
+        self.assertTrue(yogur['imagen'].startswith('http://testserver/'))
+        self.assertEqual(set(yogur['imagenes']), {'miniatura', 'mediana'})
+        self.assertIn('%20', yogur['imagenes']['mediana']['jpeg'])
 
-# Create your tests here.
+    def test_campos_solicitados(self):
+        for campos in ('id,nombre,precio', 'marca_nombre,imagenes', 'categoria,imagen'):
+            with self.subTest(fields=campos):
+                self.assertEqual(set(self.comparar(f'/api/productos/productos/?fields={campos}')[0]), set(campos.split(',')))
@@ -1,7 +1,7 @@
 # productos/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoriaViewSet, MarcaViewSet, ProductoViewSet
+from .views import CategoriaViewSet, MarcaViewSet, ProductoViewSet, autocompletar
 
 router = DefaultRouter()
 router.register(r'categorias', CategoriaViewSet, basename='categoria')
@@ -9,5 +9,6 @@ router.register(r'marcas', MarcaViewSet, basename='marca')
 router.register(r'productos', ProductoViewSet, basename='producto') # Pública para lectura
 
 urlpatterns = [
+    path('autocompletar/', autocompletar, name='productos-autocompletar'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,32 +1,180 @@
 # productos/views.py
+import csv
+import json
+
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Categoria, Marca, Producto
-from .serializers import CategoriaSerializer, MarcaSerializer, ProductoSerializer
+from .serializers import (
+    CategoriaSerializer, MarcaSerializer, ProductoSerializer, ProductoListaSerializer, ActualizacionPreciosSerializer
+)
+from .busqueda import BusquedaProductoFilter
+from .autocompletar import IndiceAutocompletado
+from .facetas import FacetasProducto
+from .serializacion import SerializacionRapidaProducto
+from .importacion import ImportadorProductos
+from .precios import ActualizacionPrecios
 from core.permissions import IsAdminOrReadOnly # Reutiliza el permiso
+from core.pagination import PaginacionSeleccionable
+from core.cache_respuestas import CacheRespuestaMixin
+from core.serializers import ConsultaSegunCamposMixin
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CacheRespuestaMixin, viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     # Cualquiera puede ver, solo Admin puede editar/crear/borrar
     permission_classes = [IsAdminOrReadOnly]
+    # Lecturas con ETag/304 y respuestas cacheadas según la versión del modelo
+    modelos_cache = (Categoria,)
 
-class MarcaViewSet(viewsets.ModelViewSet):
+class MarcaViewSet(CacheRespuestaMixin, viewsets.ModelViewSet):
     queryset = Marca.objects.all()
     serializer_class = MarcaSerializer
     permission_classes = [IsAdminOrReadOnly] # Mismo permiso
+    modelos_cache = (Marca,)
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(CacheRespuestaMixin, ConsultaSegunCamposMixin, viewsets.ModelViewSet):
     queryset = Producto.objects.select_related('categoria', 'marca').all() # Optimiza
     serializer_class = ProductoSerializer
     permission_classes = [IsAdminOrReadOnly]
+    # El listado incluye nombres de marca y categoría: depende de los tres modelos
+    modelos_cache = (Producto, Marca, Categoria)
+    acciones_cache = ('list',)
     
-    # Habilitamos los filtros y búsqueda
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Habilitamos los filtros y búsqueda (índice de texto completo, ordenada por relevancia)
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BusquedaProductoFilter]
     filterset_fields = ['categoria', 'marca', 'color', 'capacidad']
-    search_fields = ['nombre', 'descripcion', 'marca__nombre', 'categoria__nombre']
+    search_fields = ['nombre', 'descripcion', 'marca__nombre', 'categoria__nombre']  # Solo sin índice (otros motores)
     ordering_fields = ['nombre', 'precio']
     ordering = ['nombre']  # Ordenamiento por defecto
+    # ?paginacion=cursor: paginación por cursor sobre el índice (nombre, id)
+    pagination_class = PaginacionSeleccionable
+    cursor_ordering = ('nombre', 'id')
+
+    def get_serializer_class(self):
+        # ?vista=compacta: representación reducida para grillas (combinable con ?fields=)
+        if self.action == 'list' and self.request.query_params.get('vista') == 'compacta':
+            return ProductoListaSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        if not SerializacionRapidaProducto.aplicable(self):
+            return super().list(request, *args, **kwargs)
+        return self._responder_cacheado(self._listar_rapido, request, *args, **kwargs)
+
+    def _listar_rapido(self, request, *args, **kwargs):
+        """Listado con el mismo JSON que ProductoSerializer, armado desde filas de .values()."""
+        queryset = self.filter_queryset(self.get_queryset()).values(*SerializacionRapidaProducto.COLUMNAS)
+        mapear = SerializacionRapidaProducto.mapeador(request)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([mapear(fila) for fila in page])
+        return Response([mapear(fila) for fila in queryset])
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta todos los productos filtrados (sin paginar) como un arreglo JSON
+        con el formato de ProductoSerializer, generado por bloques mientras se envía.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).values(*SerializacionRapidaProducto.COLUMNAS)
+        mapear = SerializacionRapidaProducto.mapeador(request)
+
+        def generar():
+            yield '['
+            separador = ''
+            for fila in queryset.iterator(chunk_size=2000):
+                yield separador + json.dumps(mapear(fila), ensure_ascii=False, separators=(',', ':'))
+                separador = ','
+            yield ']'
+
+        respuesta = StreamingHttpResponse(generar(), content_type='application/json')
+        respuesta['Content-Disposition'] = 'attachment; filename="productos.json"'
+        return respuesta
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def importar(self, request):
+        """
+        Importación masiva (solo admin): archivo CSV o JSON en el campo
+        'archivo', con productos identificados por sku (se crean o actualizan).
+        Formato por ?formato=csv|json o por la extensión del archivo.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'error': 'Debe enviar el archivo en el campo "archivo"'}, status=400)
+
+        formato = request.query_params.get('formato') or archivo.name.rsplit('.', 1)[-1].lower()
+        if formato not in ('csv', 'json', 'jsonl'):
+            return Response({'error': 'Formato no soportado: use csv o json'}, status=400)
+        try:
+            tamano_lote = int(request.query_params.get('tamano_lote', ImportadorProductos.TAMANO_LOTE))
+        except ValueError:
+            return Response({'error': 'El parámetro tamano_lote debe ser un entero'}, status=400)
+
+        importador = ImportadorProductos(tamano_lote=max(1, min(tamano_lote, 10000)))
+        try:
+            resumen = importador.importar(ImportadorProductos.leer(archivo, formato))
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            # Archivo ilegible a mitad de camino: los lotes anteriores ya quedaron guardados
+            return Response({
+                'error': f"Error leyendo el archivo: {e}",
+                'procesadas': importador.procesadas,
+                'creados': importador.creados,
+                'actualizados': importador.actualizados,
+            }, status=400)
+        return Response(resumen)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def actualizar_precios(self, request):
+        """
+        Cambio masivo de precios (solo admin), en una transacción:
+        - reglas: [{"tipo": "porcentaje"|"monto", "valor": "-10", "categoria": 1, "marca": 2}]
+          se aplican en orden a los productos de la categoría y/o marca
+        - precios: [{"id": 5, "precio": "9.90"}] precios explícitos, aplicados al final
+        """
+        serializer = ActualizacionPreciosSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        try:
+            cambios = ActualizacionPrecios.aplicar(
+                serializer.validated_data['reglas'], serializer.validated_data['precios']
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        # Precios como texto con sus decimales, igual que en ProductoSerializer
+        return Response({'actualizados': len(cambios), 'cambios': [
+            {'id': cambio['id'], 'precio_anterior': f"{cambio['precio_anterior']:.2f}", 'precio': f"{cambio['precio']:.2f}"}
+            for cambio in cambios
+        ]})
+
+    @action(detail=False, methods=['get'])
+    def facetas(self, request):
+        """
+        Conteos por categoría, marca, color y capacidad de los productos que
+        cumplen los mismos filtros y búsqueda que el listado (?search=, ?marca=...).
+        """
+        return Response(FacetasProducto.obtener(
+            request.query_params, lambda: self.filter_queryset(self.get_queryset())
+        ))
+
+@require_GET
+def autocompletar(request):
+    """
+    Sugerencias del buscador mientras se escribe: IDs y nombres de productos,
+    marcas y categorías que empiezan por ?q=. Vista de Django sin DRF ni base
+    de datos: responde desde el índice en memoria (IndiceAutocompletado).
+    """
+    try:
+        limite = int(request.GET.get('limite', 8))
+    except ValueError:
+        return JsonResponse({'error': 'El parámetro limite debe ser un entero'}, status=400)
+
+    return JsonResponse(IndiceAutocompletado.buscar(request.GET.get('q', ''), limite))
     
 # # productos/views.py
 # from rest_framework import viewsets, permissions
@@ -1,5 +1,9 @@
 # recomendaciones/admin.py
+import threading
+
 from django.contrib import admin
+from django.db import connection
+from django.http import HttpResponseRedirect, JsonResponse
 from django.utils.html import format_html
 from django.urls import path
 from django.template.response import TemplateResponse
@@ -7,14 +11,18 @@ from django.db.models import Count, Avg, Sum
 from django.utils import timezone
 from datetime import timedelta
 
-from .models import ReglaAsociacion, ConfiguracionRecomendacion
-from .ml import GeneradorRecomendaciones
+from .models import (
+    ReglaAsociacion, ConfiguracionRecomendacion, ResumenDiarioRecomendacion, PaqueteProducto,
+    TransicionProducto
+)
+from .bloqueo import BloqueoGeneracion
+from .task import regenerar_recomendaciones
 
 @admin.register(ReglaAsociacion)
 class ReglaAsociacionAdmin(admin.ModelAdmin):
     list_display = ('id', 'producto_origen_nombre', 'producto_recomendado_nombre', 
-                    'soporte_formato', 'confianza_formato', 'lift_formato', 'ultima_actualizacion')
-    list_filter = ('ultima_actualizacion',)
+                    'soporte_formato', 'confianza_formato', 'lift_formato', 'particion', 'ultima_actualizacion')
+    list_filter = ('particion', 'ultima_actualizacion')
     search_fields = ('producto_origen__nombre', 'producto_recomendado__nombre')
     readonly_fields = ('soporte', 'confianza', 'lift', 'ultima_actualizacion')
     date_hierarchy = 'ultima_actualizacion'
@@ -44,6 +52,21 @@ class ReglaAsociacionAdmin(admin.ModelAdmin):
                            obj.lift)
     lift_formato.short_description = 'Lift'
 
+@admin.register(PaqueteProducto)
+class PaqueteProductoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto', 'productos_ids', 'precio', 'puntuacion', 'ultima_actualizacion')
+    search_fields = ('producto__nombre',)
+    readonly_fields = ('productos_ids', 'precio', 'puntuacion', 'ultima_actualizacion')
+    filter_horizontal = ('miembros',)
+    list_per_page = 20
+
+@admin.register(TransicionProducto)
+class TransicionProductoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto_origen', 'producto_siguiente', 'conteo', 'ultima_actualizacion')
+    search_fields = ('producto_origen__nombre', 'producto_siguiente__nombre')
+    readonly_fields = ('conteo', 'ultima_actualizacion')
+    list_per_page = 20
+
 @admin.register(ConfiguracionRecomendacion)
 class ConfiguracionRecomendacionAdmin(admin.ModelAdmin):
     list_display = ('id', 'soporte_minimo_formato', 'confianza_minima_formato', 
@@ -75,6 +98,9 @@ class ConfiguracionRecomendacionAdmin(admin.ModelAdmin):
             path('dashboard/',
                 self.admin_site.admin_view(self.dashboard_view),
                 name='recomendaciones-dashboard'),
+            path('generacion/estado/',
+                self.admin_site.admin_view(self.estado_generacion_view),
+                name='recomendaciones-generacion-estado'),
         ]
         return custom_urls + urls
     
@@ -82,29 +108,42 @@ class ConfiguracionRecomendacionAdmin(admin.ModelAdmin):
         config = self.get_object(request, object_id)
         
         if request.method == 'POST':
-            try:
-                generador = GeneradorRecomendaciones()
-                count = generador.generar_recomendaciones()
-                
-                if count is not None:
-                    self.message_user(request, f"Se generaron {count} reglas de recomendación exitosamente.")
-                else:
-                    self.message_user(request, "Error al generar recomendaciones.", level='ERROR')
-            except Exception as e:
-                self.message_user(request, f"Error: {str(e)}", level='ERROR')
+            if BloqueoGeneracion.en_curso():
+                self.message_user(request, "Ya hay una generación de recomendaciones en curso.", level='WARNING')
+            else:
+                # La generación puede tardar minutos: se ejecuta fuera de la petición HTTP
+                self._encolar_generacion()
+                self.message_user(request, "Generación de recomendaciones iniciada en segundo plano.")
             
-            return self.response_post_save_change(request, config)
+            return HttpResponseRedirect(request.path)
         
         context = self.admin_site.each_context(request)
         context.update({
             'title': 'Generar Recomendaciones',
             'object': config,
+            'estado': BloqueoGeneracion.obtener_estado(),
             'opts': self.model._meta,
             'app_label': self.model._meta.app_label,
         })
         
         return TemplateResponse(request, 'admin/recomendaciones/generar_recomendaciones.html', context)
     
+    def _encolar_generacion(self):
+        """Envía la regeneración a Celery, o a un hilo si no hay broker disponible."""
+        try:
+            regenerar_recomendaciones.delay(origen='admin')
+        except Exception:
+            def ejecutar():
+                try:
+                    regenerar_recomendaciones(origen='admin')
+                finally:
+                    connection.close()
+            threading.Thread(target=ejecutar, daemon=True).start()
+    
+    def estado_generacion_view(self, request, *args, **kwargs):
+        """Estado de la generación en curso (etapa y porcentaje), consultado por el admin."""
+        return JsonResponse(BloqueoGeneracion.obtener_estado())
+    
     def dashboard_view(self, request, *args, **kwargs):
         # Obtener estadísticas generales
         total_reglas = ReglaAsociacion.objects.count()
@@ -131,25 +170,39 @@ class ConfiguracionRecomendacionAdmin(admin.ModelAdmin):
             total=Count('producto_origen')
         ).order_by('-total')[:10]
         
-        # Efectividad de recomendaciones (esto requeriría un modelo para seguimiento de clicks)
-        # En este ejemplo, usaremos datos simulados
+        # Efectividad de recomendaciones en los últimos 30 días (resúmenes diarios)
+        hoy = timezone.localdate()
+        totales = ResumenDiarioRecomendacion.objects.filter(
+            fecha__gt=hoy - timedelta(days=30)
+        ).aggregate(
+            clicks=Sum('clicks'),
+            conversiones=Sum('conversiones'),
+            ingreso=Sum('ingreso')
+        )
+        clicks_totales = totales['clicks'] or 0
+        conversiones = totales['conversiones'] or 0
+        ingreso = totales['ingreso'] or 0
         efectividad = {
-            'clicks_totales': 1250,
-            'conversiones': 320,
-            'tasa_conversion': 25.6,
-            'promedio_ingreso': 4500.50,
+            'clicks_totales': clicks_totales,
+            'conversiones': conversiones,
+            'tasa_conversion': round(conversiones * 100 / clicks_totales, 1) if clicks_totales else 0,
+            'promedio_ingreso': round(ingreso / conversiones, 2) if conversiones else 0,
         }
         
-        # Tendencia de uso de recomendaciones (simulado)
-        tendencia = [
-            {'fecha': '2023-04-15', 'clicks': 45, 'conversiones': 12},
-            {'fecha': '2023-04-16', 'clicks': 52, 'conversiones': 14},
-            {'fecha': '2023-04-17', 'clicks': 48, 'conversiones': 10},
-            {'fecha': '2023-04-18', 'clicks': 60, 'conversiones': 15},
-            {'fecha': '2023-04-19', 'clicks': 75, 'conversiones': 22},
-            {'fecha': '2023-04-20', 'clicks': 85, 'conversiones': 21},
-            {'fecha': '2023-04-21', 'clicks': 92, 'conversiones': 24},
-        ]
+        # Tendencia de uso de recomendaciones en los últimos 7 días
+        resumenes = {
+            resumen.fecha: resumen
+            for resumen in ResumenDiarioRecomendacion.objects.filter(fecha__gt=hoy - timedelta(days=7))
+        }
+        tendencia = []
+        for dias_atras in range(6, -1, -1):
+            fecha = hoy - timedelta(days=dias_atras)
+            resumen = resumenes.get(fecha)
+            tendencia.append({
+                'fecha': fecha.isoformat(),
+                'clicks': resumen.clicks if resumen else 0,
+                'conversiones': resumen.conversiones if resumen else 0,
+            })
         
         context = self.admin_site.each_context(request)
         context.update({
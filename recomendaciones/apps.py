@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RecomendacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recomendaciones'
+
+    def ready(self):
+        # Registrar receptores de señales (ventas confirmadas, etc.)
+        from . import signals  # noqa: F401
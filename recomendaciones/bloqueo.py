@@ -0,0 +1,106 @@
+# recomendaciones/bloqueo.py
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+class GeneracionEnCurso(Exception):
+    """Se intentó generar reglas mientras otra generación mantiene el bloqueo."""
+
+class BloqueoGeneracion:
+    """
+    Bloqueo distribuido (basado en cache) para la generación de reglas.
+
+    Evita que el beat de Celery, el admin y los comandos de gestión borren y
+    reescriban ReglaAsociacion al mismo tiempo. Mientras se mantiene, un hilo
+    renueva el bloqueo periódicamente (latido); si el proceso muere, el bloqueo
+    expira solo tras TTL segundos. También publica la etapa y el porcentaje de
+    avance para que el admin pueda consultarlos.
+
+    Requiere un cache compartido entre procesos (Redis, ver REDIS_URL).
+    """
+
+    CLAVE_BLOQUEO = 'recomendaciones_generacion_bloqueo'
+    CLAVE_ESTADO = 'recomendaciones_generacion_estado'
+
+    # Segundos sin latido tras los que el bloqueo se considera abandonado
+    TTL = 5 * 60
+    INTERVALO_LATIDO = 60
+
+    def __init__(self, origen):
+        self.origen = origen
+        self.token = uuid.uuid4().hex
+        self._detener = threading.Event()
+        self._hilo = None
+        self._estado = {}
+
+    @classmethod
+    def obtener_estado(cls):
+        """Retorna el estado de la generación actual o de la última ejecutada."""
+        estado = cache.get(cls.CLAVE_ESTADO) or {'en_curso': False, 'etapa': None, 'porcentaje': 0}
+        # Si el bloqueo expiró sin liberarse, el proceso que generaba murió
+        if estado.get('en_curso') and cache.get(cls.CLAVE_BLOQUEO) is None:
+            estado = dict(estado, en_curso=False, etapa='abandonado')
+        return estado
+
+    @classmethod
+    def en_curso(cls):
+        """Indica si hay una generación manteniendo el bloqueo."""
+        return cache.get(cls.CLAVE_BLOQUEO) is not None
+
+    def adquirir(self):
+        """
+        Intenta tomar el bloqueo.
+
+        Returns:
+            True si se adquirió, False si otra generación lo mantiene
+        """
+        if not cache.add(self.CLAVE_BLOQUEO, self.token, self.TTL):
+            return False
+
+        ahora = timezone.now().isoformat()
+        self._estado = {
+            'en_curso': True,
+            'origen': self.origen,
+            'etapa': 'iniciando',
+            'porcentaje': 0,
+            'inicio': ahora,
+            'latido': ahora,
+            'mensaje': '',
+        }
+        cache.set(self.CLAVE_ESTADO, self._estado, None)
+
+        self._hilo = threading.Thread(target=self._latir, daemon=True)
+        self._hilo.start()
+        return True
+
+    def _latir(self):
+        """Renueva el bloqueo cada INTERVALO_LATIDO segundos mientras se mantenga."""
+        while not self._detener.wait(self.INTERVALO_LATIDO):
+            if cache.get(self.CLAVE_BLOQUEO) != self.token:
+                return
+            cache.touch(self.CLAVE_BLOQUEO, self.TTL)
+            self._publicar(latido=timezone.now().isoformat())
+
+    def _publicar(self, **cambios):
+        self._estado.update(cambios)
+        cache.set(self.CLAVE_ESTADO, self._estado, None)
+
+    def actualizar(self, etapa, porcentaje):
+        """Publica el avance de la generación y renueva el bloqueo."""
+        cache.touch(self.CLAVE_BLOQUEO, self.TTL)
+        self._publicar(etapa=etapa, porcentaje=porcentaje, latido=timezone.now().isoformat())
+
+    def liberar(self, etapa='completado', mensaje=''):
+        """Libera el bloqueo (solo si sigue siendo nuestro) y publica el estado final."""
+        self._detener.set()
+        if cache.get(self.CLAVE_BLOQUEO) == self.token:
+            cache.delete(self.CLAVE_BLOQUEO)
+        self._publicar(
+            en_curso=False,
+            etapa=etapa,
+            porcentaje=100 if etapa == 'completado' else self._estado.get('porcentaje', 0),
+            mensaje=mensaje,
+            latido=timezone.now().isoformat(),
+        )
@@ -1,117 +1,621 @@
 # recomendaciones/cache.py
+import asyncio
+import hashlib
+import time
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from django.conf import settings
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from productos.models import Producto
 from productos.serializers import ProductoSerializer
-from .models import ReglaAsociacion
+from ventas.models import DetalleNotaVenta
+from .models import ReglaAsociacion, ConfiguracionRecomendacion
+from .particiones import GLOBAL, particion_de_fecha
 
 class CacheRecomendaciones:
     """
     Sistema de cache para recomendaciones de productos.
     Almacena temporalmente recomendaciones para mejorar el rendimiento.
+
+    Cada producto guarda en cache su lista completa (sin exclusiones) con hasta
+    PROFUNDIDAD_CACHE recomendaciones; las exclusiones y el límite se aplican
+    al leer, así la misma entrada sirve para cualquier carrito.
+
+    Los productos sin reglas de asociación reciben como respaldo los más
+    vendidos de su categoría y del catálogo (precalculados), y ese resultado
+    también se guarda en cache para no repetir la consulta en cada petición.
+
+    Si hay reglas por temporada (RECOMENDACIONES_PARTICIONES), la partición
+    activa se deriva de la fecha y forma parte de las claves de cache; un
+    producto sin reglas en la partición usa sus reglas globales.
     """
-    
+
     # Tiempo de expiración del cache en segundos (12 horas por defecto)
     CACHE_TIMEOUT = getattr(settings, 'RECOMENDACIONES_CACHE_TIMEOUT', 12 * 60 * 60)
-    
+    # Tiempo de expiración de las respuestas por carrito (1 hora)
+    CARRITO_TIMEOUT = 3600
+    # Cantidad de recomendaciones guardadas por producto
+    PROFUNDIDAD_CACHE = getattr(settings, 'RECOMENDACIONES_PROFUNDIDAD_CACHE', 10)
+
+    # Productos más vendidos (respaldo para productos sin reglas)
+    CLAVE_POPULARES = 'recomendaciones_populares'
+    DIAS_POPULARES = getattr(settings, 'RECOMENDACIONES_POPULARES_DIAS', 30)
+
+    # Versión del conjunto de reglas activo (cambia con cada regeneración)
+    CLAVE_VERSION = 'recomendaciones_version_reglas'
+    # Particiones (temporadas o meses) con reglas generadas
+    CLAVE_PARTICIONES = 'recomendaciones_particiones'
+
+    @classmethod
+    def obtener_version(cls):
+        """
+        Retorna la versión del conjunto de reglas activo, usada para ETags.
+        Se deriva de la fecha de la última generación y se guarda en cache
+        para no consultar la configuración en cada petición.
+        """
+        version = cache.get(cls.CLAVE_VERSION)
+        if version is None:
+            ultima_actualizacion = ConfiguracionRecomendacion.objects.order_by('pk').values_list(
+                'ultima_actualizacion', flat=True
+            ).first()
+            version = int(ultima_actualizacion.timestamp()) if ultima_actualizacion else 0
+            cache.set(cls.CLAVE_VERSION, version, None)
+        return version
+
+    @classmethod
+    def actualizar_version(cls, fecha):
+        """Publica la versión de un conjunto de reglas recién generado."""
+        cache.set(cls.CLAVE_VERSION, int(fecha.timestamp()), None)
+
+    @classmethod
+    def obtener_particiones(cls):
+        """Retorna las particiones con reglas generadas (sin la global)."""
+        particiones = cache.get(cls.CLAVE_PARTICIONES)
+        if particiones is None:
+            particiones = frozenset(
+                ReglaAsociacion.objects.exclude(particion=GLOBAL).values_list('particion', flat=True).distinct()
+            )
+            cache.set(cls.CLAVE_PARTICIONES, particiones, None)
+        return particiones
+
+    @classmethod
+    def actualizar_particiones(cls, particiones):
+        """Publica las particiones de un conjunto de reglas recién generado."""
+        cache.set(cls.CLAVE_PARTICIONES, frozenset(particiones), None)
+
+    @classmethod
+    def particion_activa(cls, fecha=None):
+        """
+        Partición de reglas a servir en una fecha (por defecto, ahora): la de la
+        temporada o mes si tiene reglas generadas, o la global.
+        """
+        particion = particion_de_fecha(fecha or timezone.now())
+        if particion != GLOBAL and particion in cls.obtener_particiones():
+            return particion
+        return GLOBAL
+
+    @classmethod
+    async def aparticion_activa(cls):
+        """Versión asíncrona de particion_activa."""
+        particion = particion_de_fecha(timezone.now())
+        if particion == GLOBAL:
+            return GLOBAL
+        particiones = await cache.aget(cls.CLAVE_PARTICIONES)
+        if particiones is None:
+            particiones = await sync_to_async(cls.obtener_particiones)()
+        return particion if particion in particiones else GLOBAL
+
+    @classmethod
+    def calcular_populares(cls):
+        """
+        Calcula los productos más vendidos en la ventana de DIAS_POPULARES días,
+        global y por categoría, y los guarda en cache como arreglos de enteros.
+
+        Returns:
+            Diccionario {'global': array, categoria_id: array}
+        """
+        fecha_limite = timezone.now() - timedelta(days=cls.DIAS_POPULARES)
+        ventas = DetalleNotaVenta.objects.filter(
+            nota_venta__fecha_hora__gte=fecha_limite
+        ).values(
+            'producto_id', 'producto__categoria_id'
+        ).annotate(
+            total_vendidos=Sum('cantidad')
+        ).order_by('-total_vendidos', 'producto_id')
+
+        globales = []
+        por_categoria = defaultdict(list)
+        for venta in ventas:
+            if len(globales) < cls.PROFUNDIDAD_CACHE:
+                globales.append(venta['producto_id'])
+            categoria_id = venta['producto__categoria_id']
+            if categoria_id is not None and len(por_categoria[categoria_id]) < cls.PROFUNDIDAD_CACHE:
+                por_categoria[categoria_id].append(venta['producto_id'])
+
+        populares = {'global': array('I', globales)}
+        populares.update({categoria_id: array('I', ids) for categoria_id, ids in por_categoria.items()})
+        # No expira: la tarea periódica lo reemplaza
+        cache.set(cls.CLAVE_POPULARES, populares, None)
+        return populares
+
+    @classmethod
+    def obtener_populares(cls):
+        """Retorna los productos más vendidos precalculados, calculándolos si faltan."""
+        populares = cache.get(cls.CLAVE_POPULARES)
+        if populares is None:
+            populares = cls.calcular_populares()
+        return populares
+
+    @classmethod
+    def _recomendaciones_respaldo_lote(cls, productos_ids, cantidad, productos_excluir=()):
+        """
+        Recomendaciones para productos sin reglas: los más vendidos de su
+        categoría y, para completar, los más vendidos en general. Dos consultas
+        para todo el lote (categorías de los productos y productos candidatos).
+
+        Returns:
+            Diccionario {producto_id: lista de recomendaciones}
+        """
+        populares = cls.obtener_populares()
+        categorias = dict(Producto.objects.filter(pk__in=productos_ids).values_list('id', 'categoria_id'))
+
+        ids_por_producto = {}
+        for producto_id in productos_ids:
+            ids = []
+            for candidato in list(populares.get(categorias.get(producto_id), ())) + list(populares['global']):
+                if candidato != producto_id and candidato not in productos_excluir and candidato not in ids:
+                    ids.append(candidato)
+            ids_por_producto[producto_id] = ids[:cantidad]
+
+        productos = Producto.objects.select_related('categoria', 'marca').in_bulk(
+            {id for ids in ids_por_producto.values() for id in ids}
+        )
+        serializados = {id: ProductoSerializer(producto).data for id, producto in productos.items()}
+        return {
+            producto_id: [
+                {
+                    'id': id,
+                    'producto': serializados[id],
+                    # Puntuación nula: en un carrito quedan detrás de las recomendaciones por reglas
+                    'puntuacion': 0.0,
+                    'confianza': 0.0,
+                    'lift': 0.0,
+                    'fuente': 'popularidad'
+                }
+                for id in ids if id in serializados
+            ]
+            for producto_id, ids in ids_por_producto.items()
+        }
+
+    @classmethod
+    def _recomendaciones_respaldo(cls, producto_id, cantidad, productos_excluir=()):
+        """Recomendaciones de respaldo (por popularidad) de un solo producto."""
+        return cls._recomendaciones_respaldo_lote([producto_id], cantidad, productos_excluir)[producto_id]
+
     @staticmethod
-    def obtener_clave_cache(producto_id):
-        """Genera una clave única para el cache de un producto."""
+    def _es_respaldo(recomendaciones):
+        """Indica si una lista en cache es de respaldo por popularidad (el producto no tiene reglas)."""
+        return bool(recomendaciones) and recomendaciones[0]['fuente'] == 'popularidad'
+
+    @staticmethod
+    def obtener_clave_cache(producto_id, particion=GLOBAL):
+        """Genera una clave única para el cache de un producto (y partición de reglas)."""
+        if particion:
+            return f"recomendaciones_producto_{producto_id}_{particion}"
         return f"recomendaciones_producto_{producto_id}"
-    
+
     @classmethod
-    def obtener_recomendaciones_cache(cls, producto_id, limite=5):
+    def obtener_recomendaciones_cache(cls, producto_id, limite=5, particion=GLOBAL):
         """
         Intenta obtener recomendaciones desde el cache.
-        
+
         Args:
             producto_id: ID del producto para el que se buscan recomendaciones
             limite: Número máximo de recomendaciones a retornar
-            
+
         Returns:
             Lista de productos recomendados o None si no están en cache
         """
-        clave = cls.obtener_clave_cache(producto_id)
+        clave = cls.obtener_clave_cache(producto_id, particion)
         return cache.get(clave)
-    
+
     @classmethod
-    def guardar_recomendaciones_cache(cls, producto_id, recomendaciones):
+    def guardar_recomendaciones_cache(cls, producto_id, recomendaciones, particion=GLOBAL):
         """
         Guarda recomendaciones en el cache.
-        
+
         Args:
             producto_id: ID del producto origen
             recomendaciones: Lista de productos recomendados
         """
-        clave = cls.obtener_clave_cache(producto_id)
+        clave = cls.obtener_clave_cache(producto_id, particion)
         cache.set(clave, recomendaciones, cls.CACHE_TIMEOUT)
-    
+
     @classmethod
     def invalidar_cache(cls, producto_id=None):
         """
         Invalida el cache de recomendaciones para un producto específico o todos.
         
+        Se borran solo claves de recomendaciones por producto y se invalidan sus
+        carritos; el resto del cache (eventos, bloqueos, versiones) se conserva.
+
         Args:
             producto_id: ID del producto a invalidar, o None para invalidar todo
         """
         if producto_id is not None:
-            clave = cls.obtener_clave_cache(producto_id)
-            cache.delete(clave)
+            productos_ids = [producto_id]
         else:
-            # Este método es menos eficiente pero sirve como ejemplo
-            # En un sistema real, usaríamos un patrón para eliminar grupos de claves
-            # o mantendríamos un registro de claves activas
-            cache.clear()
-    
+            productos_ids = list(Producto.objects.values_list('id', flat=True))
+
+        particiones = [GLOBAL, *cls.obtener_particiones()]
+        cache.delete_many([
+            cls.obtener_clave_cache(id, particion) for id in productos_ids for particion in particiones
+        ])
+        cls.invalidar_carritos(productos_ids)
+
+    @classmethod
+    def invalidar_productos_mostrados(cls, productos_ids):
+        """
+        Invalida solo las listas cacheadas que muestran alguno de los productos
+        (p. ej. tras cambiar su precio o nombre): las de los orígenes que los
+        recomiendan por reglas y, si alguno está entre los populares, las de
+        los productos sin reglas (que usan el respaldo). También sus carritos.
+
+        Returns:
+            Número de productos origen invalidados
+        """
+        productos_ids = set(productos_ids)
+        origenes = set(
+            ReglaAsociacion.objects.filter(
+                producto_recomendado_id__in=productos_ids
+            ).values_list('producto_origen_id', flat=True).distinct()
+        )
+        populares = cls.obtener_populares()
+        if any(id in productos_ids for ids in populares.values() for id in ids):
+            origenes |= set(
+                Producto.objects.exclude(
+                    id__in=ReglaAsociacion.objects.values('producto_origen_id')
+                ).values_list('id', flat=True)
+            )
+
+        particiones = [GLOBAL, *cls.obtener_particiones()]
+        cache.delete_many([
+            cls.obtener_clave_cache(id, particion) for id in origenes for particion in particiones
+        ])
+        cls.invalidar_carritos(origenes | productos_ids)
+        return len(origenes)
+
+    @staticmethod
+    def obtener_clave_version_carritos(producto_id):
+        """Clave de la versión de los carritos en cache que contienen un producto."""
+        return f"recomendaciones_version_carritos_{producto_id}"
+
+    @classmethod
+    def obtener_clave_carrito(cls, productos_carrito, limite, particion=GLOBAL):
+        """
+        Genera la clave de cache de un carrito (independiente del orden de los productos).
+
+        Incluye una firma de la versión de reglas y de la versión de carritos de
+        cada producto: invalidar un producto (invalidar_carritos) cambia su
+        versión y con ella la clave de todos sus carritos, sin registros que
+        leer y reescribir. Las entradas viejas ya no se leen y expiran solas.
+        """
+        productos_key = "_".join(sorted([str(id) for id in productos_carrito]))
+        claves_version = sorted(cls.obtener_clave_version_carritos(id) for id in set(productos_carrito))
+        versiones = cache.get_many(claves_version)
+        faltantes = [clave for clave in claves_version if clave not in versiones]
+        if faltantes:
+            # Una versión nueva (nunca 0): si la versión se pierde del cache, sus
+            # carritos anteriores no vuelven a ser válidos
+            nueva = time.time_ns()
+            for clave in faltantes:
+                cache.add(clave, nueva, None)
+            versiones.update(cache.get_many(faltantes))
+        firma = hashlib.md5(
+            f"{cls.obtener_version()}:{[versiones.get(clave) for clave in claves_version]}".encode()
+        ).hexdigest()
+        if particion:
+            return f"recomendaciones_carrito_{productos_key}_limite_{limite}_{particion}_{firma}"
+        return f"recomendaciones_carrito_{productos_key}_limite_{limite}_{firma}"
+
+    @classmethod
+    async def aobtener_clave_carrito(cls, productos_carrito, limite, particion=GLOBAL):
+        """Versión asíncrona de obtener_clave_carrito."""
+        return await sync_to_async(cls.obtener_clave_carrito)(productos_carrito, limite, particion)
+
+    @classmethod
+    def guardar_carrito(cls, clave, valor, prerenderizar=False):
+        """
+        Guarda la respuesta de un carrito bajo su clave (ver obtener_clave_carrito).
+
+        Con prerenderizar se guardan los bytes JSON (renderizados una sola vez
+        aquí), que las vistas devuelven sin pasar por el renderer.
+
+        Returns:
+            El valor guardado (la lista o sus bytes JSON)
+        """
+        if prerenderizar:
+            valor = JSONRenderer().render(valor)
+        cache.set(clave, valor, cls.CARRITO_TIMEOUT)
+        return valor
+
+    @classmethod
+    async def aguardar_carrito(cls, clave, valor, prerenderizar=False):
+        """Versión asíncrona de guardar_carrito."""
+        return await sync_to_async(cls.guardar_carrito)(clave, valor, prerenderizar)
+
+    @classmethod
+    def invalidar_carritos(cls, productos_ids):
+        """Invalida los carritos que contienen alguno de los productos: una versión nueva por producto."""
+        claves = [cls.obtener_clave_version_carritos(id) for id in productos_ids]
+        version = time.time_ns()
+        for bloque in range(0, len(claves), 1000):
+            cache.set_many({clave: version for clave in claves[bloque:bloque + 1000]}, None)
+
+    @staticmethod
+    def _consultar_reglas(producto_id, cantidad, productos_excluir=None, particion=GLOBAL):
+        """Construye la consulta de las mejores reglas de un producto origen en una partición."""
+        reglas = ReglaAsociacion.objects.filter(producto_origen_id=producto_id, particion=particion)
+        if productos_excluir:
+            reglas = reglas.exclude(producto_recomendado_id__in=productos_excluir)
+        return reglas.select_related(
+            'producto_recomendado__categoria', 'producto_recomendado__marca'
+        ).order_by('-lift', '-confianza')[:cantidad]
+
+    @staticmethod
+    def _serializar_reglas(reglas):
+        """Convierte reglas de asociación al formato guardado en cache."""
+        recomendaciones = []
+        for regla in reglas:
+            producto = regla.producto_recomendado
+            recomendaciones.append({
+                'id': producto.id,
+                'producto': ProductoSerializer(producto).data,
+                'puntuacion': regla.lift * regla.confianza,
+                'confianza': regla.confianza,
+                'lift': regla.lift,
+                'fuente': 'reglas'
+            })
+        return recomendaciones
+
+    @classmethod
+    def _reglas_serializadas(cls, producto_id, cantidad, productos_excluir=None, particion=GLOBAL):
+        """Reglas serializadas de la partición, o las globales si el producto no tiene en ella."""
+        recomendaciones = cls._serializar_reglas(
+            cls._consultar_reglas(producto_id, cantidad, productos_excluir, particion)
+        )
+        if not recomendaciones and particion != GLOBAL:
+            recomendaciones = cls._serializar_reglas(cls._consultar_reglas(producto_id, cantidad, productos_excluir))
+        return recomendaciones
+
+    @classmethod
+    async def _areglas_serializadas(cls, producto_id, cantidad, productos_excluir=None, particion=GLOBAL):
+        """Versión asíncrona de _reglas_serializadas."""
+        reglas = [r async for r in cls._consultar_reglas(producto_id, cantidad, productos_excluir, particion)]
+        if not reglas and particion != GLOBAL:
+            reglas = [r async for r in cls._consultar_reglas(producto_id, cantidad, productos_excluir)]
+        return cls._serializar_reglas(reglas)
+
+    @classmethod
+    def _filtrar(cls, recomendaciones, limite, productos_excluir):
+        """
+        Aplica exclusiones y límite a una lista guardada en cache.
+
+        Returns:
+            Lista filtrada, o None si la lista en cache está truncada y no
+            alcanza para cubrir el límite tras las exclusiones.
+        """
+        filtradas = [r for r in recomendaciones if r['id'] not in productos_excluir][:limite]
+        if len(filtradas) < limite and len(recomendaciones) >= cls.PROFUNDIDAD_CACHE:
+            return None
+        return filtradas
+
+    @classmethod
+    def _reglas_lote(cls, productos_ids, particion=GLOBAL):
+        """Las PROFUNDIDAD_CACHE mejores reglas de cada producto origen, en una consulta."""
+        reglas = ReglaAsociacion.objects.filter(
+            producto_origen_id__in=productos_ids, particion=particion
+        ).annotate(
+            posicion=Window(
+                RowNumber(),
+                partition_by=F('producto_origen_id'),
+                order_by=[F('lift').desc(), F('confianza').desc()]
+            )
+        ).filter(
+            posicion__lte=cls.PROFUNDIDAD_CACHE
+        ).select_related(
+            'producto_recomendado__categoria', 'producto_recomendado__marca'
+        ).order_by('producto_origen_id', 'posicion')
+
+        reglas_por_producto = defaultdict(list)
+        for regla in reglas:
+            reglas_por_producto[regla.producto_origen_id].append(regla)
+        return reglas_por_producto
+
+    @classmethod
+    def construir_recomendaciones_lote(cls, productos_ids, particion=GLOBAL):
+        """
+        Construye las listas de recomendaciones de varios productos origen con
+        una sola consulta (las PROFUNDIDAD_CACHE mejores reglas de cada uno).
+
+        Args:
+            productos_ids: IDs de los productos origen
+            particion: Partición de reglas; los productos sin reglas en ella usan las globales
+
+        Returns:
+            Diccionario {producto_id: lista de recomendaciones}
+        """
+        reglas_por_producto = cls._reglas_lote(productos_ids, particion)
+        if particion != GLOBAL:
+            sin_reglas = [producto_id for producto_id in productos_ids if producto_id not in reglas_por_producto]
+            if sin_reglas:
+                reglas_por_producto.update(cls._reglas_lote(sin_reglas))
+
+        resultado = {
+            producto_id: cls._serializar_reglas(reglas_por_producto.get(producto_id, []))
+            for producto_id in productos_ids
+        }
+        sin_reglas = [producto_id for producto_id, recomendaciones in resultado.items() if not recomendaciones]
+        if sin_reglas:
+            resultado.update(cls._recomendaciones_respaldo_lote(sin_reglas, cls.PROFUNDIDAD_CACHE))
+        return resultado
+
     @classmethod
-    def obtener_recomendaciones(cls, producto_id, limite=5, usar_cache=True, productos_excluir=None):
+    def precalentar(cls, productos_ids, particion=None):
+        """
+        Calcula y guarda en cache, con un solo set_many, las recomendaciones
+        de un bloque de productos (en la partición activa por defecto).
+
+        Returns:
+            Número de productos guardados en cache
+        """
+        if particion is None:
+            particion = cls.particion_activa()
+        listas = cls.construir_recomendaciones_lote(productos_ids, particion)
+        cache.set_many(
+            {cls.obtener_clave_cache(producto_id, particion): lista for producto_id, lista in listas.items()},
+            cls.CACHE_TIMEOUT
+        )
+        return len(listas)
+
+    @classmethod
+    def obtener_recomendaciones(cls, producto_id, limite=5, usar_cache=True, productos_excluir=None, particion=None):
         """
         Obtiene recomendaciones para un producto, usando cache si está disponible.
-        
+
         Args:
             producto_id: ID del producto origen
             limite: Número máximo de recomendaciones
             usar_cache: Si es False, fuerza recalcular aunque exista en cache
             productos_excluir: Lista de IDs de productos a excluir de las recomendaciones
-            
+            particion: Partición de reglas (por defecto, la activa)
+
         Returns:
             Lista de productos recomendados
         """
-        productos_excluir = productos_excluir or []
-        
+        productos_excluir = set(productos_excluir or [])
+        if particion is None:
+            particion = cls.particion_activa()
+
         # Verificar cache si está habilitado
         if usar_cache:
-            recomendaciones_cache = cls.obtener_recomendaciones_cache(producto_id)
+            recomendaciones_cache = cls.obtener_recomendaciones_cache(producto_id, particion=particion)
             if recomendaciones_cache is not None:
-                # Filtrar por productos excluidos y limitar
-                recomendaciones_filtradas = [
-                    r for r in recomendaciones_cache 
-                    if r['id'] not in productos_excluir
-                ][:limite]
-                return recomendaciones_filtradas
-        
-        # Si no está en cache o no se usa cache, calcular
-        reglas = ReglaAsociacion.objects.filter(
-            producto_origen_id=producto_id
-        ).exclude(
-            producto_recomendado_id__in=productos_excluir
-        ).select_related(
-            'producto_recomendado'
-        ).order_by('-lift', '-confianza')[:limite]
-        
-        # Convertir a formato serializado
-        recomendaciones = []
-        for regla in reglas:
-            producto = regla.producto_recomendado
-            recomendaciones.append({
-                'id': producto.id,
-                'producto': ProductoSerializer(producto).data,
-                'puntuacion': regla.lift * regla.confianza,
-                'confianza': regla.confianza,
-                'lift': regla.lift
-            })
-        
-        # Guardar en cache si hay recomendaciones
-        if recomendaciones and usar_cache:
-            cls.guardar_recomendaciones_cache(producto_id, recomendaciones)
-        
-        return recomendaciones
\ No newline at end of file
+                filtradas = cls._filtrar(recomendaciones_cache, limite, productos_excluir)
+                if filtradas is not None:
+                    return filtradas
+                # La lista en cache no alcanza: completarla directamente con exclusiones
+                # (desde los populares si era de respaldo: el producto no tiene reglas)
+                if cls._es_respaldo(recomendaciones_cache):
+                    return cls._recomendaciones_respaldo(producto_id, limite, productos_excluir)
+                return cls._reglas_serializadas(producto_id, limite, productos_excluir, particion)
+
+        # Si no está en cache o no se usa cache, calcular la lista completa y guardarla
+        # (también cuando no hay reglas, para no repetir la consulta en cada petición)
+        profundidad = max(cls.PROFUNDIDAD_CACHE, limite + len(productos_excluir))
+        recomendaciones = cls._reglas_serializadas(producto_id, profundidad, particion=particion)
+        if not recomendaciones:
+            recomendaciones = cls._recomendaciones_respaldo(producto_id, profundidad)
+        cls.guardar_recomendaciones_cache(producto_id, recomendaciones, particion)
+
+        return [r for r in recomendaciones if r['id'] not in productos_excluir][:limite]
+
+    @classmethod
+    def obtener_recomendaciones_multiples(cls, productos_ids, limite=5, productos_excluir=None, particion=None):
+        """
+        Obtiene recomendaciones para varios productos con una sola lectura del cache.
+
+        Args:
+            productos_ids: IDs de los productos origen
+            limite: Número máximo de recomendaciones por producto
+            productos_excluir: Lista de IDs de productos a excluir
+            particion: Partición de reglas (por defecto, la activa)
+
+        Returns:
+            Diccionario {producto_id: lista de recomendaciones}
+        """
+        productos_excluir = set(productos_excluir or [])
+        if particion is None:
+            particion = cls.particion_activa()
+        claves = {cls.obtener_clave_cache(producto_id, particion): producto_id for producto_id in productos_ids}
+        en_cache = cache.get_many(list(claves))
+
+        resultado = {}
+        for clave, producto_id in claves.items():
+            recomendaciones_cache = en_cache.get(clave)
+            filtradas = None
+            if recomendaciones_cache is not None:
+                filtradas = cls._filtrar(recomendaciones_cache, limite, productos_excluir)
+            if filtradas is None:
+                filtradas = cls.obtener_recomendaciones(
+                    producto_id, limite, usar_cache=recomendaciones_cache is not None,
+                    productos_excluir=productos_excluir, particion=particion
+                )
+            resultado[producto_id] = filtradas
+        return resultado
+
+    @classmethod
+    async def aobtener_recomendaciones(cls, producto_id, limite=5, usar_cache=True, productos_excluir=None,
+                                       particion=None):
+        """Versión asíncrona de obtener_recomendaciones (cache y ORM asíncronos)."""
+        productos_excluir = set(productos_excluir or [])
+        if particion is None:
+            particion = await cls.aparticion_activa()
+
+        if usar_cache:
+            recomendaciones_cache = await cache.aget(cls.obtener_clave_cache(producto_id, particion))
+            if recomendaciones_cache is not None:
+                filtradas = cls._filtrar(recomendaciones_cache, limite, productos_excluir)
+                if filtradas is not None:
+                    return filtradas
+                if cls._es_respaldo(recomendaciones_cache):
+                    return await sync_to_async(cls._recomendaciones_respaldo)(producto_id, limite, productos_excluir)
+                return await cls._areglas_serializadas(producto_id, limite, productos_excluir, particion)
+
+        profundidad = max(cls.PROFUNDIDAD_CACHE, limite + len(productos_excluir))
+        recomendaciones = await cls._areglas_serializadas(producto_id, profundidad, particion=particion)
+        if not recomendaciones:
+            recomendaciones = await sync_to_async(cls._recomendaciones_respaldo)(producto_id, profundidad)
+        await cache.aset(cls.obtener_clave_cache(producto_id, particion), recomendaciones, cls.CACHE_TIMEOUT)
+
+        return [r for r in recomendaciones if r['id'] not in productos_excluir][:limite]
+
+    @classmethod
+    async def aobtener_recomendaciones_multiples(cls, productos_ids, limite=5, productos_excluir=None,
+                                                 particion=None):
+        """
+        Versión asíncrona de obtener_recomendaciones_multiples: una lectura del
+        cache para todos los productos y consultas concurrentes para los fallos.
+        """
+        productos_excluir = set(productos_excluir or [])
+        if particion is None:
+            particion = await cls.aparticion_activa()
+        claves = {cls.obtener_clave_cache(producto_id, particion): producto_id for producto_id in productos_ids}
+        en_cache = await cache.aget_many(list(claves))
+
+        resultado = {}
+        pendientes = {}
+        for clave, producto_id in claves.items():
+            recomendaciones_cache = en_cache.get(clave)
+            filtradas = None
+            if recomendaciones_cache is not None:
+                filtradas = cls._filtrar(recomendaciones_cache, limite, productos_excluir)
+            if filtradas is None:
+                pendientes[producto_id] = cls.aobtener_recomendaciones(
+                    producto_id, limite, usar_cache=recomendaciones_cache is not None,
+                    productos_excluir=productos_excluir, particion=particion
+                )
+            else:
+                resultado[producto_id] = filtradas
+
+        if pendientes:
+            listas = await asyncio.gather(*pendientes.values())
+            resultado.update(zip(pendientes.keys(), listas))
+        return resultado
@@ -0,0 +1,87 @@
+# recomendaciones/compras.py
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ventas.models import DetalleNotaVenta
+
+class ComprasCliente:
+    """
+    Productos ya comprados por cada cliente, para no volver a recomendarlos.
+
+    Se guardan en cache como un array('I') ordenado de IDs de producto (4 bytes
+    por producto). El conjunto se construye con una consulta la primera vez que
+    se necesita y después se actualiza con cada venta confirmada, así que las
+    peticiones solo lo leen del cache y lo consultan con búsqueda binaria.
+    """
+
+    CACHE_TIMEOUT = getattr(settings, 'RECOMENDACIONES_COMPRAS_TIMEOUT', 30 * 24 * 60 * 60)
+
+    @staticmethod
+    def obtener_clave(cliente_id):
+        """Clave de cache de los productos comprados por un cliente."""
+        return f"recomendaciones_compras_cliente_{cliente_id}"
+
+    @staticmethod
+    def obtener_clave_version(cliente_id):
+        """Clave de cache de la versión (instante del último cambio) de las compras de un cliente."""
+        return f"recomendaciones_compras_version_{cliente_id}"
+
+    @classmethod
+    def obtener_version(cls, cliente_id):
+        """
+        Versión de las compras del cliente, para ETags: se lee sin cargar el
+        array ni consultar la base de datos (None si aún no se construyó).
+        """
+        return cache.get(cls.obtener_clave_version(cliente_id))
+
+    @classmethod
+    def _guardar(cls, cliente_id, comprados):
+        cache.set_many({
+            cls.obtener_clave(cliente_id): comprados,
+            cls.obtener_clave_version(cliente_id): time.time_ns(),
+        }, cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def construir(cls, cliente_id):
+        """Consulta los productos comprados por el cliente y los guarda en cache."""
+        comprados = array('I', DetalleNotaVenta.objects.filter(
+            nota_venta__cliente_id=cliente_id
+        ).values_list('producto_id', flat=True).distinct().order_by('producto_id'))
+        cls._guardar(cliente_id, comprados)
+        return comprados
+
+    @classmethod
+    def obtener(cls, cliente_id):
+        """Retorna el array ordenado de productos comprados por el cliente."""
+        comprados = cache.get(cls.obtener_clave(cliente_id))
+        if comprados is None:
+            comprados = cls.construir(cliente_id)
+        return comprados
+
+    @staticmethod
+    def contiene(comprados, producto_id):
+        """Indica si un producto está en el array de comprados (búsqueda binaria)."""
+        posicion = bisect_left(comprados, producto_id)
+        return posicion < len(comprados) and comprados[posicion] == producto_id
+
+    @classmethod
+    def registrar_venta(cls, nota_venta, detalles):
+        """Añade los productos de una venta confirmada al array de su cliente."""
+        if not nota_venta.cliente_id:
+            return
+
+        comprados = cache.get(cls.obtener_clave(nota_venta.cliente_id))
+        if comprados is None:
+            # La venta ya está confirmada: la consulta la incluye
+            cls.construir(nota_venta.cliente_id)
+            return
+
+        nuevos = {detalle.producto_id for detalle in detalles}
+        if all(cls.contiene(comprados, producto_id) for producto_id in nuevos):
+            return
+        comprados = array('I', sorted(set(comprados) | nuevos))
+        cls._guardar(nota_venta.cliente_id, comprados)
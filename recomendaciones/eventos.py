@@ -0,0 +1,201 @@
+# recomendaciones/eventos.py
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.conf import settings
+from django.utils import timezone
+
+from core.versionado import VersionesModelo
+from .models import EventoRecomendacion
+
+class BufferEventos:
+    """
+    Buffer de eventos de recomendación respaldado por el cache.
+
+    Cada evento ocupa un "slot" numerado que se reserva con cache.incr (atómico
+    en Redis), de modo que varios workers pueden registrar eventos sin escribir
+    en la base de datos. Solo la tarea periódica (consolidar_eventos_recomendaciones)
+    vuelca los slots pendientes, por lotes de bulk_create: las peticiones nunca
+    escriben eventos.
+
+    Requiere un cache compartido (REDIS_URL) para funcionar entre procesos.
+    Con el LocMem por defecto la tarea (en el worker de Celery) no vería el
+    buffer del proceso web, así que sin cache compartido los eventos se
+    guardan directamente en la base de datos.
+    """
+
+    CLAVE_CONTADOR = 'recomendaciones_eventos_contador'
+    CLAVE_VOLCADO = 'recomendaciones_eventos_volcado'
+    CLAVE_BLOQUEO = 'recomendaciones_eventos_bloqueo'
+    CLAVE_RESERVADOS = 'recomendaciones_eventos_reservados'
+
+    TAMANO_LOTE = getattr(settings, 'RECOMENDACIONES_EVENTOS_LOTE', 500)
+    # Los slots deben sobrevivir hasta el siguiente volcado periódico
+    SLOT_TIMEOUT = 24 * 60 * 60
+    # Un slot reservado que sigue vacío tras este tiempo se da por perdido
+    ESPERA_ABANDONO = 10 * 60
+
+    @staticmethod
+    def obtener_clave_slot(numero):
+        """Genera la clave de cache de un slot del buffer."""
+        return f"recomendaciones_evento_{numero}"
+
+    @classmethod
+    def registrar(cls, eventos):
+        """
+        Agrega eventos al buffer (los vuelca la tarea periódica).
+
+        Args:
+            eventos: Lista de diccionarios con los campos de EventoRecomendacion
+        """
+        if not eventos:
+            return
+        if not VersionesModelo.compartido():
+            EventoRecomendacion.objects.bulk_create([EventoRecomendacion(**evento) for evento in eventos])
+            return
+
+        cache.add(cls.CLAVE_CONTADOR, 0, None)
+        fin = cache.incr(cls.CLAVE_CONTADOR, len(eventos))
+        inicio = fin - len(eventos) + 1
+
+        cache.set_many(
+            {cls.obtener_clave_slot(numero): evento
+             for numero, evento in zip(range(inicio, fin + 1), eventos)},
+            cls.SLOT_TIMEOUT
+        )
+
+    @classmethod
+    def volcar(cls, forzar=False):
+        """
+        Escribe en la base de datos los eventos pendientes del buffer.
+
+        Args:
+            forzar: Si es True, también se saltan los slots vacíos reservados
+                hace más de ESPERA_ABANDONO (su registro falló entre incr y
+                set_many, o expiraron). Un slot vacío más reciente puede
+                estar escribiéndose: el volcado se detiene ahí, sin avanzar
+                el cursor, y lo retoma el siguiente volcado.
+
+        Returns:
+            Número de eventos guardados
+        """
+        # Solo un proceso vuelca a la vez
+        if not cache.add(cls.CLAVE_BLOQUEO, 1, 5 * 60):
+            return 0
+
+        try:
+            ultimo_volcado = cache.get(cls.CLAVE_VOLCADO) or 0
+            ultimo_registrado = cache.get(cls.CLAVE_CONTADOR) or 0
+            total = 0
+
+            # (contador, instante) del volcado forzado anterior: los slots hasta ese
+            # contador se reservaron hace al menos ESPERA_ABANDONO y ya pueden saltarse
+            abandonables = 0
+            reservados = cache.get(cls.CLAVE_RESERVADOS)
+            ahora = time.time()
+            if forzar and reservados and ahora - reservados[1] >= cls.ESPERA_ABANDONO:
+                abandonables = reservados[0]
+            if forzar and (not reservados or ahora - reservados[1] >= cls.ESPERA_ABANDONO):
+                cache.set(cls.CLAVE_RESERVADOS, (ultimo_registrado, ahora), None)
+
+            numero = ultimo_volcado + 1
+            while numero <= ultimo_registrado:
+                numeros = range(numero, min(numero + cls.TAMANO_LOTE, ultimo_registrado + 1))
+                claves = [cls.obtener_clave_slot(n) for n in numeros]
+                datos = cache.get_many(claves)
+
+                eventos = []
+                procesados = []
+                for n, clave in zip(numeros, claves):
+                    evento = datos.get(clave)
+                    if evento is None:
+                        if n > abandonables:
+                            break
+                    else:
+                        eventos.append(EventoRecomendacion(**evento))
+                    procesados.append(clave)
+                    ultimo_volcado = n
+
+                if eventos:
+                    EventoRecomendacion.objects.bulk_create(eventos, batch_size=cls.TAMANO_LOTE)
+                    total += len(eventos)
+
+                cache.set(cls.CLAVE_VOLCADO, ultimo_volcado, None)
+                cache.delete_many(procesados)
+
+                if len(procesados) < len(claves):
+                    break
+                numero = ultimo_volcado + 1
+
+            return total
+        finally:
+            cache.delete(cls.CLAVE_BLOQUEO)
+
+class AtribucionConversiones:
+    """
+    Recuerda los clicks recientes de cada cliente para atribuir conversiones
+    cuando una venta incluye un producto recomendado, sin consultar eventos
+    en la base de datos.
+    """
+
+    DIAS_ATRIBUCION = getattr(settings, 'RECOMENDACIONES_ATRIBUCION_DIAS', 7)
+
+    @staticmethod
+    def obtener_clave_cache(cliente_id, producto_id):
+        """
+        Clave de cache del último click de un cliente en un producto. Una clave
+        por click (y no un diccionario por cliente): registrar no lee ni
+        reescribe los clicks anteriores, así que clicks simultáneos no se pisan.
+        """
+        return f"recomendaciones_click_{cliente_id}_{producto_id}"
+
+    @classmethod
+    def registrar_clicks(cls, cliente_id, producto_origen, productos):
+        """Guarda los productos clickeados por un cliente para atribución posterior."""
+        ahora = timezone.now()
+        cache.set_many(
+            {cls.obtener_clave_cache(cliente_id, producto_id): (producto_origen, ahora) for producto_id in productos},
+            cls.DIAS_ATRIBUCION * 24 * 60 * 60
+        )
+
+    @classmethod
+    def registrar_venta(cls, nota_venta, detalles):
+        """
+        Genera eventos de conversión para los productos de la venta que el
+        cliente había clickeado dentro de la ventana de atribución.
+
+        Returns:
+            Número de conversiones registradas
+        """
+        if not nota_venta.cliente_id:
+            return 0
+
+        claves = {
+            cls.obtener_clave_cache(nota_venta.cliente_id, detalle.producto_id): detalle for detalle in detalles
+        }
+        clicks = cache.get_many(claves)
+        if not clicks:
+            return 0
+
+        limite = timezone.now() - timedelta(days=cls.DIAS_ATRIBUCION)
+        conversiones = []
+        for clave, (producto_origen, fecha_click) in clicks.items():
+            # Cada click se atribuye a una sola venta: solo cuenta quien logra borrarlo
+            if not cache.delete(clave) or fecha_click < limite:
+                continue
+            detalle = claves[clave]
+            conversiones.append({
+                'tipo': 'conversion',
+                'producto_origen': producto_origen,
+                'producto_recomendado': detalle.producto_id,
+                'cliente': nota_venta.cliente_id,
+                'nota_venta': nota_venta.id,
+                'valor': detalle.subtotal,
+                'fecha': timezone.now(),
+            })
+
+        if conversiones:
+            BufferEventos.registrar(conversiones)
+
+        return len(conversiones)
@@ -0,0 +1,74 @@
+# recomendaciones/management/commands/benchmark_recomendaciones.py
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from recomendaciones.cache import CacheRecomendaciones
+from recomendaciones.models import ReglaAsociacion
+from recomendaciones.particiones import GLOBAL
+from recomendaciones.views import RecomendacionesAPIView
+
+class Command(BaseCommand):
+    help = (
+        'Mide el CPU por petición de las sugerencias servidas desde cache, '
+        'renderizando la lista en cada petición frente a devolver bytes JSON prerenderizados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iteraciones',
+            type=int,
+            default=2000,
+            help='Número de peticiones medidas por modo'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=10,
+            help='Recomendaciones por respuesta (más grande = más trabajo de renderizado)'
+        )
+
+    def handle(self, *args, **options):
+        productos = list(
+            ReglaAsociacion.objects.filter(particion=GLOBAL).values_list(
+                'producto_origen_id', flat=True
+            ).distinct()[:3]
+        )
+        if not productos:
+            raise CommandError("No hay reglas de asociación. Ejecuta generar_recomendaciones primero.")
+
+        factory = APIRequestFactory()
+        datos = {'productos': productos, 'limite': options['limite']}
+        clave = CacheRecomendaciones.obtener_clave_carrito(
+            productos, options['limite'], CacheRecomendaciones.particion_activa()
+        )
+
+        resultados = {}
+        for nombre, prerenderizar in (('renderizado por petición', False), ('bytes prerenderizados', True)):
+            vista = RecomendacionesAPIView.as_view(PRERENDERIZAR=prerenderizar)
+            cache.delete(clave)
+
+            # Calentar: la primera petición calcula y guarda (bytes si corresponde)
+            for _ in range(2):
+                vista(factory.post('/api/recomendaciones/sugerencias/', datos, format='json'))
+
+            tiempos = []
+            for _ in range(options['iteraciones']):
+                peticion = factory.post('/api/recomendaciones/sugerencias/', datos, format='json')
+                inicio = time.process_time()
+                respuesta = vista(peticion)
+                if hasattr(respuesta, 'render'):  # Response de DRF (HttpResponse ya trae los bytes)
+                    respuesta.render()
+                tiempos.append(time.process_time() - inicio)
+
+            resultados[nombre] = statistics.mean(tiempos)
+            self.stdout.write(
+                f"{nombre}: {resultados[nombre] * 1e6:.1f} µs de CPU por petición "
+                f"({len(respuesta.content)} bytes)"
+            )
+
+        base, optimizado = resultados.values()
+        self.stdout.write(self.style.SUCCESS(f"Reducción de CPU por petición: {(1 - optimizado / base) * 100:.1f}%"))
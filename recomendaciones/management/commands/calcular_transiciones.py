@@ -0,0 +1,15 @@
+# recomendaciones/management/commands/calcular_transiciones.py
+from django.core.management.base import BaseCommand
+
+from ...secuencias import TransicionesProducto
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula desde cero las transiciones entre compras consecutivas de cada cliente '
+        '(recomendaciones de siguiente compra). Las ventas nuevas las actualizan solas.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Calculando transiciones entre compras consecutivas..."))
+        total = TransicionesProducto.calcular()
+        self.stdout.write(self.style.SUCCESS(f"Se guardaron {total} transiciones."))
@@ -0,0 +1,216 @@
+# recomendaciones/management/commands/evaluar_recomendaciones.py
+import contextlib
+import io
+import statistics
+import time
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.models import Producto
+from ventas.models import NotaVenta, DetalleNotaVenta
+from recomendaciones.cache import CacheRecomendaciones
+from recomendaciones.ml import GeneradorRecomendaciones
+from recomendaciones.particiones import GLOBAL
+from recomendaciones.views import RecomendacionesAPIView
+
+class Command(BaseCommand):
+    help = (
+        'Evaluación offline de las recomendaciones: separa las ventas por fecha '
+        '(entrenamiento/prueba), genera reglas en memoria con el entrenamiento y '
+        'reproduce las cestas de prueba con el puntaje de carritos de la API. '
+        'Reporta hit-rate@k, cobertura, tiempo de minado y p50/p95 del puntaje por carrito. '
+        'No modifica las reglas guardadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fraccion-prueba',
+            type=float,
+            default=0.2,
+            help='Fracción de las ventas más recientes usada como prueba'
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            nargs='+',
+            default=[3, 5, 10],
+            help='Valores de k para hit-rate@k'
+        )
+        parser.add_argument('--soporte', type=float, help='Soporte mínimo (por defecto, el configurado)')
+        parser.add_argument('--confianza', type=float, help='Confianza mínima (por defecto, la configurada)')
+        parser.add_argument('--lift', type=float, help='Lift mínimo (por defecto, el configurado)')
+        parser.add_argument(
+            '--por-bloques',
+            action='store_true',
+            help='Minar con el conteo de co-ocurrencias por bloques en lugar de Apriori'
+        )
+        parser.add_argument(
+            '--sin-respaldo',
+            action='store_true',
+            help='No completar con productos populares los productos sin reglas'
+        )
+        parser.add_argument(
+            '--max-cestas',
+            type=int,
+            default=None,
+            help='Máximo de cestas de prueba a reproducir'
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['fraccion_prueba'] < 1:
+            raise CommandError("--fraccion-prueba debe estar entre 0 y 1.")
+
+        # 1. Separación temporal: las ventas más recientes son la prueba
+        notas = NotaVenta.objects.order_by('fecha_hora', 'id')
+        total = notas.count()
+        corte = int(total * (1 - options['fraccion_prueba']))
+        if corte == 0 or corte == total:
+            raise CommandError("No hay ventas suficientes para separar entrenamiento y prueba.")
+        fecha_corte = notas.values_list('fecha_hora', flat=True)[corte]
+        entrenamiento = NotaVenta.objects.filter(fecha_hora__lt=fecha_corte)
+        prueba = NotaVenta.objects.filter(fecha_hora__gte=fecha_corte)
+        self.stdout.write(
+            f"Ventas: {entrenamiento.count()} de entrenamiento, {prueba.count()} de prueba "
+            f"(corte {fecha_corte:%Y-%m-%d %H:%M})"
+        )
+
+        # 2. Minar reglas en memoria con el entrenamiento
+        generador = GeneradorRecomendaciones(
+            por_bloques=options['por_bloques'] or None, notas_venta=entrenamiento
+        )
+        for opcion, atributo in (('soporte', 'min_support'), ('confianza', 'min_confidence'), ('lift', 'min_lift')):
+            if options[opcion] is not None:
+                setattr(generador, atributo, options[opcion])
+
+        inicio = time.perf_counter()
+        salida = io.StringIO() if options['verbosity'] < 2 else self.stdout
+        with contextlib.redirect_stdout(salida):
+            rules = self._minar(generador)
+        tiempo_minado = time.perf_counter() - inicio
+        self.stdout.write(
+            f"Minado ({'por bloques' if generador.por_bloques else 'apriori'}, soporte={generador.min_support}, "
+            f"confianza={generador.min_confidence}, lift={generador.min_lift}): "
+            f"{0 if rules is None else len(rules)} reglas en {tiempo_minado:.2f} s"
+        )
+
+        listas = self._listas_por_producto(rules)
+        respaldo = [] if options['sin_respaldo'] else self._populares(entrenamiento)
+
+        # 3. Reproducir las cestas de prueba (dejar uno fuera)
+        cestas = defaultdict(set)
+        for nota_id, producto_id in DetalleNotaVenta.objects.filter(
+            nota_venta__in=prueba
+        ).values_list('nota_venta_id', 'producto_id'):
+            cestas[nota_id].add(producto_id)
+        cestas = [sorted(cesta) for cesta in cestas.values() if len(cesta) >= 2]
+        if options['max_cestas']:
+            cestas = cestas[:options['max_cestas']]
+        if not cestas:
+            raise CommandError("No hay cestas de prueba con al menos dos productos.")
+
+        k_maximo = max(options['k'])
+        aciertos = Counter()
+        intentos = 0
+        carritos_con_resultados = 0
+        recomendados = set()
+        tiempos = []
+
+        for cesta in cestas:
+            for oculto in cesta:
+                carrito = [producto_id for producto_id in cesta if producto_id != oculto]
+
+                inicio = time.perf_counter()
+                resultado = self._puntuar_carrito(carrito, k_maximo, listas, respaldo)
+                tiempos.append(time.perf_counter() - inicio)
+
+                intentos += 1
+                ids = [r['producto'] for r in resultado]
+                if ids:
+                    carritos_con_resultados += 1
+                recomendados.update(ids)
+                for k in options['k']:
+                    if oculto in ids[:k]:
+                        aciertos[k] += 1
+
+        # 4. Reporte
+        total_productos = Producto.objects.count()
+        cuantiles = statistics.quantiles(tiempos, n=100) if len(tiempos) > 1 else tiempos * 99
+        self.stdout.write(f"Cestas reproducidas: {len(cestas)} ({intentos} carritos, dejando uno fuera)")
+        for k in sorted(options['k']):
+            self.stdout.write(self.style.SUCCESS(f"  hit-rate@{k}: {aciertos[k] / intentos:.3f}"))
+        self.stdout.write(
+            f"  Cobertura de carritos: {carritos_con_resultados / intentos:.1%}  "
+            f"Cobertura de catálogo: {len(recomendados)}/{total_productos} "
+            f"({len(recomendados) / total_productos:.1%})"
+        )
+        self.stdout.write(
+            f"  Puntaje por carrito p50: {cuantiles[49] * 1e6:.1f} µs  p95: {cuantiles[94] * 1e6:.1f} µs"
+        )
+
+    @staticmethod
+    def _minar(generador):
+        """Genera las reglas en memoria, sin bloqueo ni escritura en la base de datos."""
+        if generador.por_bloques:
+            resultado = generador._contar_coocurrencias_por_bloques()
+            if resultado is None:
+                return None
+            ids_productos, conteos = resultado
+            return generador._generar_reglas_desde_conteos(ids_productos, *conteos[GLOBAL])
+
+        df_transacciones = generador._obtener_datos_transacciones()
+        if df_transacciones is None or df_transacciones.empty:
+            return None
+        frequent_itemsets = generador._aplicar_apriori(df_transacciones)
+        if frequent_itemsets is None or frequent_itemsets.empty:
+            return None
+        return generador._generar_reglas(frequent_itemsets)
+
+    @staticmethod
+    def _listas_por_producto(rules):
+        """
+        Construye, como el cache, la lista de cada producto origen: las
+        PROFUNDIDAD_CACHE mejores reglas por lift y confianza.
+        """
+        listas = defaultdict(list)
+        if rules is None or rules.empty:
+            return listas
+
+        rules = rules.sort_values(['lift', 'confidence'], ascending=False)
+        for antecedentes, consecuentes, confianza, lift in zip(
+            rules['antecedents'], rules['consequents'], rules['confidence'], rules['lift']
+        ):
+            origen_id = next(iter(antecedentes))
+            if len(listas[origen_id]) < CacheRecomendaciones.PROFUNDIDAD_CACHE:
+                listas[origen_id].append({
+                    'id': next(iter(consecuentes)),
+                    'puntuacion': lift * confianza,
+                })
+        return listas
+
+    @staticmethod
+    def _populares(entrenamiento):
+        """Productos más vendidos del entrenamiento, como el respaldo por popularidad."""
+        populares = DetalleNotaVenta.objects.filter(
+            nota_venta__in=entrenamiento
+        ).values_list('producto_id', flat=True)
+        conteo = Counter(populares)
+        return [
+            {'id': producto_id, 'puntuacion': 0}
+            for producto_id, _ in conteo.most_common(CacheRecomendaciones.PROFUNDIDAD_CACHE * 2)
+        ]
+
+    @staticmethod
+    def _puntuar_carrito(carrito, limite, listas, respaldo):
+        """
+        Mismo puntaje que RecomendacionesAPIView: limite * 2 recomendaciones por
+        producto (sin los del carrito) combinadas por puntuación promedio.
+        """
+        excluir = set(carrito)
+        listas_carrito = []
+        for producto_id in carrito:
+            lista = listas.get(producto_id) or respaldo
+            listas_carrito.append([
+                dict(r, producto=r['id']) for r in lista if r['id'] not in excluir
+            ][:limite * 2])
+        return RecomendacionesAPIView._combinar_recomendaciones(listas_carrito, limite)
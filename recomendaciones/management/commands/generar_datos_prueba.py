@@ -9,6 +9,7 @@ from productos.models import Producto, Categoria, Marca
 from ventas.models import NotaVenta, DetalleNotaVenta
 from usuarios.models import Cliente
 from recomendaciones.ml import GeneradorRecomendaciones
+from recomendaciones.bloqueo import GeneracionEnCurso
 
 class Command(BaseCommand):
     help = 'Genera datos de prueba para el sistema de recomendaciones'
@@ -47,7 +48,11 @@ class Command(BaseCommand):
         
         # Generar recomendaciones a partir de las ventas creadas
         generador = GeneradorRecomendaciones()
-        count = generador.generar_recomendaciones()
+        try:
+            count = generador.generar_recomendaciones(origen='datos_prueba')
+        except GeneracionEnCurso as e:
+            self.stdout.write(self.style.WARNING(str(e)))
+            return
         
         if count is not None:
             self.stdout.write(
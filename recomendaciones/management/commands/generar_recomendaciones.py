@@ -4,10 +4,24 @@ from django.utils import timezone
 from datetime import timedelta
 from ...models import ConfiguracionRecomendacion
 from ...ml import GeneradorRecomendaciones
+from ...bloqueo import GeneracionEnCurso
 
 class Command(BaseCommand):
     help = 'Genera recomendaciones de productos utilizando el algoritmo Apriori'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--por-bloques',
+            action='store_true',
+            help='Cuenta co-ocurrencias por bloques de ventas en lugar de cargar todo el historial'
+        )
+        parser.add_argument(
+            '--tamano-bloque',
+            type=int,
+            default=None,
+            help='Notas de venta por bloque en el modo por bloques (RECOMENDACIONES_GENERACION_BLOQUE)'
+        )
+
     def handle(self, *args, **options):
         # Obtener configuración
         config, created = ConfiguracionRecomendacion.objects.get_or_create(pk=1)
@@ -30,8 +44,15 @@ class Command(BaseCommand):
             self.stdout.write(self.style.NOTICE("Iniciando generación de recomendaciones..."))
             
             # Ejecutar generador
-            generador = GeneradorRecomendaciones()
-            count = generador.generar_recomendaciones()
+            generador = GeneradorRecomendaciones(
+                por_bloques=options['por_bloques'] or None,
+                tamano_bloque=options['tamano_bloque']
+            )
+            try:
+                count = generador.generar_recomendaciones(origen='comando')
+            except GeneracionEnCurso as e:
+                self.stdout.write(self.style.WARNING(str(e)))
+                return
             
             if count is not None:
                 self.stdout.write(
@@ -0,0 +1,111 @@
+# recomendaciones/management/commands/prueba_carga_recomendaciones.py
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recomendaciones.models import ReglaAsociacion
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de las sugerencias de productos contra un servidor en ejecución. '
+        'Compara el endpoint síncrono (/sugerencias/) con el asíncrono (/sugerencias/async/). '
+        'Ejemplo: levantar "gunicorn core.wsgi -w 4" y luego '
+        '"gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker -w 1" '
+        'y ejecutar este comando contra cada uno con la misma concurrencia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000/api/recomendaciones/',
+            help='URL base de la API de recomendaciones'
+        )
+        parser.add_argument(
+            '--peticiones',
+            type=int,
+            default=500,
+            help='Número total de peticiones por endpoint'
+        )
+        parser.add_argument(
+            '--concurrencia',
+            type=int,
+            default=50,
+            help='Número de peticiones simultáneas'
+        )
+        parser.add_argument(
+            '--productos-por-carrito',
+            type=int,
+            default=3,
+            help='Cantidad de productos de cada carrito generado'
+        )
+        parser.add_argument(
+            '--endpoint',
+            choices=['sync', 'async', 'ambos'],
+            default='ambos',
+            help='Endpoint a probar'
+        )
+
+    def handle(self, *args, **options):
+        # Carritos aleatorios a partir de productos con reglas, para provocar fallos de cache
+        productos = list(
+            ReglaAsociacion.objects.values_list('producto_origen_id', flat=True).distinct()
+        )
+        if not productos:
+            raise CommandError("No hay reglas de asociación. Ejecuta generar_recomendaciones primero.")
+
+        tamano = min(options['productos_por_carrito'], len(productos))
+        carritos = [random.sample(productos, tamano) for _ in range(options['peticiones'])]
+
+        endpoints = {
+            'sync': 'sugerencias/',
+            'async': 'sugerencias/async/',
+        }
+        if options['endpoint'] != 'ambos':
+            endpoints = {options['endpoint']: endpoints[options['endpoint']]}
+
+        for nombre, ruta in endpoints.items():
+            url = options['url'].rstrip('/') + '/' + ruta
+            self.stdout.write(self.style.NOTICE(
+                f"Probando {nombre}: {len(carritos)} peticiones, concurrencia {options['concurrencia']} ({url})"
+            ))
+            self._ejecutar(url, carritos, options['concurrencia'])
+
+    def _ejecutar(self, url, carritos, concurrencia):
+        """Lanza las peticiones y muestra rendimiento y percentiles de latencia."""
+        def enviar(carrito):
+            cuerpo = json.dumps({'productos': carrito, 'limite': 3}).encode()
+            peticion = urllib.request.Request(
+                url, data=cuerpo, headers={'Content-Type': 'application/json'}, method='POST'
+            )
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+                    respuesta.read()
+                    ok = respuesta.status == 200
+            except (urllib.error.URLError, TimeoutError):
+                ok = False
+            return time.perf_counter() - inicio, ok
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+            resultados = list(executor.map(enviar, carritos))
+        duracion = time.perf_counter() - inicio
+
+        latencias = sorted(t for t, ok in resultados if ok)
+        errores = sum(1 for _, ok in resultados if not ok)
+        if not latencias:
+            self.stdout.write(self.style.ERROR(f"Todas las peticiones fallaron ({errores})."))
+            return
+
+        cuantiles = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        self.stdout.write(
+            f"  Peticiones/s: {len(latencias) / duracion:.1f}  Errores: {errores}\n"
+            f"  Latencia p50: {cuantiles[49] * 1000:.1f} ms  "
+            f"p95: {cuantiles[94] * 1000:.1f} ms  p99: {cuantiles[98] * 1000:.1f} ms"
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-19 18:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recomendaciones', '0002_reglaasociacion_recomendaci_product_ad5eb2_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioRecomendacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('impresiones', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('conversiones', models.PositiveIntegerField(default=0)),
+                ('ingreso', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Recomendaciones',
+                'verbose_name_plural': 'Resúmenes Diarios de Recomendaciones',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoRecomendacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('impresion', 'Impresión'), ('click', 'Click'), ('conversion', 'Conversión')], max_length=20)),
+                ('producto_origen', models.PositiveIntegerField(blank=True, null=True)),
+                ('producto_recomendado', models.PositiveIntegerField()),
+                ('cliente', models.PositiveIntegerField(blank=True, null=True)),
+                ('nota_venta', models.PositiveIntegerField(blank=True, null=True)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Evento de Recomendación',
+                'verbose_name_plural': 'Eventos de Recomendación',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha', 'tipo'], name='recomendaci_fecha_38ea88_idx')],
+            },
+        ),
+    ]
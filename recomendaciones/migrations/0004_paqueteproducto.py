@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 18:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0002_producto_imagen'),
+        ('recomendaciones', '0003_resumendiariorecomendacion_eventorecomendacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaqueteProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('productos_ids', models.JSONField(default=list, help_text='IDs de todos los productos del paquete, empezando por el principal')),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('puntuacion', models.FloatField(default=0)),
+                ('ultima_actualizacion', models.DateTimeField(auto_now=True)),
+                ('miembros', models.ManyToManyField(help_text='Productos que acompañan al producto principal en el paquete', related_name='paquetes_miembro', to='productos.producto')),
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='paquete', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Paquete de Productos',
+                'verbose_name_plural': 'Paquetes de Productos',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0002_producto_imagen'),
+        ('recomendaciones', '0004_paqueteproducto'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reglaasociacion',
+            name='recomendaci_product_ad5eb2_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='reglaasociacion',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='reglaasociacion',
+            name='particion',
+            field=models.CharField(blank=True, default='', help_text='Temporada o mes del que se aprendió la regla (vacío = reglas globales)', max_length=30),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reglaasociacion',
+            unique_together={('producto_origen', 'producto_recomendado', 'particion')},
+        ),
+        migrations.AddIndex(
+            model_name='reglaasociacion',
+            index=models.Index(fields=['particion', 'producto_origen', '-lift', '-confianza'], name='recomendaci_partici_6bdb50_idx'),
+        ),
+    ]
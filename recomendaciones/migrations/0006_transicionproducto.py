@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0002_producto_imagen'),
+        ('recomendaciones', '0005_reglaasociacion_particion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conteo', models.PositiveIntegerField(default=0)),
+                ('ultima_actualizacion', models.DateTimeField(auto_now=True)),
+                ('producto_origen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones_origen', to='productos.producto')),
+                ('producto_siguiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones_siguiente', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Transición de Producto',
+                'verbose_name_plural': 'Transiciones de Productos',
+                'ordering': ['-conteo'],
+                'indexes': [models.Index(fields=['producto_origen', '-conteo'], name='recomendaci_product_f481a1_idx')],
+                'unique_together': {('producto_origen', 'producto_siguiente')},
+            },
+        ),
+    ]
@@ -1,14 +1,25 @@
 # recomendaciones/ml.py
+import logging
+import resource
+
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from mlxtend.frequent_patterns import apriori, association_rules
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import Count, Q, F, Window
+from django.db.models.functions import RowNumber
 
 from ventas.models import NotaVenta, DetalleNotaVenta
 from productos.models import Producto
 from .models import ReglaAsociacion, ConfiguracionRecomendacion
+from .cache import CacheRecomendaciones
+from .bloqueo import BloqueoGeneracion, GeneracionEnCurso
+from .particiones import GLOBAL, modo_particiones, particion_de_fecha
+
+logger = logging.getLogger(__name__)
 
 class GeneradorRecomendaciones:
     """
@@ -16,7 +27,10 @@ class GeneradorRecomendaciones:
     basado en el historial de ventas.
     """
     
-    def __init__(self):
+    # Reglas por INSERT al guardarlas (bulk_create)
+    LOTE_GUARDADO = 1000
+    
+    def __init__(self, por_bloques=None, tamano_bloque=None, notas_venta=None):
         # Obtener configuración o usar valores predeterminados
         try:
             self.config = ConfiguracionRecomendacion.objects.first()
@@ -29,6 +43,18 @@ class GeneradorRecomendaciones:
         self.min_support = self.config.soporte_minimo
         self.min_confidence = self.config.confianza_minima
         self.min_lift = self.config.lift_minimo
+        
+        # Modo por bloques: cuenta co-ocurrencias sin cargar todo el historial en memoria
+        if por_bloques is None:
+            por_bloques = getattr(settings, 'RECOMENDACIONES_GENERACION_POR_BLOQUES', False)
+        self.por_bloques = por_bloques
+        self.tamano_bloque = tamano_bloque or getattr(settings, 'RECOMENDACIONES_GENERACION_BLOQUE', 5000)
+        
+        # Ventas de las que se aprende (por defecto, todo el historial)
+        self.notas_venta = notas_venta
+        
+        # Productos origen cuyo top-K cambió en la última generación (None = desconocido)
+        self.productos_modificados = None
     
     def _obtener_datos_transacciones(self):
         """
@@ -44,6 +70,8 @@ class GeneradorRecomendaciones:
         detalles = DetalleNotaVenta.objects.select_related(
             'nota_venta', 'producto'
         ).all()
+        if self.notas_venta is not None:
+            detalles = detalles.filter(nota_venta__in=self.notas_venta)
         
         # Crear una lista de transacciones
         # Cada transacción es un diccionario {nota_venta_id: id, producto_id: id}
@@ -131,12 +159,200 @@ class GeneradorRecomendaciones:
         print(f"Reglas generadas: {len(rules)}")
         return rules
     
-    def _guardar_reglas(self, rules):
+    def _contar_coocurrencias_por_bloques(self, progreso=None, particionar=False):
+        """
+        Cuenta productos y pares de productos recorriendo las notas de venta por bloques.
+        
+        Cada bloque de IDs de NotaVenta se convierte en una matriz dispersa
+        (nota x producto) y sus conteos se suman a un acumulador disperso, de modo
+        que la memoria depende del número de productos y no del número de ventas.
+        Con particionar, las filas de cada bloque se suman además al acumulador de
+        la partición de su fecha (temporada o mes): una sola pasada para todas.
+        
+        Las columnas son los productos leídos al comenzar; los detalles de
+        productos creados durante el recorrido se descartan (no tienen columna) y
+        entran en la siguiente generación.
+        
+        Args:
+            progreso: Función opcional llamada con el porcentaje recorrido tras cada bloque
+            particionar: Si es True, acumula también conteos por partición
+            
+        Returns:
+            Tupla (ids_productos, conteos) donde conteos es
+            {particion: (conteo_items, conteo_pares, total_notas)} e incluye siempre
+            la partición GLOBAL, o None si no hay ventas.
+        """
+        ids_productos = np.array(
+            Producto.objects.order_by('id').values_list('id', flat=True), dtype=np.int64
+        )
+        notas_venta = self.notas_venta if self.notas_venta is not None else NotaVenta.objects.all()
+        total = notas_venta.count()
+        if not total or not len(ids_productos):
+            print("No hay transacciones disponibles.")
+            return None
+        
+        n = len(ids_productos)
+        conteos = {}
+        
+        def acumular(particion, matriz):
+            conteo_items, conteo_pares, total_notas = conteos.get(particion) or (
+                np.zeros(n, dtype=np.int64), sparse.csr_matrix((n, n), dtype=np.int64), 0
+            )
+            conteo_items += np.asarray(matriz.sum(axis=0)).ravel()
+            conteos[particion] = (conteo_items, conteo_pares + (matriz.T @ matriz), total_notas + matriz.shape[0])
+        
+        recorridas = 0
+        ultimo_id = 0
+        bloque = 0
+        
+        print(f"Contando co-ocurrencias por bloques de {self.tamano_bloque} notas de venta...")
+        while True:
+            notas_bloque = list(
+                notas_venta.filter(id__gt=ultimo_id)
+                .order_by('id')
+                .values_list('id', 'fecha_hora')[:self.tamano_bloque]
+            )
+            if not notas_bloque:
+                break
+            ids_notas = [nota_id for nota_id, _ in notas_bloque]
+            
+            detalles = DetalleNotaVenta.objects.filter(
+                nota_venta_id__gte=ids_notas[0], nota_venta_id__lte=ids_notas[-1]
+            )
+            if self.notas_venta is not None:
+                detalles = detalles.filter(nota_venta_id__in=ids_notas)
+            detalles = np.array(
+                detalles.values_list('nota_venta_id', 'producto_id'),
+                dtype=np.int64
+            ).reshape(-1, 2)
+            ultimo_id = ids_notas[-1]
+            recorridas += len(ids_notas)
+            bloque += 1
+            
+            if len(detalles):
+                # Descartar productos que no estaban en la lista inicial
+                columnas = np.searchsorted(ids_productos, detalles[:, 1])
+                conocidos = columnas < n
+                conocidos[conocidos] = ids_productos[columnas[conocidos]] == detalles[conocidos, 1]
+                detalles, columnas = detalles[conocidos], columnas[conocidos]
+            
+            if len(detalles):
+                notas, filas = np.unique(detalles[:, 0], return_inverse=True)
+                matriz = sparse.csr_matrix(
+                    (np.ones(len(detalles), dtype=np.int64), (filas, columnas)),
+                    shape=(len(notas), n)
+                )
+                # Un producto repetido en la misma nota cuenta una sola vez
+                matriz.data[:] = 1
+                acumular(GLOBAL, matriz)
+                
+                if particionar:
+                    particion_por_nota = {
+                        nota_id: particion_de_fecha(fecha_hora) for nota_id, fecha_hora in notas_bloque
+                    }
+                    particiones = np.array([particion_por_nota[nota_id] for nota_id in notas])
+                    for particion in set(particiones.tolist()) - {GLOBAL}:
+                        acumular(particion, matriz[particiones == particion])
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                # ru_maxrss se expresa en KB en Linux
+                pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                pares_acumulados = conteos[GLOBAL][1].nnz if GLOBAL in conteos else 0
+                logger.debug(
+                    f"Bloque {bloque}: {recorridas}/{total} notas, "
+                    f"{pares_acumulados} pares acumulados, pico de memoria {pico_mb:.1f} MB"
+                )
+            if progreso:
+                progreso(recorridas / total)
+        
+        if GLOBAL not in conteos:
+            print("No hay transacciones disponibles.")
+            return None
+        return ids_productos, conteos
+    
+    def _generar_reglas_desde_conteos(self, ids_productos, conteo_items, conteo_pares, total_notas):
+        """
+        Genera reglas producto → producto a partir de los conteos acumulados.
+        
+        Produce el mismo formato que association_rules (antecedents, consequents,
+        support, confidence, lift) para reutilizar _guardar_reglas.
+        
+        Returns:
+            DataFrame con reglas de asociación y sus métricas, o None si no hay reglas.
+        """
+        print(f"Generando reglas (min_support={self.min_support}, "
+              f"min_confidence={self.min_confidence}, min_lift={self.min_lift})...")
+        
+        if not total_notas:
+            print("No hay transacciones disponibles.")
+            return None
+        
+        pares = conteo_pares.tocoo()
+        # Quitar la diagonal (producto consigo mismo) y los pares poco frecuentes
+        mascara = (pares.row != pares.col) & (pares.data / total_notas >= self.min_support)
+        filas, columnas, conteos = pares.row[mascara], pares.col[mascara], pares.data[mascara]
+        
+        soporte = conteos / total_notas
+        confianza = conteos / conteo_items[filas]
+        lift = confianza / (conteo_items[columnas] / total_notas)
+        
+        validas = (confianza >= self.min_confidence) & (lift >= self.min_lift)
+        if not validas.any():
+            print("No se generaron reglas con los criterios especificados.")
+            return None
+        
+        rules = pd.DataFrame({
+            'antecedents': [frozenset([int(i)]) for i in ids_productos[filas[validas]]],
+            'consequents': [frozenset([int(i)]) for i in ids_productos[columnas[validas]]],
+            'support': soporte[validas],
+            'confidence': confianza[validas],
+            'lift': lift[validas],
+        })
+        
+        print(f"Reglas generadas: {len(rules)}")
+        return rules
+    
+    @staticmethod
+    def _obtener_top_reglas():
+        """
+        Obtiene el top-K de productos recomendados de cada producto origen y
+        partición, en el mismo orden y profundidad que se guardan en cache,
+        con la confianza y el lift que se muestran (y de los que sale la
+        puntuación): una regla que conserva su lugar pero cambia de valores
+        también modifica las recomendaciones cacheadas.
+        
+        Returns:
+            Diccionario {(particion, producto_origen_id): tupla de (producto_recomendado_id, confianza, lift)}
+        """
+        reglas = ReglaAsociacion.objects.annotate(
+            posicion=Window(
+                RowNumber(),
+                partition_by=[F('particion'), F('producto_origen_id')],
+                order_by=[F('lift').desc(), F('confianza').desc()]
+            )
+        ).filter(
+            posicion__lte=CacheRecomendaciones.PROFUNDIDAD_CACHE
+        ).order_by('particion', 'producto_origen_id', 'posicion').values_list(
+            'particion', 'producto_origen_id', 'producto_recomendado_id', 'confianza', 'lift'
+        )
+        
+        top = {}
+        for particion, origen_id, recomendado_id, confianza, lift in reglas:
+            top.setdefault((particion, origen_id), []).append((recomendado_id, confianza, lift))
+        return {clave: tuple(ids) for clave, ids in top.items()}
+    
+    def _guardar_reglas(self, rules, particiones=None):
         """
         Guarda las reglas generadas en la base de datos.
         
+        Compara el top-K de cada producto origen antes y después de reescribir las
+        reglas y deja en self.productos_modificados los orígenes cuyo top-K cambió
+        (productos, confianza o lift) en alguna partición (incluidos los que
+        ganaron o perdieron todas sus reglas).
+        
         Args:
-            rules: DataFrame con reglas de asociación.
+            rules: DataFrame con reglas de asociación globales.
+            particiones: Diccionario opcional {particion: DataFrame de reglas}.
             
         Returns:
             Número de reglas guardadas.
@@ -145,62 +361,136 @@ class GeneradorRecomendaciones:
         
         # Comenzar transacción para mantener integridad
         with transaction.atomic():
+            top_anterior = self._obtener_top_reglas()
+            
             # Eliminar reglas anteriores
             ReglaAsociacion.objects.all().delete()
             
             # Contar reglas guardadas
             count = 0
             
-            # Procesar cada regla
-            for _, row in rules.iterrows():
-                # Extraer IDs de productos de la regla
-                antecedent_id = list(row['antecedents'])[0]
-                consequent_id = list(row['consequents'])[0]
-                
-                try:
-                    # Crear nueva regla
-                    ReglaAsociacion.objects.create(
+            reglas_por_particion = {GLOBAL: rules}
+            reglas_por_particion.update(particiones or {})
+            
+            # Un producto borrado durante la generación invalidaría todo el INSERT: se descartan sus reglas
+            productos_existentes = set(Producto.objects.values_list('id', flat=True))
+            
+            # Un bulk_create por partición
+            for particion, reglas_particion in reglas_por_particion.items():
+                reglas = []
+                for antecedentes, consecuentes, soporte, confianza, lift in zip(
+                    reglas_particion['antecedents'], reglas_particion['consequents'],
+                    reglas_particion['support'], reglas_particion['confidence'], reglas_particion['lift']
+                ):
+                    # Extraer IDs de productos de la regla
+                    antecedent_id = int(next(iter(antecedentes)))
+                    consequent_id = int(next(iter(consecuentes)))
+                    if antecedent_id not in productos_existentes or consequent_id not in productos_existentes:
+                        print(f"Regla descartada ({antecedent_id} → {consequent_id}): el producto ya no existe")
+                        continue
+                    reglas.append(ReglaAsociacion(
                         producto_origen_id=antecedent_id,
                         producto_recomendado_id=consequent_id,
-                        soporte=row['support'],
-                        confianza=row['confidence'],
-                        lift=row['lift']
-                    )
-                    count += 1
-                except Exception as e:
-                    print(f"Error al guardar regla ({antecedent_id} → {consequent_id}): {e}")
+                        soporte=float(soporte),
+                        confianza=float(confianza),
+                        lift=float(lift),
+                        particion=particion
+                    ))
+                ReglaAsociacion.objects.bulk_create(reglas, batch_size=self.LOTE_GUARDADO)
+                count += len(reglas)
+            
+            top_nuevo = self._obtener_top_reglas()
+            self.productos_modificados = {
+                origen_id for particion, origen_id in top_anterior.keys() | top_nuevo.keys()
+                if top_anterior.get((particion, origen_id)) != top_nuevo.get((particion, origen_id))
+            }
             
             # Actualizar la fecha de última actualización
             self.config.ultima_actualizacion = timezone.now()
             self.config.save()
             
-        print(f"Reglas guardadas: {count}")
+            # Publicar la nueva versión de reglas (invalida ETags) al confirmar la transacción
+            fecha_version = self.config.ultima_actualizacion
+            transaction.on_commit(lambda: CacheRecomendaciones.actualizar_version(fecha_version))
+            # Y las particiones disponibles, para que el servicio elija la activa sin consultas
+            nombres_particiones = sorted(particiones or {})
+            transaction.on_commit(lambda: CacheRecomendaciones.actualizar_particiones(nombres_particiones))
+            
+        print(f"Reglas guardadas: {count} ({len(self.productos_modificados)} productos con top-K modificado)")
         return count
     
-    def generar_recomendaciones(self):
+    def generar_recomendaciones(self, origen='manual'):
         """
         Proceso principal para generar recomendaciones.
         
+        Mantiene el bloqueo de generación durante toda la ejecución, de modo que
+        dos generaciones nunca reescriben las reglas a la vez, y publica el avance.
+        
+        Args:
+            origen: Quién inicia la generación (beat, admin, comando...), para el estado
+            
         Returns:
             Número de reglas generadas, o None si hubo un error.
+            
+        Raises:
+            GeneracionEnCurso: Si otra generación mantiene el bloqueo.
         """
+        bloqueo = BloqueoGeneracion(origen)
+        if not bloqueo.adquirir():
+            raise GeneracionEnCurso("Ya hay una generación de recomendaciones en curso.")
+        
+        count = None
         try:
+            # Las particiones por temporada se cuentan en la misma pasada por bloques
+            particionar = bool(modo_particiones())
+            if self.por_bloques or particionar:
+                # 1-3. Contar co-ocurrencias por bloques y derivar las reglas
+                bloqueo.actualizar('contando_coocurrencias', 5)
+                resultado = self._contar_coocurrencias_por_bloques(
+                    progreso=lambda avance: bloqueo.actualizar('contando_coocurrencias', 5 + int(avance * 55)),
+                    particionar=particionar
+                )
+                if resultado is None:
+                    return None
+                ids_productos, conteos = resultado
+                
+                bloqueo.actualizar('generando_reglas', 60)
+                rules = self._generar_reglas_desde_conteos(ids_productos, *conteos.pop(GLOBAL))
+                if rules is None or rules.empty:
+                    return None
+                
+                particiones = {}
+                for particion, conteos_particion in sorted(conteos.items()):
+                    print(f"Partición {particion}:")
+                    reglas_particion = self._generar_reglas_desde_conteos(ids_productos, *conteos_particion)
+                    if reglas_particion is not None:
+                        particiones[particion] = reglas_particion
+                
+                # 4. Guardar reglas en la base de datos
+                bloqueo.actualizar('guardando_reglas', 80)
+                count = self._guardar_reglas(rules, particiones)
+                return count
+            
             # 1. Obtener datos de transacciones
+            bloqueo.actualizar('obteniendo_transacciones', 5)
             df_transacciones = self._obtener_datos_transacciones()
             if df_transacciones is None or df_transacciones.empty:
                 return None
             
             # 2. Aplicar Apriori
+            bloqueo.actualizar('apriori', 30)
             frequent_itemsets = self._aplicar_apriori(df_transacciones)
             if frequent_itemsets is None or frequent_itemsets.empty:
                 return None
             
             # 3. Generar reglas
+            bloqueo.actualizar('generando_reglas', 60)
             rules = self._generar_reglas(frequent_itemsets)
             if rules is None or rules.empty:
                 return None
             
             # 4. Guardar reglas en la base de datos
+            bloqueo.actualizar('guardando_reglas', 80)
             count = self._guardar_reglas(rules)
             
             return count
@@ -209,4 +499,8 @@ class GeneradorRecomendaciones:
             import traceback
             traceback.print_exc()
             return None
-
+        finally:
+            if count is not None:
+                bloqueo.liberar('completado', f"Se generaron {count} reglas.")
+            else:
+                bloqueo.liberar('error', "No se generaron reglas.")
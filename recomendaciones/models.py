@@ -1,5 +1,6 @@
 # recomendaciones/models.py
 from django.db import models
+from django.utils import timezone
 from productos.models import Producto
 
 class ReglaAsociacion(models.Model):
@@ -23,17 +24,23 @@ class ReglaAsociacion(models.Model):
     lift = models.FloatField(
         help_text="Relación entre la confianza y la frecuencia esperada del producto recomendado"
     )
+    particion = models.CharField(
+        max_length=30,
+        blank=True,
+        default='',
+        help_text="Temporada o mes del que se aprendió la regla (vacío = reglas globales)"
+    )
     ultima_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('producto_origen', 'producto_recomendado')
+        unique_together = ('producto_origen', 'producto_recomendado', 'particion')
         ordering = ['-lift', '-confianza']
         verbose_name = "Regla de Asociación"
         verbose_name_plural = "Reglas de Asociación"
         
         # Añadir índices para mejorar rendimiento de consultas
         indexes = [
-            models.Index(fields=['producto_origen', '-lift', '-confianza']),
+            models.Index(fields=['particion', 'producto_origen', '-lift', '-confianza']),
             models.Index(fields=['producto_recomendado']),
         ]
 
@@ -50,4 +57,115 @@ class ConfiguracionRecomendacion(models.Model):
     ultima_actualizacion = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
-        return f"Configuración de Recomendaciones (actualizado: {self.ultima_actualizacion})"
\ No newline at end of file
+        return f"Configuración de Recomendaciones (actualizado: {self.ultima_actualizacion})"
+
+class EventoRecomendacion(models.Model):
+    """
+    Evento de seguimiento de una recomendación (impresión, click o conversión).
+    Se escriben en lotes desde el buffer de eventos (ver eventos.py), por eso
+    las referencias son IDs planos y no claves foráneas: el volcado masivo no
+    debe fallar si un producto o cliente se eliminó mientras el evento esperaba.
+    """
+    TIPO_CHOICES = (
+        ('impresion', 'Impresión'),
+        ('click', 'Click'),
+        ('conversion', 'Conversión'),
+    )
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    producto_origen = models.PositiveIntegerField(null=True, blank=True)
+    producto_recomendado = models.PositiveIntegerField()
+    cliente = models.PositiveIntegerField(null=True, blank=True)
+    nota_venta = models.PositiveIntegerField(null=True, blank=True)
+    valor = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = "Evento de Recomendación"
+        verbose_name_plural = "Eventos de Recomendación"
+        indexes = [
+            models.Index(fields=['fecha', 'tipo']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - producto {self.producto_recomendado} ({self.fecha:%Y-%m-%d %H:%M})"
+
+class ResumenDiarioRecomendacion(models.Model):
+    """Totales diarios de eventos de recomendación, calculados por una tarea periódica."""
+    fecha = models.DateField(unique=True)
+    impresiones = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    conversiones = models.PositiveIntegerField(default=0)
+    ingreso = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = "Resumen Diario de Recomendaciones"
+        verbose_name_plural = "Resúmenes Diarios de Recomendaciones"
+
+    def __str__(self):
+        return f"{self.fecha}: {self.clicks} clicks, {self.conversiones} conversiones"
+
+class PaqueteProducto(models.Model):
+    """
+    Paquete "comprados juntos frecuentemente": un producto y los productos que
+    más se compran con él según las reglas de asociación, con el precio sumado.
+    Se reconstruye tras regenerar las reglas (ver paquetes.py) y su precio se
+    ajusta de forma incremental cuando cambia el precio de un producto.
+    """
+    producto = models.OneToOneField(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='paquete'
+    )
+    miembros = models.ManyToManyField(
+        Producto,
+        related_name='paquetes_miembro',
+        help_text="Productos que acompañan al producto principal en el paquete"
+    )
+    productos_ids = models.JSONField(
+        default=list,
+        help_text="IDs de todos los productos del paquete, empezando por el principal"
+    )
+    precio = models.DecimalField(max_digits=12, decimal_places=2)
+    puntuacion = models.FloatField(default=0)
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Paquete de Productos"
+        verbose_name_plural = "Paquetes de Productos"
+
+    def __str__(self):
+        return f"Paquete de {self.producto_id}: {self.productos_ids} (${self.precio})"
+
+class TransicionProducto(models.Model):
+    """
+    Transición entre compras consecutivas de un mismo cliente: cuántas veces
+    un producto comprado en una nota de venta fue seguido por otro en la
+    siguiente nota del cliente. Se calcula una vez con todo el historial y
+    después se actualiza con cada venta (ver secuencias.py).
+    """
+    producto_origen = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='transiciones_origen'
+    )
+    producto_siguiente = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='transiciones_siguiente'
+    )
+    conteo = models.PositiveIntegerField(default=0)
+    ultima_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('producto_origen', 'producto_siguiente')
+        ordering = ['-conteo']
+        verbose_name = "Transición de Producto"
+        verbose_name_plural = "Transiciones de Productos"
+        indexes = [
+            models.Index(fields=['producto_origen', '-conteo']),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_origen_id} → {self.producto_siguiente_id} ({self.conteo})"
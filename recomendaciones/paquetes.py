@@ -0,0 +1,203 @@
+# recomendaciones/paquetes.py
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q, Case, When, Value, DecimalField, Window
+from django.db.models.functions import RowNumber
+from rest_framework.renderers import JSONRenderer
+
+from productos.models import Producto
+from productos.serializers import ProductoSerializer
+from .models import ReglaAsociacion, PaqueteProducto
+from .cache import CacheRecomendaciones
+from .particiones import GLOBAL
+
+class PaquetesProducto:
+    """
+    Paquetes "comprados juntos frecuentemente" precalculados a partir de las
+    mejores reglas de cada producto origen.
+
+    Cada paquete se guarda en cache como bytes JSON ya renderizados, de modo que
+    servirlo es una sola lectura de cache. Los productos sin paquete guardan
+    SIN_PAQUETE para no consultar la base de datos en cada petición.
+    """
+
+    # Productos que acompañan al principal en cada paquete
+    TAMANO = getattr(settings, 'RECOMENDACIONES_PAQUETE_TAMANO', 2)
+    CACHE_TIMEOUT = CacheRecomendaciones.CACHE_TIMEOUT
+    SIN_PAQUETE = b''
+
+    @staticmethod
+    def obtener_clave(producto_id):
+        """Clave de cache del paquete de un producto."""
+        return f"recomendaciones_paquete_{producto_id}"
+
+    @classmethod
+    def obtener(cls, producto_id):
+        """
+        Retorna los bytes JSON del paquete de un producto, o None si no tiene.
+        """
+        contenido = cache.get(cls.obtener_clave(producto_id))
+        if contenido is None:
+            contenido = cls.precalentar([producto_id])[producto_id]
+        return contenido or None
+
+    @classmethod
+    def precalentar(cls, productos_ids):
+        """
+        Renderiza y guarda en cache, con un solo set_many, los paquetes de
+        varios productos principales.
+
+        Returns:
+            Diccionario {producto_id: bytes del paquete o SIN_PAQUETE}
+        """
+        paquetes = {
+            paquete.producto_id: paquete
+            for paquete in PaqueteProducto.objects.filter(producto_id__in=productos_ids)
+        }
+        ids_miembros = {id for paquete in paquetes.values() for id in paquete.productos_ids}
+        productos = Producto.objects.select_related('categoria', 'marca').in_bulk(ids_miembros)
+
+        contenidos = {}
+        for producto_id in productos_ids:
+            paquete = paquetes.get(producto_id)
+            if paquete is None:
+                contenidos[producto_id] = cls.SIN_PAQUETE
+                continue
+            contenidos[producto_id] = JSONRenderer().render({
+                'producto': paquete.producto_id,
+                'productos': [
+                    ProductoSerializer(productos[id]).data
+                    for id in paquete.productos_ids if id in productos
+                ],
+                'precio': str(paquete.precio),
+                'puntuacion': paquete.puntuacion,
+            })
+
+        cache.set_many(
+            {cls.obtener_clave(producto_id): contenido for producto_id, contenido in contenidos.items()},
+            cls.CACHE_TIMEOUT
+        )
+        return contenidos
+
+    @classmethod
+    def reconstruir(cls, productos_ids=None):
+        """
+        Reconstruye los paquetes a partir de las TAMANO mejores reglas globales
+        de cada producto origen y refresca su cache al confirmar la transacción.
+
+        Args:
+            productos_ids: Productos principales a reconstruir, o None para todos
+
+        Returns:
+            Número de paquetes creados
+        """
+        reglas = ReglaAsociacion.objects.filter(particion=GLOBAL).annotate(
+            posicion=Window(
+                RowNumber(),
+                partition_by=F('producto_origen_id'),
+                order_by=[F('lift').desc(), F('confianza').desc()]
+            )
+        ).filter(posicion__lte=cls.TAMANO)
+        if productos_ids is not None:
+            reglas = reglas.filter(producto_origen_id__in=productos_ids)
+        reglas = reglas.order_by('producto_origen_id', 'posicion').values_list(
+            'producto_origen_id', 'producto_recomendado_id', 'lift', 'confianza'
+        )
+
+        miembros_por_origen = {}
+        for origen_id, recomendado_id, lift, confianza in reglas:
+            miembros_por_origen.setdefault(origen_id, []).append((recomendado_id, lift * confianza))
+
+        ids_involucrados = set(miembros_por_origen)
+        ids_involucrados.update(id for miembros in miembros_por_origen.values() for id, _ in miembros)
+        precios = dict(Producto.objects.filter(id__in=ids_involucrados).values_list('id', 'precio'))
+
+        paquetes = []
+        for origen_id, miembros in miembros_por_origen.items():
+            productos_paquete = [origen_id] + [id for id, _ in miembros]
+            paquetes.append(PaqueteProducto(
+                producto_id=origen_id,
+                productos_ids=productos_paquete,
+                precio=sum((precios[id] for id in productos_paquete), Decimal('0.00')),
+                puntuacion=sum(puntuacion for _, puntuacion in miembros) / len(miembros),
+            ))
+
+        with transaction.atomic():
+            anteriores = PaqueteProducto.objects.all()
+            if productos_ids is not None:
+                anteriores = anteriores.filter(producto_id__in=productos_ids)
+            ids_refrescar = set(anteriores.values_list('producto_id', flat=True)) | set(miembros_por_origen)
+            ids_refrescar |= set(productos_ids or [])
+            anteriores.delete()
+
+            creados = PaqueteProducto.objects.bulk_create(paquetes)
+            Miembro = PaqueteProducto.miembros.through
+            Miembro.objects.bulk_create([
+                Miembro(paqueteproducto_id=paquete.id, producto_id=id)
+                for paquete in creados for id in paquete.productos_ids[1:]
+            ])
+
+            ids_refrescar = sorted(ids_refrescar)
+            transaction.on_commit(lambda: cls.precalentar(ids_refrescar))
+
+        return len(creados)
+
+    @classmethod
+    def actualizar_precio(cls, producto_id, diferencia):
+        """
+        Ajusta el precio de los paquetes que contienen un producto (como
+        principal o como miembro) sumando la diferencia de su precio, y
+        refresca su cache al confirmar la transacción.
+
+        Returns:
+            Número de paquetes actualizados
+        """
+        return cls.actualizar_precios({producto_id: diferencia})
+
+    @classmethod
+    def actualizar_precios(cls, diferencias, productos_ids=()):
+        """
+        Versión en bloque de actualizar_precio: suma a cada paquete las
+        diferencias de precio de todos sus productos con un solo UPDATE
+        (CASE por paquete) y refresca su cache al confirmar la transacción.
+
+        Args:
+            diferencias: {producto_id: precio nuevo - precio anterior}
+            productos_ids: Otros productos modificados (sin cambio de precio)
+                cuyos paquetes solo deben volver a renderizarse
+
+        Returns:
+            Número de paquetes con precio actualizado
+        """
+        ids = set(diferencias) | set(productos_ids)
+        if not ids:
+            return 0
+        paquetes = dict(
+            PaqueteProducto.objects.filter(
+                Q(producto_id__in=ids) | Q(miembros__in=ids)
+            ).values_list('producto_id', 'productos_ids').distinct()
+        )
+        if not paquetes:
+            return 0
+
+        ajustes = {}
+        for principal_id, paquete_ids in paquetes.items():
+            ajuste = sum((diferencias.get(id, 0) for id in paquete_ids), Decimal('0'))
+            if ajuste:
+                ajustes[principal_id] = ajuste
+
+        actualizados = 0
+        if ajustes:
+            actualizados = PaqueteProducto.objects.filter(producto_id__in=ajustes).update(
+                precio=F('precio') + Case(
+                    *[When(producto_id=id, then=Value(ajuste)) for id, ajuste in ajustes.items()],
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            )
+
+        ids_principales = sorted(paquetes)
+        transaction.on_commit(lambda: cls.precalentar(ids_principales))
+        return actualizados
@@ -0,0 +1,31 @@
+# recomendaciones/particiones.py
+from django.conf import settings
+from django.utils import timezone
+
+# Partición de las reglas globales
+GLOBAL = ''
+
+def modo_particiones():
+    """Modo de partición configurado: None (solo reglas globales), 'mes' o 'temporada'."""
+    return getattr(settings, 'RECOMENDACIONES_PARTICIONES', None)
+
+def particion_de_fecha(fecha):
+    """
+    Partición de reglas que corresponde a una fecha, según el modo configurado.
+    Se calcula en memoria (sin consultas), tanto al minar como al servir.
+
+    Returns:
+        Nombre de la partición ('mes_03', 'escolar'...), o GLOBAL si no aplica
+    """
+    modo = modo_particiones()
+    if not modo:
+        return GLOBAL
+
+    mes = timezone.localtime(fecha).month if timezone.is_aware(fecha) else fecha.month
+    if modo == 'mes':
+        return f"mes_{mes:02d}"
+    if modo == 'temporada':
+        for temporada, meses in getattr(settings, 'RECOMENDACIONES_TEMPORADAS', {}).items():
+            if mes in meses:
+                return temporada
+    return GLOBAL
@@ -0,0 +1,203 @@
+# recomendaciones/secuencias.py
+import pandas as pd
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
+
+from productos.models import Producto
+from productos.serializers import ProductoSerializer
+from ventas.models import NotaVenta, DetalleNotaVenta
+from .models import TransicionProducto
+from .cache import CacheRecomendaciones
+
+class TransicionesProducto:
+    """
+    Recomendaciones secuenciales ("lo siguiente que suelen comprar").
+
+    A diferencia de las reglas de asociación (productos de una misma nota),
+    cuenta las transiciones producto → producto entre notas de venta
+    consecutivas de cada cliente. El cálculo completo se hace en una pasada
+    vectorizada con pandas; después cada venta solo suma las transiciones
+    desde la nota anterior de su cliente, sin volver a recorrer el historial.
+
+    El top-K de cada producto se guarda en cache como las listas de reglas.
+    """
+
+    PROFUNDIDAD_CACHE = CacheRecomendaciones.PROFUNDIDAD_CACHE
+    CACHE_TIMEOUT = CacheRecomendaciones.CACHE_TIMEOUT
+
+    @staticmethod
+    def obtener_clave(producto_id):
+        """Clave de cache del top-K de transiciones de un producto."""
+        return f"recomendaciones_siguientes_{producto_id}"
+
+    @classmethod
+    def calcular(cls):
+        """
+        Recalcula todas las transiciones a partir del historial de ventas.
+
+        Returns:
+            Número de transiciones distintas guardadas
+        """
+        detalles = pd.DataFrame.from_records(
+            DetalleNotaVenta.objects.filter(
+                nota_venta__cliente__isnull=False
+            ).values_list(
+                'nota_venta_id', 'nota_venta__cliente_id', 'nota_venta__fecha_hora', 'producto_id'
+            ),
+            columns=['nota', 'cliente', 'fecha', 'producto']
+        )
+        if detalles.empty:
+            conteos = pd.Series(dtype='int64')
+        else:
+            detalles = detalles.drop_duplicates(['nota', 'producto'])
+
+            # Notas de cada cliente en orden temporal y la nota que sigue a cada una
+            notas = detalles[['nota', 'cliente', 'fecha']].drop_duplicates('nota').sort_values(
+                ['cliente', 'fecha', 'nota']
+            )
+            notas['siguiente'] = notas.groupby('cliente')['nota'].shift(-1)
+            notas = notas.dropna(subset=['siguiente']).astype({'siguiente': 'int64'})
+
+            # Cada producto de una nota con cada producto de la nota siguiente
+            pares = detalles[['nota', 'producto']].merge(
+                notas[['nota', 'siguiente']], on='nota'
+            ).merge(
+                detalles[['nota', 'producto']].rename(columns={'nota': 'siguiente', 'producto': 'producto_siguiente'}),
+                on='siguiente'
+            )
+            pares = pares[pares['producto'] != pares['producto_siguiente']]
+            conteos = pares.groupby(['producto', 'producto_siguiente']).size()
+
+        with transaction.atomic():
+            TransicionProducto.objects.all().delete()
+            TransicionProducto.objects.bulk_create(
+                [
+                    TransicionProducto(
+                        producto_origen_id=int(origen_id),
+                        producto_siguiente_id=int(siguiente_id),
+                        conteo=int(conteo)
+                    )
+                    for (origen_id, siguiente_id), conteo in conteos.items()
+                ],
+                batch_size=1000
+            )
+            productos_ids = list(Producto.objects.values_list('id', flat=True))
+            transaction.on_commit(lambda: cache.delete_many([cls.obtener_clave(id) for id in productos_ids]))
+
+        return len(conteos)
+
+    @classmethod
+    def registrar_venta(cls, nota_venta, detalles):
+        """
+        Suma las transiciones desde la nota anterior del cliente hacia esta venta.
+        Solo consulta la nota anterior (un acceso por índice), no todo el historial.
+        """
+        if not nota_venta.cliente_id:
+            return
+
+        anterior = NotaVenta.objects.filter(
+            cliente_id=nota_venta.cliente_id, fecha_hora__lte=nota_venta.fecha_hora
+        ).exclude(pk=nota_venta.pk).order_by('-fecha_hora', '-id').first()
+        if anterior is None:
+            return
+
+        origenes = set(anterior.detalles.values_list('producto_id', flat=True))
+        siguientes = {detalle.producto_id for detalle in detalles}
+        pares = {(origen, siguiente) for origen in origenes for siguiente in siguientes if origen != siguiente}
+        if not pares:
+            return
+
+        with transaction.atomic():
+            # Crear en 0 los pares que faltan y después sumar 1 a todos en la base: un par
+            # que otra venta inserta a la vez (el conflicto se ignora) también recibe su +1
+            TransicionProducto.objects.bulk_create(
+                [
+                    TransicionProducto(producto_origen_id=origen, producto_siguiente_id=siguiente, conteo=0)
+                    for origen, siguiente in pares
+                ],
+                ignore_conflicts=True
+            )
+            TransicionProducto.objects.filter(
+                producto_origen_id__in=origenes, producto_siguiente_id__in=siguientes
+            ).exclude(
+                producto_origen_id=F('producto_siguiente_id')
+            ).update(conteo=F('conteo') + 1)
+            transaction.on_commit(lambda: cache.delete_many([cls.obtener_clave(id) for id in origenes]))
+
+    @classmethod
+    def invalidar_productos_mostrados(cls, productos_ids):
+        """Borra el top-K cacheado de los orígenes que llevan a alguno de los productos."""
+        origenes = TransicionProducto.objects.filter(
+            producto_siguiente_id__in=productos_ids
+        ).values_list('producto_origen_id', flat=True).distinct()
+        cache.delete_many([cls.obtener_clave(id) for id in origenes])
+
+    @classmethod
+    def _construir(cls, productos_ids):
+        """
+        Top-K de transiciones de varios productos (probabilidad sobre el total del
+        origen), en una consulta: RowNumber por origen limita las filas traídas a
+        PROFUNDIDAD_CACHE por producto y el total sale de una suma por ventana
+        (se evalúa antes del filtro, sobre todas las transiciones del origen).
+        """
+        ventana = {'partition_by': F('producto_origen_id')}
+        consulta = TransicionProducto.objects.filter(
+            producto_origen_id__in=productos_ids
+        ).annotate(
+            posicion=Window(RowNumber(), order_by=[F('conteo').desc(), F('producto_siguiente_id').asc()], **ventana),
+            total=Window(Sum('conteo'), **ventana)
+        ).filter(
+            posicion__lte=cls.PROFUNDIDAD_CACHE
+        ).select_related(
+            'producto_siguiente__categoria', 'producto_siguiente__marca'
+        ).order_by('producto_origen_id', 'posicion')
+
+        transiciones = {}
+        totales = {}
+        for transicion in consulta:
+            totales[transicion.producto_origen_id] = transicion.total
+            transiciones.setdefault(transicion.producto_origen_id, []).append(transicion)
+
+        return {
+            producto_id: [
+                {
+                    'id': transicion.producto_siguiente_id,
+                    'producto': ProductoSerializer(transicion.producto_siguiente).data,
+                    'puntuacion': transicion.conteo / totales[producto_id],
+                    'conteo': transicion.conteo,
+                    'fuente': 'secuencia'
+                }
+                for transicion in transiciones.get(producto_id, [])
+            ]
+            for producto_id in productos_ids
+        }
+
+    @classmethod
+    def obtener_siguientes_multiples(cls, productos_ids, limite=5, productos_excluir=None):
+        """
+        Obtiene el top de productos siguientes de varios productos con una sola
+        lectura del cache; los que faltan se calculan juntos y se guardan.
+
+        Returns:
+            Diccionario {producto_id: lista de recomendaciones}
+        """
+        productos_excluir = set(productos_excluir or [])
+        claves = {cls.obtener_clave(producto_id): producto_id for producto_id in productos_ids}
+        en_cache = cache.get_many(list(claves))
+
+        listas = {claves[clave]: lista for clave, lista in en_cache.items()}
+        faltantes = [producto_id for producto_id in productos_ids if producto_id not in listas]
+        if faltantes:
+            nuevas = cls._construir(faltantes)
+            cache.set_many(
+                {cls.obtener_clave(producto_id): lista for producto_id, lista in nuevas.items()},
+                cls.CACHE_TIMEOUT
+            )
+            listas.update(nuevas)
+
+        return {
+            producto_id: [r for r in listas[producto_id] if r['id'] not in productos_excluir][:limite]
+            for producto_id in productos_ids
+        }
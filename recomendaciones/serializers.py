@@ -9,9 +9,33 @@ class ReglaAsociacionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReglaAsociacion
         fields = ('id', 'producto_origen', 'producto_recomendado', 'producto_recomendado_detalle',
-                  'soporte', 'confianza', 'lift', 'ultima_actualizacion')
+                  'soporte', 'confianza', 'lift', 'particion', 'ultima_actualizacion')
 
 class ConfiguracionRecomendacionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ConfiguracionRecomendacion
         fields = '__all__'
+
+
+class EventoRecomendacionSerializer(serializers.Serializer):
+    """Valida un lote de impresiones o clicks enviado por el frontend."""
+    tipo = serializers.ChoiceField(choices=(('impresion', 'Impresión'), ('click', 'Click')))
+    producto_origen = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    productos = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=50
+    )
+
+class CarritoRecomendacionSerializer(serializers.Serializer):
+    """Valida los productos del carrito y el límite de una consulta de recomendaciones."""
+    productos = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=100
+    )
+    limite = serializers.IntegerField(min_value=1, max_value=20, default=3)
+
+    @staticmethod
+    def datos_consulta(query_params):
+        """Datos del serializer desde la query string (?productos=1,5,9&limite=3)."""
+        datos = {'productos': [id for id in query_params.get('productos', '').split(',') if id]}
+        if 'limite' in query_params:
+            datos['limite'] = query_params['limite']
+        return datos
@@ -0,0 +1,54 @@
+# recomendaciones/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from productos.models import Producto
+from productos.signals import productos_actualizados
+from ventas.signals import venta_registrada
+from .eventos import AtribucionConversiones
+from .paquetes import PaquetesProducto
+from .tendencias import TendenciasProducto
+from .compras import ComprasCliente
+from .secuencias import TransicionesProducto
+from .cache import CacheRecomendaciones
+
+@receiver(venta_registrada)
+def atribuir_conversiones(sender, nota_venta, detalles, **kwargs):
+    """Registra conversiones de recomendaciones al confirmarse una venta."""
+    AtribucionConversiones.registrar_venta(nota_venta, detalles)
+
+@receiver(venta_registrada)
+def contar_tendencias(sender, nota_venta, detalles, **kwargs):
+    """Suma las unidades vendidas a los contadores de tendencias de la hora."""
+    TendenciasProducto.registrar_venta(detalles, nota_venta.fecha_hora)
+
+@receiver(venta_registrada)
+def registrar_compras_cliente(sender, nota_venta, detalles, **kwargs):
+    """Añade los productos vendidos al conjunto de comprados del cliente."""
+    ComprasCliente.registrar_venta(nota_venta, detalles)
+
+@receiver(venta_registrada)
+def registrar_transiciones(sender, nota_venta, detalles, **kwargs):
+    """Suma las transiciones desde la compra anterior del cliente."""
+    TransicionesProducto.registrar_venta(nota_venta, detalles)
+
+@receiver(post_save, sender=Producto)
+def actualizar_precio_paquetes(sender, instance, created, **kwargs):
+    """
+    Ajusta el precio de los paquetes que contienen el producto si cambió su
+    precio (el anterior lo guarda el pre_save de productos.signals).
+    """
+    anterior = getattr(instance, '_precio_anterior', None)
+    if created or anterior is None or anterior == instance.precio:
+        return
+    PaquetesProducto.actualizar_precio(instance.pk, instance.precio - anterior)
+
+@receiver(productos_actualizados)
+def refrescar_productos_actualizados(sender, productos_ids, diferencias_precio=None, **kwargs):
+    """
+    Tras una modificación en bloque: ajusta el precio de los paquetes e
+    invalida solo las recomendaciones cacheadas que muestran esos productos.
+    """
+    PaquetesProducto.actualizar_precios(diferencias_precio or {}, productos_ids)
+    CacheRecomendaciones.invalidar_productos_mostrados(productos_ids)
+    TransicionesProducto.invalidar_productos_mostrados(productos_ids)
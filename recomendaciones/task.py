@@ -1,5 +1,6 @@
-# recomendaciones/tasks.py
-from celery import shared_task
+# recomendaciones/task.py
+from celery import shared_task, group
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 from django.core.cache import cache
@@ -8,6 +9,8 @@ from celery.utils.log import get_task_logger
 from .models import ConfiguracionRecomendacion
 from .ml import GeneradorRecomendaciones
 from .cache import CacheRecomendaciones
+from .paquetes import PaquetesProducto
+from .bloqueo import GeneracionEnCurso
 
 logger = get_task_logger(__name__)
 
@@ -35,21 +38,7 @@ def actualizar_recomendaciones():
                 )
         
         if ejecutar:
-            # Ejecutar generador
-            generador = GeneradorRecomendaciones()
-            count = generador.generar_recomendaciones()
-            
-            if count is not None:
-                logger.info(f"Se generaron {count} reglas de recomendación exitosamente.")
-                
-                # Limpiar cache de recomendaciones antiguas
-                logger.info("Limpiando cache de recomendaciones...")
-                CacheRecomendaciones.invalidar_cache()
-                
-                return f"Actualización completada: {count} reglas generadas."
-            else:
-                logger.error("Error al generar recomendaciones.")
-                return "Error al generar recomendaciones."
+            return regenerar_recomendaciones(origen='beat')
         
         return "No es necesario actualizar las recomendaciones en este momento."
     
@@ -59,6 +48,48 @@ def actualizar_recomendaciones():
         logger.error(traceback.format_exc())
         return f"Error: {str(e)}"
 
+@shared_task
+def regenerar_recomendaciones(origen='celery'):
+    """
+    Tarea Celery que regenera las reglas (con el bloqueo de generación) y
+    refresca el cache solo de los productos origen cuyo top-K cambió: sus
+    entradas se reescriben por bloques y se descartan los carritos que los
+    contienen. El resto del cache sigue sirviendo aciertos.
+    La usan el beat (vía actualizar_recomendaciones) y el botón del admin.
+    """
+    try:
+        generador = GeneradorRecomendaciones()
+        count = generador.generar_recomendaciones(origen=origen)
+    except GeneracionEnCurso as e:
+        logger.warning(str(e))
+        return str(e)
+    
+    if count is None:
+        logger.error("Error al generar recomendaciones.")
+        return "Error al generar recomendaciones."
+    
+    logger.info(f"Se generaron {count} reglas de recomendación exitosamente.")
+    distribuir = getattr(settings, 'RECOMENDACIONES_PRECALENTAR_DISTRIBUIDO', False)
+    
+    modificados = generador.productos_modificados
+    if modificados is None:
+        # Sin diferencia disponible: limpiar y calentar todo el catálogo
+        logger.info("Limpiando cache de recomendaciones...")
+        CacheRecomendaciones.invalidar_cache()
+        precalentar_cache_recomendaciones(distribuir=distribuir)
+        PaquetesProducto.reconstruir()
+        return f"Actualización completada: {count} reglas generadas."
+    
+    # Reescribir (sin borrar antes) las entradas modificadas y descartar sus carritos
+    modificados = sorted(modificados)
+    logger.info(f"Refrescando cache de {len(modificados)} productos con top-K modificado...")
+    precalentar_cache_recomendaciones(productos_ids=modificados, distribuir=distribuir)
+    CacheRecomendaciones.invalidar_carritos(modificados)
+    # Los paquetes salen del top de reglas: solo cambian los de orígenes modificados
+    PaquetesProducto.reconstruir(modificados)
+    
+    return f"Actualización completada: {count} reglas generadas, {len(modificados)} productos refrescados."
+
 @shared_task
 def precalcular_recomendaciones_populares():
     """
@@ -88,17 +119,8 @@ def precalcular_recomendaciones_populares():
         
         productos_ids = [item['producto'] for item in productos_populares]
         
-        # Para cada producto popular, precalcular y guardar en cache sus recomendaciones
-        total_precalculados = 0
-        for producto_id in productos_ids:
-            recomendaciones = CacheRecomendaciones.obtener_recomendaciones(
-                producto_id=producto_id,
-                limite=10,  # Guardar más de las necesarias para tener margen
-                usar_cache=False  # Forzar recálculo
-            )
-            
-            if recomendaciones:
-                total_precalculados += 1
+        # Precalcular y guardar en cache sus recomendaciones (una consulta y un set_many)
+        total_precalculados = CacheRecomendaciones.precalentar(productos_ids)
         
         logger.info(f"Precálculo completado: {total_precalculados} productos con recomendaciones en cache.")
         return f"Precálculo completado: {total_precalculados} productos procesados."
@@ -109,3 +131,145 @@ def precalcular_recomendaciones_populares():
         logger.error(traceback.format_exc())
         return f"Error: {str(e)}"
 
+
+@shared_task
+def consolidar_eventos_recomendaciones(dias=2):
+    """
+    Tarea Celery que vuelca el buffer de eventos pendientes y recalcula los
+    resúmenes diarios de los últimos `dias` días (incluido hoy).
+    """
+    from datetime import timedelta
+    from decimal import Decimal
+    from django.db.models import Count, Sum
+    from django.db.models.functions import TruncDate
+    from .eventos import BufferEventos
+    from .models import EventoRecomendacion, ResumenDiarioRecomendacion
+
+    try:
+        volcados = BufferEventos.volcar(forzar=True)
+        logger.info(f"Eventos volcados desde el buffer: {volcados}")
+
+        hoy = timezone.localdate()
+        desde = hoy - timedelta(days=dias - 1)
+
+        totales = EventoRecomendacion.objects.filter(
+            fecha__date__gte=desde
+        ).annotate(
+            dia=TruncDate('fecha')
+        ).values('dia', 'tipo').annotate(
+            total=Count('id'),
+            valor_total=Sum('valor')
+        )
+
+        resumenes = {}
+        for fila in totales:
+            resumen = resumenes.setdefault(fila['dia'], {
+                'impresiones': 0, 'clicks': 0, 'conversiones': 0, 'ingreso': Decimal('0.00')
+            })
+            if fila['tipo'] == 'impresion':
+                resumen['impresiones'] = fila['total']
+            elif fila['tipo'] == 'click':
+                resumen['clicks'] = fila['total']
+            elif fila['tipo'] == 'conversion':
+                resumen['conversiones'] = fila['total']
+                resumen['ingreso'] = fila['valor_total'] or Decimal('0.00')
+
+        with transaction.atomic():
+            for dia, valores in resumenes.items():
+                ResumenDiarioRecomendacion.objects.update_or_create(fecha=dia, defaults=valores)
+
+        logger.info(f"Resúmenes diarios actualizados: {len(resumenes)} días.")
+        return f"Consolidación completada: {volcados} eventos volcados, {len(resumenes)} días resumidos."
+
+    except Exception as e:
+        logger.error(f"Error al consolidar eventos de recomendaciones: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return f"Error: {str(e)}"
+
+@shared_task
+def calcular_productos_populares():
+    """
+    Tarea Celery que precalcula los productos más vendidos (global y por categoría)
+    usados como respaldo cuando un producto no tiene reglas de asociación.
+    """
+    try:
+        logger.info("Calculando productos populares para recomendaciones de respaldo...")
+        populares = CacheRecomendaciones.calcular_populares()
+        categorias = len(populares) - 1
+        logger.info(f"Productos populares calculados: {len(populares['global'])} globales, {categorias} categorías.")
+        return f"Populares calculados para {categorias} categorías."
+    
+    except Exception as e:
+        logger.error(f"Error al calcular productos populares: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return f"Error: {str(e)}"
+
+@shared_task
+def precalentar_cache_recomendaciones(tamano_bloque=None, distribuir=False, productos_ids=None):
+    """
+    Tarea Celery que calienta el cache de recomendaciones de todos los productos
+    origen de ReglaAsociacion (o de los indicados), recorriéndolos en bloques
+    ordenados. Cada bloque se resuelve con una consulta y se guarda con un set_many.
+    
+    Args:
+        tamano_bloque: Productos por bloque (RECOMENDACIONES_PRECALENTAR_BLOQUE por defecto)
+        distribuir: Si es True, cada bloque se envía como tarea de un grupo de Celery
+        productos_ids: IDs a calentar; por defecto, todos los productos origen
+    """
+    from .models import ReglaAsociacion
+    
+    try:
+        tamano_bloque = tamano_bloque or getattr(settings, 'RECOMENDACIONES_PRECALENTAR_BLOQUE', 500)
+        if productos_ids is None:
+            productos_ids = list(
+                ReglaAsociacion.objects.values_list(
+                    'producto_origen_id', flat=True
+                ).distinct().order_by('producto_origen_id')
+            )
+        bloques = [
+            productos_ids[inicio:inicio + tamano_bloque]
+            for inicio in range(0, len(productos_ids), tamano_bloque)
+        ]
+        logger.info(f"Precalentando cache de {len(productos_ids)} productos en {len(bloques)} bloques...")
+        
+        if distribuir:
+            group(precalentar_bloque_recomendaciones.s(bloque) for bloque in bloques).apply_async()
+            return f"Precalentamiento distribuido en {len(bloques)} tareas."
+        
+        total = sum(CacheRecomendaciones.precalentar(bloque) for bloque in bloques)
+        logger.info(f"Precalentamiento completado: {total} productos en cache.")
+        return f"Precalentamiento completado: {total} productos en cache."
+    
+    except Exception as e:
+        logger.error(f"Error al precalentar el cache de recomendaciones: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return f"Error: {str(e)}"
+
+@shared_task
+def precalentar_bloque_recomendaciones(productos_ids):
+    """Tarea Celery que calienta el cache de un bloque de productos."""
+    return CacheRecomendaciones.precalentar(productos_ids)
+
+@shared_task
+def calcular_transiciones_productos():
+    """
+    Tarea Celery que recalcula desde cero las transiciones entre compras
+    consecutivas de cada cliente. Solo hace falta para la carga inicial o
+    para corregir desvíos: cada venta nueva las actualiza incrementalmente.
+    """
+    from .secuencias import TransicionesProducto
+
+    try:
+        logger.info("Calculando transiciones entre compras consecutivas...")
+        total = TransicionesProducto.calcular()
+        logger.info(f"Transiciones calculadas: {total}")
+        return f"Transiciones calculadas: {total}."
+
+    except Exception as e:
+        logger.error(f"Error al calcular transiciones de productos: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return f"Error: {str(e)}"
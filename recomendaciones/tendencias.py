@@ -0,0 +1,112 @@
+# recomendaciones/tendencias.py
+from collections import Counter
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+class TendenciasProducto:
+    """
+    Contadores de productos en tendencia por ventanas deslizantes.
+
+    Cada venta confirmada suma sus unidades en el cubo de la hora actual, uno
+    global y uno por categoría. Con Redis cada cubo es un sorted set (ZINCRBY);
+    con otros caches se usa como sustituto un diccionario por cubo (lectura y
+    escritura no atómicas, suficiente para un único proceso o desarrollo).
+    Las consultas solo leen los cubos de la ventana y los combinan en memoria:
+    nunca se agrega sobre la tabla de ventas.
+    """
+
+    PREFIJO = 'recomendaciones_tendencias'
+    HORAS = getattr(settings, 'RECOMENDACIONES_TENDENCIAS_HORAS', 24)
+    # Ventana máxima consultable; los cubos expiran poco después
+    HORAS_MAXIMAS = 7 * 24
+    TTL = (HORAS_MAXIMAS + 1) * 60 * 60
+    # Cliente Redis compartido (ver _cliente_redis)
+    _redis = None
+
+    @classmethod
+    def obtener_clave(cls, hora, categoria_id=None):
+        """Clave del cubo de una hora (global o de una categoría)."""
+        sufijo = 'global' if categoria_id is None else f"categoria_{categoria_id}"
+        return f"{cls.PREFIJO}_{hora:%Y%m%d%H}_{sufijo}"
+
+    @classmethod
+    def _cliente_redis(cls):
+        """
+        Cliente Redis propio sobre REDIS_URL (la misma instancia que usa el cache
+        por defecto), o None sin Redis. Se crea una vez y reutiliza su pool de
+        conexiones; las claves pasan por cache.make_key para compartir prefijo.
+        """
+        if not settings.REDIS_URL:
+            return None
+        if cls._redis is None:
+            cls._redis = redis.from_url(settings.REDIS_URL)
+        return cls._redis
+
+    @classmethod
+    def registrar_venta(cls, detalles, fecha=None):
+        """
+        Suma las unidades vendidas de cada producto en el cubo de la hora.
+
+        Args:
+            detalles: DetalleNotaVenta de la venta confirmada
+            fecha: Momento de la venta (por defecto, ahora)
+        """
+        hora = timezone.localtime(fecha or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+        incrementos = {}
+        for detalle in detalles:
+            claves = [cls.obtener_clave(hora)]
+            if detalle.producto.categoria_id:
+                claves.append(cls.obtener_clave(hora, detalle.producto.categoria_id))
+            for clave in claves:
+                incrementos.setdefault(clave, Counter())[detalle.producto_id] += detalle.cantidad
+        if not incrementos:
+            return
+
+        cliente = cls._cliente_redis()
+        if cliente is not None:
+            pipeline = cliente.pipeline()
+            for clave, conteo in incrementos.items():
+                clave_redis = cache.make_key(clave)
+                for producto_id, unidades in conteo.items():
+                    pipeline.zincrby(clave_redis, unidades, producto_id)
+                pipeline.expire(clave_redis, cls.TTL)
+            pipeline.execute()
+            return
+
+        actuales = cache.get_many(list(incrementos))
+        cache.set_many(
+            {clave: Counter(actuales.get(clave, {})) + conteo for clave, conteo in incrementos.items()},
+            cls.TTL
+        )
+
+    @classmethod
+    def obtener_tendencias(cls, horas=None, categoria_id=None, limite=10):
+        """
+        Combina los cubos de las últimas `horas` horas (incluida la actual).
+
+        Returns:
+            Lista de (producto_id, unidades) ordenada de mayor a menor
+        """
+        horas = min(horas or cls.HORAS, cls.HORAS_MAXIMAS)
+        hora_actual = timezone.localtime().replace(minute=0, second=0, microsecond=0)
+        claves = [cls.obtener_clave(hora_actual - timedelta(hours=h), categoria_id) for h in range(horas)]
+
+        total = Counter()
+        cliente = cls._cliente_redis()
+        if cliente is not None:
+            pipeline = cliente.pipeline()
+            for clave in claves:
+                pipeline.zrange(cache.make_key(clave), 0, -1, withscores=True)
+            for cubo in pipeline.execute():
+                for producto_id, unidades in cubo:
+                    total[int(producto_id)] += int(unidades)
+        else:
+            for cubo in cache.get_many(claves).values():
+                total.update(cubo)
+
+        return total.most_common(limite)
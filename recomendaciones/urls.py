@@ -1,7 +1,12 @@
 # recomendaciones/urls.py
 from django.urls import path, include
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
-from .views import ReglaAsociacionViewSet, ConfiguracionRecomendacionViewSet, RecomendacionesAPIView
+from .views import (
+    ReglaAsociacionViewSet, ConfiguracionRecomendacionViewSet, RecomendacionesAPIView,
+    RecomendacionesAsyncView, EventosRecomendacionAPIView, PaqueteProductoAPIView,
+    TendenciasAPIView, SiguienteCompraAPIView
+)
 
 router = DefaultRouter()
 router.register(r'reglas', ReglaAsociacionViewSet, basename='regla-asociacion')
@@ -10,4 +15,11 @@ router.register(r'configuracion', ConfiguracionRecomendacionViewSet, basename='c
 urlpatterns = [
     path('', include(router.urls)),
     path('sugerencias/', RecomendacionesAPIView.as_view(), name='sugerencias-productos'),
+    # Variante asíncrona: servir con un servidor ASGI (core.asgi) para aprovecharla.
+    # csrf_exempt como en APIView.as_view(): la SessionAuthentication de DRF exige CSRF por su cuenta
+    path('sugerencias/async/', csrf_exempt(RecomendacionesAsyncView.as_view()), name='sugerencias-productos-async'),
+    path('eventos/', EventosRecomendacionAPIView.as_view(), name='eventos-recomendacion'),
+    path('siguiente-compra/', SiguienteCompraAPIView.as_view(), name='siguiente-compra'),
+    path('tendencias/', TendenciasAPIView.as_view(), name='tendencias-productos'),
+    path('paquetes/<int:producto_id>/', PaqueteProductoAPIView.as_view(), name='paquete-producto'),
 ]
\ No newline at end of file
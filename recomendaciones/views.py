@@ -1,15 +1,40 @@
 # recomendaciones/views.py
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
+from django.conf import settings
 from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, HttpResponseNotModified, HttpResponsePermanentRedirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from django.utils import timezone
+from django.views import View
 
 from .models import ReglaAsociacion, ConfiguracionRecomendacion
-from .serializers import ReglaAsociacionSerializer, ConfiguracionRecomendacionSerializer
-from productos.models import Producto
+from .serializers import (
+    ReglaAsociacionSerializer, ConfiguracionRecomendacionSerializer, EventoRecomendacionSerializer,
+    CarritoRecomendacionSerializer
+)
+from .eventos import BufferEventos, AtribucionConversiones
+from .cache import CacheRecomendaciones
+from .paquetes import PaquetesProducto
+from .tendencias import TendenciasProducto
+from .compras import ComprasCliente
+from .secuencias import TransicionesProducto
+from productos.models import Categoria, Marca, Producto
 from productos.serializers import ProductoSerializer
 from core.permissions import IsAdminOrReadOnly
+from core.versionado import VersionesModelo
 from django.core.cache import cache
 
 class ReglaAsociacionViewSet(viewsets.ModelViewSet):
@@ -33,71 +58,210 @@ class RecomendacionesAPIView(APIView):
     """API para obtener recomendaciones basadas en los productos en el carrito."""
     permission_classes = [permissions.AllowAny]  # Cualquiera puede acceder a recomendaciones
     
+    # Segundos que navegadores y caches intermedios pueden reutilizar una respuesta GET
+    HTTP_MAX_AGE = getattr(settings, 'RECOMENDACIONES_HTTP_MAX_AGE', 5 * 60)
+    # Guardar los carritos en cache como bytes JSON ya renderizados
+    PRERENDERIZAR = getattr(settings, 'RECOMENDACIONES_PRERENDERIZAR', True)
+    
+    def get(self, request, *args, **kwargs):
+        """
+        Variante cacheable: ?productos=1,5,9&limite=3 (IDs ordenados y sin repetir).
+        Responde con ETag derivado de la versión de reglas activa, de modo que
+        un cache HTTP intermedio o el navegador puedan reutilizar la respuesta.
+        Con credenciales la respuesta es privada (sin lo ya comprado) y su ETag
+        incluye la versión de las compras del cliente.
+        """
+        serializer = CarritoRecomendacionSerializer(data=CarritoRecomendacionSerializer.datos_consulta(request.query_params))
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        productos_carrito = serializer.validated_data['productos']
+        limite = serializer.validated_data['limite']
+        
+        productos_canonicos = self._productos_canonicos(productos_carrito)
+        redireccion = self._redireccion_canonica(request, request.query_params, productos_canonicos, limite)
+        if redireccion:
+            return redireccion
+        
+        # Responder 304 sin calcular nada (ni leer las compras) si el cliente ya tiene esta versión
+        cliente_id = self._obtener_cliente_id(request.user)
+        particion = CacheRecomendaciones.particion_activa()
+        etag = self._etag(productos_canonicos, limite, particion, cliente_id)
+        if self._coincide_etag(request, etag):
+            respuesta = HttpResponseNotModified()
+        else:
+            # Clientes identificados: sin los productos que ya compraron
+            comprados = ComprasCliente.obtener(cliente_id) if cliente_id else None
+            if cliente_id:
+                # obtener() pudo construir el array (y su versión) recién ahora
+                etag = self._etag(productos_canonicos, limite, particion, cliente_id)
+            respuesta = self._responder_carrito(sorted(set(productos_carrito)), limite, comprados, particion=particion)
+        return self._cabeceras_cache(respuesta, etag, request.user.is_authenticated)
+    
     def post(self, request, *args, **kwargs):
-        productos_carrito = request.data.get('productos', [])
-        limite = request.data.get('limite', 3)
+        serializer = CarritoRecomendacionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        productos_carrito = serializer.validated_data['productos']
+        limite = serializer.validated_data['limite']
         
-        if not productos_carrito:
-            return Response({"detail": "No se especificaron productos."}, 
-                           status=status.HTTP_400_BAD_REQUEST)
+        cliente_id = self._obtener_cliente_id(request.user)
+        comprados = ComprasCliente.obtener(cliente_id) if cliente_id else None
+        return self._responder_carrito(productos_carrito, limite, comprados)
+    
+    @staticmethod
+    def _obtener_cliente_id(usuario):
+        """ID del perfil de cliente del usuario autenticado, o None."""
+        if not usuario.is_authenticated:
+            return None
+        cliente = getattr(usuario, 'cliente_profile', None)
+        return cliente.id if cliente else None
+    
+    @staticmethod
+    def _productos_canonicos(productos_carrito):
+        """Forma canónica del parámetro productos: IDs ordenados y sin repetir."""
+        return ",".join(str(id) for id in sorted(set(productos_carrito)))
+    
+    @classmethod
+    def _redireccion_canonica(cls, request, parametros, productos_canonicos, limite):
+        """
+        Redirección (301) a la URL canónica, para que carritos equivalentes
+        compartan entrada en el cache HTTP; None si la petición ya la usa.
+        """
+        if parametros.get('productos') == productos_canonicos and 'limite' in parametros:
+            return None
+        url = f"{request.path}?{urlencode({'productos': productos_canonicos, 'limite': limite}, safe=',')}"
+        respuesta = HttpResponsePermanentRedirect(url)
+        patch_cache_control(respuesta, public=True, max_age=cls.HTTP_MAX_AGE)
+        return respuesta
+    
+    @staticmethod
+    def _etag(productos_canonicos, limite, particion, cliente_id=None):
+        """
+        ETag de las recomendaciones de un carrito: cambia con la versión de
+        reglas y su partición, con la del catálogo (precios, imágenes y nombres
+        de los productos mostrados) y, para un cliente, con la de sus compras.
+        """
+        version = CacheRecomendaciones.obtener_version()
+        catalogo = VersionesModelo.obtener(Producto, Marca, Categoria)
+        compras = ComprasCliente.obtener_version(cliente_id) if cliente_id else None
+        clave = f"{version}:{catalogo}:{particion}:{productos_canonicos}:{limite}:{cliente_id}:{compras}"
+        return quote_etag(hashlib.md5(clave.encode()).hexdigest())
+    
+    @staticmethod
+    def _coincide_etag(request, etag):
+        if_none_match = request.headers.get('If-None-Match')
+        return bool(if_none_match) and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*')
+    
+    @classmethod
+    def _cabeceras_cache(cls, respuesta, etag, autenticado):
+        """ETag y Cache-Control: las respuestas con credenciales nunca van a caches compartidos."""
+        respuesta['ETag'] = etag
+        if autenticado:
+            patch_cache_control(respuesta, private=True, max_age=0)
+        else:
+            patch_cache_control(respuesta, public=True, max_age=cls.HTTP_MAX_AGE)
+        # La misma URL responde distinto según las credenciales (compras del cliente)
+        patch_vary_headers(respuesta, ('Accept', 'Authorization', 'Cookie'))
+        return respuesta
+    
+    @staticmethod
+    def _filtrar_comprados(listas, comprados):
+        """Quita de cada lista los productos ya comprados: O(k log n) por búsqueda binaria."""
+        return [
+            [r for r in lista if not ComprasCliente.contiene(comprados, r['id'])]
+            for lista in listas
+        ]
+    
+    def _responder_carrito(self, productos_carrito, limite, comprados=None, particion=None):
+        """
+        Responde con las recomendaciones del carrito desde el cache o calculándolas.
         
-        # Generar clave única para este conjunto de productos (para cache)
-        productos_key = "_".join(sorted([str(id) for id in productos_carrito]))
-        cache_key = f"recomendaciones_carrito_{productos_key}_limite_{limite}"
+        Si se indican productos comprados (cliente autenticado), la respuesta es
+        personal: se filtran en memoria sobre las listas en cache de cada producto
+        y no se lee ni se guarda el cache compartido de carritos.
+        
+        Con RECOMENDACIONES_PRERENDERIZAR activo, guardar_carrito guarda los bytes
+        JSON ya renderizados, que se devuelven sin pasar por el renderer de DRF.
+        Un acierto nunca reescribe la entrada: los bytes expiran o se invalidan
+        (cambia la clave del carrito) junto con los datos.
+        """
+        if particion is None:
+            particion = CacheRecomendaciones.particion_activa()
+        if comprados:
+            return Response(self._obtener_recomendaciones_para_carrito(
+                productos_carrito, limite, comprados, particion=particion
+            ))
+        
+        cache_key = CacheRecomendaciones.obtener_clave_carrito(productos_carrito, limite, particion)
         
         # Intentar obtener del cache
         recomendaciones_cache = cache.get(cache_key)
+        if isinstance(recomendaciones_cache, bytes):
+            return HttpResponse(recomendaciones_cache, content_type='application/json')
         if recomendaciones_cache is not None:
             return Response(recomendaciones_cache)
         
         # Si no está en cache, obtener recomendaciones
-        recomendaciones = self._obtener_recomendaciones_para_carrito(productos_carrito, limite)
+        recomendaciones = self._obtener_recomendaciones_para_carrito(productos_carrito, limite, particion=particion)
         
         # Guardar en cache por 1 hora (3600 segundos)
-        cache.set(cache_key, recomendaciones, 3600)
-        
+        guardado = CacheRecomendaciones.guardar_carrito(cache_key, recomendaciones, prerenderizar=self.PRERENDERIZAR)
+        if isinstance(guardado, bytes):
+            return HttpResponse(guardado, content_type='application/json')
         return Response(recomendaciones)
     
-    def _obtener_recomendaciones_para_carrito(self, ids_productos_carrito, limite=3):
+    def _obtener_recomendaciones_para_carrito(self, ids_productos_carrito, limite=3, comprados=None, particion=None):
         """
         Obtiene recomendaciones basadas en los productos del carrito.
         
         Args:
             ids_productos_carrito: Lista de IDs de productos en el carrito
             limite: Número máximo de recomendaciones por producto
+            comprados: Array ordenado de productos a descartar (ya comprados por el cliente)
+            particion: Partición de reglas (por defecto, la activa)
             
         Returns:
             Lista de productos recomendados con sus puntuaciones
         """
-        # Conjunto para evitar recomendar productos que ya están en el carrito
-        productos_excluir = set(ids_productos_carrito)
-        todas_recomendaciones = {}
+        # Una lectura del cache para todo el carrito; solo los fallos van a la base de datos
+        # Obtenemos más de las necesarias por producto para tener margen
+        recomendaciones_por_producto = CacheRecomendaciones.obtener_recomendaciones_multiples(
+            ids_productos_carrito, limite=limite * 2, productos_excluir=ids_productos_carrito,
+            particion=particion
+        )
+        listas = [recomendaciones_por_producto[producto_id] for producto_id in ids_productos_carrito]
+        if comprados:
+            listas = self._filtrar_comprados(listas, comprados)
+        return self._combinar_recomendaciones(listas, limite)
+    
+    @staticmethod
+    def _combinar_recomendaciones(listas_recomendaciones, limite):
+        """
+        Combina las recomendaciones de cada producto del carrito en un único ranking.
         
-        # Para cada producto en el carrito, buscamos sus recomendaciones
-        for producto_id in ids_productos_carrito:
-            # Obtener reglas de asociación donde este producto es el origen
-            reglas = ReglaAsociacion.objects.filter(
-                producto_origen_id=producto_id
-            ).exclude(
-                # Excluir productos que ya están en el carrito
-                producto_recomendado_id__in=productos_excluir
-            ).select_related(
-                'producto_recomendado'
-            ).order_by('-lift', '-confianza')[:limite*2]  # Obtenemos más para tener margen
+        Args:
+            listas_recomendaciones: Una lista de recomendaciones por producto del carrito
+            limite: Número máximo de recomendaciones a retornar
             
+        Returns:
+            Lista de productos recomendados con sus puntuaciones
+        """
+        todas_recomendaciones = {}
+        
+        for recomendaciones in listas_recomendaciones:
             # Agregamos los productos recomendados al diccionario de todas las recomendaciones
-            for regla in reglas:
-                producto = regla.producto_recomendado
-                if producto.id not in todas_recomendaciones:
-                    todas_recomendaciones[producto.id] = {
-                        'producto': ProductoSerializer(producto).data,
-                        'puntuacion': regla.lift * regla.confianza,  # Puntuación combinada
+            for recomendacion in recomendaciones:
+                producto_id = recomendacion['id']
+                if producto_id not in todas_recomendaciones:
+                    todas_recomendaciones[producto_id] = {
+                        'producto': recomendacion['producto'],
+                        'puntuacion': recomendacion['puntuacion'],  # Puntuación combinada
                         'frecuencia': 1
                     }
                 else:
                     # Si ya existe, incrementamos su puntuación y frecuencia
-                    todas_recomendaciones[producto.id]['puntuacion'] += regla.lift * regla.confianza
-                    todas_recomendaciones[producto.id]['frecuencia'] += 1
+                    todas_recomendaciones[producto_id]['puntuacion'] += recomendacion['puntuacion']
+                    todas_recomendaciones[producto_id]['frecuencia'] += 1
         
         # Ordenar por puntuación/frecuencia (promedio) y limitar
         recomendaciones_ordenadas = sorted(
@@ -106,4 +270,237 @@ class RecomendacionesAPIView(APIView):
             reverse=True
         )[:limite]
         
-        return recomendaciones_ordenadas
\ No newline at end of file
+        return recomendaciones_ordenadas
+
+class RecomendacionesAsyncView(View):
+    """
+    Versión asíncrona de RecomendacionesAPIView para servir bajo ASGI (uvicorn).
+    Usa el cache asíncrono y lanza concurrentemente (asyncio.gather) las
+    consultas de los productos del carrito que no están en cache, así un mismo
+    worker atiende muchas peticiones mientras espera a la base de datos.
+
+    Valida con el mismo serializer y autentica con las mismas clases de DRF
+    (JWT, sesión con CSRF) que la vista síncrona; GET redirige a la misma URL
+    canónica y responde con los mismos ETag y Cache-Control.
+    """
+    
+    async def get(self, request, *args, **kwargs):
+        usuario, error = await self._autenticar(request)
+        if error:
+            return error
+        serializer = CarritoRecomendacionSerializer(data=CarritoRecomendacionSerializer.datos_consulta(request.GET))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        productos_carrito = sorted(set(serializer.validated_data['productos']))
+        limite = serializer.validated_data['limite']
+        
+        productos_canonicos = RecomendacionesAPIView._productos_canonicos(productos_carrito)
+        redireccion = RecomendacionesAPIView._redireccion_canonica(request, request.GET, productos_canonicos, limite)
+        if redireccion:
+            return redireccion
+        
+        cliente_id = await sync_to_async(RecomendacionesAPIView._obtener_cliente_id)(usuario)
+        particion = await CacheRecomendaciones.aparticion_activa()
+        etag = await sync_to_async(RecomendacionesAPIView._etag)(productos_canonicos, limite, particion, cliente_id)
+        if RecomendacionesAPIView._coincide_etag(request, etag):
+            respuesta = HttpResponseNotModified()
+        else:
+            respuesta = await self._responder(productos_carrito, limite, particion, cliente_id)
+            if cliente_id:
+                etag = await sync_to_async(RecomendacionesAPIView._etag)(
+                    productos_canonicos, limite, particion, cliente_id
+                )
+        return RecomendacionesAPIView._cabeceras_cache(respuesta, etag, usuario.is_authenticated)
+    
+    async def post(self, request, *args, **kwargs):
+        usuario, error = await self._autenticar(request)
+        if error:
+            return error
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"detail": "JSON inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(datos, dict):
+            return JsonResponse({"detail": "Se esperaba un objeto JSON."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = CarritoRecomendacionSerializer(data=datos)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        cliente_id = await sync_to_async(RecomendacionesAPIView._obtener_cliente_id)(usuario)
+        particion = await CacheRecomendaciones.aparticion_activa()
+        return await self._responder(
+            serializer.validated_data['productos'], serializer.validated_data['limite'], particion, cliente_id
+        )
+    
+    @staticmethod
+    async def _autenticar(request):
+        """
+        Autentica con DEFAULT_AUTHENTICATION_CLASSES como lo haría una vista de DRF.
+        
+        Returns:
+            (usuario, None), o (None, respuesta de error) si las credenciales son inválidas
+        """
+        drf_request = Request(request, authenticators=[clase() for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        try:
+            usuario = await sync_to_async(lambda: drf_request.user)()
+        except APIException as e:
+            return None, JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+        return usuario, None
+    
+    async def _responder(self, productos_carrito, limite, particion, cliente_id=None):
+        """Recomendaciones del carrito: personales si el cliente tiene compras, si no del cache compartido."""
+        comprados = await sync_to_async(ComprasCliente.obtener)(cliente_id) if cliente_id else None
+        if comprados:
+            # Respuesta personal: sin los productos ya comprados y sin el cache compartido de carritos
+            recomendaciones_por_producto = await CacheRecomendaciones.aobtener_recomendaciones_multiples(
+                productos_carrito, limite=limite * 2, productos_excluir=productos_carrito,
+                particion=particion
+            )
+            listas = RecomendacionesAPIView._filtrar_comprados(
+                [recomendaciones_por_producto[producto_id] for producto_id in productos_carrito], comprados
+            )
+            return JsonResponse(RecomendacionesAPIView._combinar_recomendaciones(listas, limite), safe=False)
+        
+        # Misma clave que la vista síncrona: ambas comparten el cache de carritos
+        cache_key = await CacheRecomendaciones.aobtener_clave_carrito(productos_carrito, limite, particion)
+        
+        recomendaciones = await cache.aget(cache_key)
+        if recomendaciones is None:
+            recomendaciones_por_producto = await CacheRecomendaciones.aobtener_recomendaciones_multiples(
+                productos_carrito, limite=limite * 2, productos_excluir=productos_carrito,
+                particion=particion
+            )
+            recomendaciones = RecomendacionesAPIView._combinar_recomendaciones(
+                [recomendaciones_por_producto[producto_id] for producto_id in productos_carrito],
+                limite
+            )
+            recomendaciones = await CacheRecomendaciones.aguardar_carrito(
+                cache_key, recomendaciones, prerenderizar=RecomendacionesAPIView.PRERENDERIZAR
+            )
+        
+        if isinstance(recomendaciones, bytes):
+            # Entrada prerenderizada (compartida con la vista síncrona)
+            return HttpResponse(recomendaciones, content_type='application/json')
+        return JsonResponse(recomendaciones, safe=False)
+
+class EventosRecomendacionAPIView(APIView):
+    """
+    Ingesta de impresiones y clicks sobre recomendaciones.
+    Los eventos se acumulan en el buffer y se guardan en lotes, así que
+    registrar una impresión no implica una escritura en la base de datos.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = EventoRecomendacionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        datos = serializer.validated_data
+        cliente = getattr(request.user, 'cliente_profile', None) if request.user.is_authenticated else None
+        cliente_id = cliente.id if cliente else None
+        ahora = timezone.now()
+
+        eventos = [
+            {
+                'tipo': datos['tipo'],
+                'producto_origen': datos.get('producto_origen'),
+                'producto_recomendado': producto_id,
+                'cliente': cliente_id,
+                'fecha': ahora,
+            }
+            for producto_id in datos['productos']
+        ]
+        BufferEventos.registrar(eventos)
+
+        # Los clicks de clientes identificados quedan pendientes de atribución
+        if datos['tipo'] == 'click' and cliente_id:
+            AtribucionConversiones.registrar_clicks(
+                cliente_id, datos.get('producto_origen'), datos['productos']
+            )
+
+        return Response({"registrados": len(eventos)}, status=status.HTTP_202_ACCEPTED)
+
+class PaqueteProductoAPIView(APIView):
+    """
+    Paquete "comprados juntos frecuentemente" de un producto, con su precio sumado.
+    Se sirve con una sola lectura de cache de los bytes JSON precalculados.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, producto_id, *args, **kwargs):
+        contenido = PaquetesProducto.obtener(producto_id)
+        if contenido is None:
+            return Response({"detail": "El producto no tiene paquete."}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(contenido, content_type='application/json')
+
+class TendenciasAPIView(APIView):
+    """
+    Productos en tendencia: los más vendidos en las últimas horas, a partir de
+    los contadores por hora en cache (sin consultas agregadas sobre las ventas).
+    Parámetros: ?horas=24&categoria=3&limite=10
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            horas = int(request.query_params.get('horas', TendenciasProducto.HORAS))
+            limite = int(request.query_params.get('limite', 10))
+            categoria_id = request.query_params.get('categoria')
+            categoria_id = int(categoria_id) if categoria_id else None
+        except ValueError:
+            return Response({"detail": "Parámetros inválidos."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not 1 <= horas <= TendenciasProducto.HORAS_MAXIMAS:
+            return Response({"detail": f"Las horas deben estar entre 1 y {TendenciasProducto.HORAS_MAXIMAS}."},
+                           status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limite <= 50:
+            return Response({"detail": "El límite debe estar entre 1 y 50."},
+                           status=status.HTTP_400_BAD_REQUEST)
+
+        tendencias = TendenciasProducto.obtener_tendencias(horas, categoria_id, limite)
+        productos = Producto.objects.select_related('categoria', 'marca').in_bulk(
+            [producto_id for producto_id, _ in tendencias]
+        )
+        return Response([
+            {'producto': ProductoSerializer(productos[producto_id]).data, 'unidades': unidades}
+            for producto_id, unidades in tendencias if producto_id in productos
+        ])
+
+class SiguienteCompraAPIView(APIView):
+    """
+    Recomendaciones secuenciales: lo que los clientes suelen comprar en su
+    siguiente pedido después de estos productos. Complementa a las sugerencias
+    por reglas (que solo miran productos de una misma compra).
+    Parámetros: ?productos=1,5&limite=5. Sin productos, un cliente autenticado
+    recibe las de su última compra.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            productos = [int(id) for id in request.query_params.get('productos', '').split(',') if id]
+            limite = int(request.query_params.get('limite', 5))
+        except ValueError:
+            return Response({"detail": "Parámetros inválidos."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limite <= 20:
+            return Response({"detail": "El límite debe estar entre 1 y 20."},
+                           status=status.HTTP_400_BAD_REQUEST)
+
+        if not productos and request.user.is_authenticated:
+            cliente = getattr(request.user, 'cliente_profile', None)
+            ultima = cliente.notas_venta.order_by('-fecha_hora', '-id').first() if cliente else None
+            if ultima:
+                productos = list(ultima.detalles.values_list('producto_id', flat=True))
+        if not productos:
+            return Response({"detail": "No se especificaron productos."},
+                           status=status.HTTP_400_BAD_REQUEST)
+
+        productos = sorted(set(productos))
+        siguientes = TransicionesProducto.obtener_siguientes_multiples(
+            productos, limite=limite * 2, productos_excluir=productos
+        )
+        return Response(RecomendacionesAPIView._combinar_recomendaciones(
+            [siguientes[producto_id] for producto_id in productos], limite
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+        ('ventas', '0003_notaventa_estado_delete_productorecomendacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notaventa',
+            index=models.Index(fields=['-fecha_hora', 'id'], name='ventas_nota_fecha_h_494bf1_idx'),
+        ),
+    ]
@@ -21,6 +21,9 @@ class NotaVenta(models.Model):
 
     class Meta:
         ordering = ['-fecha_hora'] # Ordenar por fecha más reciente
+        indexes = [
+            models.Index(fields=['-fecha_hora', 'id']),  # Paginación por cursor
+        ]
         verbose_name = "Nota de Venta"
         verbose_name_plural = "Notas de Venta"
 
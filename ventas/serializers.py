@@ -2,10 +2,12 @@
 from rest_framework import serializers
 from django.db import transaction # <--- ¡Importar transaction!
 from .models import NotaVenta, DetalleNotaVenta
+from .signals import notificar_venta_registrada
 from productos.serializers import ProductoSerializer
+from core.serializers import CamposDinamicosMixin
 from usuarios.serializers import ClienteSerializer # Para mostrar info del cliente
 
-class DetalleNotaVentaSerializer(serializers.ModelSerializer):
+class DetalleNotaVentaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
         # Mostrar detalles del producto en el detalle de venta
         producto = ProductoSerializer(read_only=True)
         # Campo para escribir el ID del producto al crear/actualizar
@@ -16,7 +18,8 @@ class DetalleNotaVentaSerializer(serializers.ModelSerializer):
             fields = ('id', 'producto', 'producto_id', 'cantidad', 'precio_unitario', 'subtotal')
             read_only_fields = ('subtotal', 'precio_unitario') # Se calculan o se toman del producto
 
-class NotaVentaSerializer(serializers.ModelSerializer):
+class NotaVentaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+        # ?fields=id,fecha_hora,detalles.cantidad,detalles.producto.nombre limita los campos anidados
         # Mostrar detalles de la venta anidados
         detalles = DetalleNotaVentaSerializer(many=True, read_only=True)
         # Mostrar info básica del cliente
@@ -41,9 +44,12 @@ class NotaVentaSerializer(serializers.ModelSerializer):
             detalles_data = validated_data.pop('detalles_payload')
             cliente_id = validated_data.pop('cliente_id', None)
 
-            # Crear la NotaVenta principal
-            nota_venta = NotaVenta.objects.create(cliente_id=cliente_id, **validated_data)
+            # Crear la NotaVenta principal (perform_create puede haber asignado 'cliente' directamente)
+            if 'cliente' not in validated_data:
+                validated_data['cliente_id'] = cliente_id
+            nota_venta = NotaVenta.objects.create(**validated_data)
             monto_total_calculado = 0
+            detalles_creados = []
 
             # Crear los DetallesNotaVenta asociados
             from productos.models import Producto # Importar aquí para evitar dependencia circular
@@ -56,13 +62,14 @@ class NotaVentaSerializer(serializers.ModelSerializer):
                     precio_unitario = producto.precio
                     subtotal = cantidad * precio_unitario
 
-                    DetalleNotaVenta.objects.create(
+                    detalle = DetalleNotaVenta.objects.create(
                         nota_venta=nota_venta,
                         producto=producto,
                         cantidad=cantidad,
                         precio_unitario=precio_unitario,
                         # subtotal se calcula en el save del modelo DetalleNotaVenta
                     )
+                    detalles_creados.append(detalle)
                     monto_total_calculado += subtotal
 
                     # --- ¡IMPORTANTE! Aquí deberías descontar el stock ---
@@ -86,6 +93,9 @@ class NotaVentaSerializer(serializers.ModelSerializer):
             nota_venta.monto_total = monto_total_calculado
             nota_venta.save()
 
+            # Notificar a los suscriptores solo cuando la venta quede confirmada
+            transaction.on_commit(lambda: notificar_venta_registrada(nota_venta, detalles_creados))
+
             return nota_venta
         
 
@@ -0,0 +1,26 @@
+# ventas/signals.py
+import logging
+
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Se envía cuando una NotaVenta y sus detalles ya están confirmados en la base de datos
+# (vía transaction.on_commit). Argumentos: nota_venta, detalles (lista de DetalleNotaVenta).
+# Otras apps (p. ej. recomendaciones) se suscriben para actualizar contadores o caches.
+venta_registrada = Signal()
+
+def notificar_venta_registrada(nota_venta, detalles):
+    """
+    Envía venta_registrada con send_robust: la venta ya está confirmada, así
+    que un suscriptor que falla (cache caído, etc.) solo se registra en el log
+    y no convierte la respuesta en un 500 (que llevaría a repetir la venta).
+    """
+    for receptor, resultado in venta_registrada.send_robust(
+        sender=nota_venta.__class__, nota_venta=nota_venta, detalles=detalles
+    ):
+        if isinstance(resultado, Exception):
+            logger.error(
+                f"Error en {getattr(receptor, '__qualname__', receptor)} tras la venta {nota_venta.pk}: {resultado!r}",
+                exc_info=resultado
+            )
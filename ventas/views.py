@@ -3,9 +3,13 @@ from rest_framework import viewsets, permissions, generics
 from .models import NotaVenta, DetalleNotaVenta
 from .serializers import NotaVentaSerializer, DetalleNotaVentaSerializer
 from core.permissions import IsVendedorOrAdmin, IsCliente, IsAdminOrReadOnly
+from core.pagination import PaginacionSeleccionable
 
 class NotaVentaViewSet(viewsets.ModelViewSet):
     serializer_class = NotaVentaSerializer
+    # ?paginacion=cursor: paginación por cursor sobre el índice (-fecha_hora, id)
+    pagination_class = PaginacionSeleccionable
+    cursor_ordering = ('-fecha_hora', 'id')
 
     def get_queryset(self):
         """ Filtra las ventas: Admins/Vendedores ven todas, Clientes solo las suyas. """